@@ -0,0 +1,19 @@
+# Run the app with Flask's built-in server: python -m app
+#
+# Syncs run inside this process. For production use python -m app.serve,
+# which runs gunicorn workers and keeps syncs in a separate process.
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    # Created under the guard so spawned PDF parse workers do not re-create the app
+    from app.main import create_app
+
+    app = create_app()
+    port = int(os.environ.get('PORT', 5000))
+    host = os.environ.get('HOST', '0.0.0.0')
+
+    logger.info(f"Starting Credit Card Analyzer on {host}:{port}")
+    app.run(host=host, port=port, debug=False)
@@ -0,0 +1,178 @@
+# Gmail accounts synced by this install: credentials, state paths and quotas
+import argparse
+import logging
+import os
+import re
+import shutil
+import threading
+
+from app.gmail.clients import GMAIL_SCOPES, forget_clients
+from app.gmail.fetch import fetcher_from_token
+from app.gmail.throttle import RateLimiter
+from app.storage.db import DEFAULT_ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+ACCOUNTS_DIR = os.getenv('ACCOUNTS_DIR', os.path.join('data', 'accounts'))
+
+# Gmail quota is per mailbox (250 units/s, a message or attachment get costs
+# 5) and per Cloud project; 0 disables a limit
+GMAIL_REQUESTS_PER_SECOND = float(os.getenv('GMAIL_REQUESTS_PER_SECOND', 100))
+GMAIL_ACCOUNT_REQUESTS_PER_SECOND = float(os.getenv('GMAIL_ACCOUNT_REQUESTS_PER_SECOND', 40))
+
+# The token the single-account versions kept in the working directory
+LEGACY_TOKEN_PATH = 'token.json'
+
+_ACCOUNT_ID = re.compile(r'^[a-z0-9][a-z0-9._@+-]{0,63}$')
+
+
+def normalize_account_id(value):
+    """Lower-cased account id; raises ValueError for anything unusable as a directory name"""
+    account_id = str(value or '').strip().lower()
+    if not _ACCOUNT_ID.match(account_id):
+        raise ValueError(f"Invalid account id: {value!r}")
+    return account_id
+
+
+class Account:
+    """One Gmail mailbox and where its token and sync state live.
+
+    The default account keeps the paths used before accounts existed
+    (``token.json`` and the default ledger/backfill files), so existing
+    installs carry on unchanged. Other accounts live in ``ACCOUNTS_DIR/<id>``.
+    """
+
+    def __init__(self, account_id):
+        self.id = normalize_account_id(account_id)
+        if self.id == DEFAULT_ACCOUNT:
+            self.directory = None
+            self.token_path = LEGACY_TOKEN_PATH
+        else:
+            self.directory = os.path.join(ACCOUNTS_DIR, self.id)
+            self.token_path = os.path.join(self.directory, 'token.json')
+
+    def _state_path(self, name):
+        # None means the module default, which is where the default account's state lives
+        return os.path.join(self.directory, name) if self.directory else None
+
+    @property
+    def ledger_path(self):
+        return self._state_path('sync_ledger.json')
+
+    @property
+    def backfill_state_path(self):
+        return self._state_path('backfill_state.json')
+
+    @property
+    def configured(self):
+        return os.path.exists(self.token_path)
+
+    def fetcher(self, rate_limiter=None, **kwargs):
+        """GmailFetcher for this mailbox, throttled by the account's quota unless given a limiter"""
+        return fetcher_from_token(self.token_path,
+                                  rate_limiter=rate_limiter or gmail_limiter(self.id), **kwargs)
+
+    def to_dict(self):
+        return {'account': self.id, 'configured': self.configured}
+
+
+def get_account(account_id=None):
+    return Account(account_id or DEFAULT_ACCOUNT)
+
+
+def list_accounts(configured_only=True):
+    """Accounts with a saved token, the default account first"""
+    accounts = [Account(DEFAULT_ACCOUNT)]
+    if os.path.isdir(ACCOUNTS_DIR):
+        for name in sorted(os.listdir(ACCOUNTS_DIR)):
+            if _ACCOUNT_ID.match(name) and name != DEFAULT_ACCOUNT:
+                accounts.append(Account(name))
+    if configured_only:
+        accounts = [account for account in accounts if account.configured]
+    return accounts
+
+
+def add_account(account_id, token_path=None):
+    """Store credentials for an account.
+
+    Copies an existing OAuth token file, or runs the browser consent flow
+    with ``credentials.json`` when ``token_path`` is not given.
+    """
+    account = Account(account_id)
+    if account.directory:
+        os.makedirs(account.directory, exist_ok=True)
+    if token_path:
+        shutil.copyfile(token_path, account.token_path)
+    else:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        flow = InstalledAppFlow.from_client_secrets_file('credentials.json', GMAIL_SCOPES)
+        creds = flow.run_local_server(port=0)
+        with open(account.token_path, 'w') as f:
+            f.write(creds.to_json())
+    os.chmod(account.token_path, 0o600)
+    logger.info(f"Saved Gmail credentials for account {account.id}")
+    return account
+
+
+def remove_account(account_id):
+    """Forget an account's credentials and sync state; stored transactions are kept"""
+    account = Account(account_id)
+    if account.directory is None:
+        if os.path.exists(account.token_path):
+            os.remove(account.token_path)
+    elif os.path.isdir(account.directory):
+        shutil.rmtree(account.directory)
+    _limiters.pop(account.id, None)
+    forget_clients(account.token_path)
+    logger.info(f"Removed account {account.id}")
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_global_limiter = None
+
+
+def global_limiter():
+    """Limiter for the Gmail requests of all accounts together"""
+    global _global_limiter
+    with _limiters_lock:
+        if _global_limiter is None:
+            _global_limiter = RateLimiter(GMAIL_REQUESTS_PER_SECOND)
+        return _global_limiter
+
+
+def gmail_limiter(account_id):
+    """Per-account limiter that also draws from the global one.
+
+    Limiters are shared per account, so every sync or backfill of one
+    mailbox counts against the same quota.
+    """
+    parent = global_limiter()
+    with _limiters_lock:
+        limiter = _limiters.get(account_id)
+        if limiter is None:
+            limiter = RateLimiter(GMAIL_ACCOUNT_REQUESTS_PER_SECOND, parent=parent)
+            _limiters[account_id] = limiter
+        return limiter
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the Gmail accounts that are synced')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='show accounts')
+    add = commands.add_parser('add', help='authorize an account')
+    add.add_argument('account')
+    add.add_argument('--token', help='existing OAuth token file to copy instead of authorizing')
+    remove = commands.add_parser('remove', help='forget an account (its transactions are kept)')
+    remove.add_argument('account')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'list':
+        for account in list_accounts(configured_only=False):
+            print(f"{account.id:<32} {'configured' if account.configured else 'no token'}")
+    elif args.command == 'add':
+        print(f"Added {add_account(args.account, args.token).id}")
+    else:
+        remove_account(args.account)
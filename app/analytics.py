@@ -0,0 +1,201 @@
+# Vectorized spending analytics over the transaction store
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from app.storage import data_version, get_engine
+from app.storage.db import transactions
+
+logger = logging.getLogger(__name__)
+
+# Median gap (days) ranges that count as a billing period
+RECURRING_PERIODS = (
+    ('weekly', 6, 8),
+    ('monthly', 26, 35),
+    ('quarterly', 85, 97),
+    ('yearly', 355, 376),
+)
+
+# Charges within ~10% of each other fall in the same amount cluster
+AMOUNT_CLUSTER_RATIO = 1.1
+
+
+def load_frame(engine=None):
+    """Read the store into a column-oriented DataFrame"""
+    engine = engine or get_engine()
+    stmt = select(transactions.c.date, transactions.c.amount, transactions.c.category,
+                  transactions.c.bank, transactions.c.merchant, transactions.c.description,
+                  transactions.c.account)
+    with engine.connect() as conn:
+        frame = pd.read_sql(stmt, conn)
+
+    frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce')
+    frame = frame.dropna(subset=['date'])
+    frame['amount'] = frame['amount'].astype('float64')
+    frame['spend'] = np.where(frame['amount'] < 0, -frame['amount'], 0.0)
+    frame['credit'] = np.where(frame['amount'] > 0, frame['amount'], 0.0)
+    frame['month'] = frame['date'].dt.to_period('M')
+    frame['category'] = frame['category'].fillna('Uncategorized').astype('category')
+    frame['bank'] = frame['bank'].astype('category')
+    frame['account'] = frame['account'].astype('category')
+    frame['merchant'] = frame['merchant'].fillna(frame['description'].str.upper()).astype('category')
+    return frame.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+class Analytics:
+    """Caches the loaded frame until the store's data version changes"""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._frame = None
+        self._version = None
+
+    def frame(self):
+        version = data_version(self.engine)
+        with self._lock:
+            if self._frame is None or version != self._version:
+                self._frame = load_frame(self.engine)
+                self._version = version
+                logger.info(f"Loaded {len(self._frame)} transactions for analytics (v{version})")
+            return self._frame
+
+    def _select(self, date_from=None, date_to=None, bank=None, category=None, account=None):
+        frame = self.frame()
+        mask = np.ones(len(frame), dtype=bool)
+        if date_from:
+            mask &= (frame['date'] >= pd.Timestamp(date_from)).to_numpy()
+        if date_to:
+            mask &= (frame['date'] <= pd.Timestamp(date_to)).to_numpy()
+        if account:
+            mask &= (frame['account'] == account).to_numpy()
+        if bank:
+            mask &= (frame['bank'] == bank).to_numpy()
+        if category:
+            mask &= (frame['category'] == category).to_numpy()
+        return frame[mask] if not mask.all() else frame
+
+    def summary(self, **filters):
+        frame = self._select(**filters)
+        if frame.empty:
+            return {'transactions': 0, 'total_spend': 0.0, 'total_credits': 0.0,
+                    'first_date': None, 'last_date': None, 'average_monthly_spend': 0.0}
+        months = frame['month'].nunique()
+        total_spend = float(frame['spend'].sum())
+        return {
+            'transactions': int(len(frame)),
+            'total_spend': round(total_spend, 2),
+            'total_credits': round(float(frame['credit'].sum()), 2),
+            'first_date': frame['date'].iloc[0].strftime('%Y-%m-%d'),
+            'last_date': frame['date'].iloc[-1].strftime('%Y-%m-%d'),
+            'average_monthly_spend': round(total_spend / max(months, 1), 2)
+        }
+
+    def monthly(self, window=3, **filters):
+        """Spend and credits per month with a rolling average of spend"""
+        frame = self._select(**filters)
+        if frame.empty:
+            return []
+        grouped = frame.groupby('month')[['spend', 'credit']].sum()
+        # Months without transactions still belong in a trend line
+        grouped = grouped.reindex(pd.period_range(grouped.index.min(), grouped.index.max(), freq='M'),
+                                  fill_value=0.0)
+        counts = frame.groupby('month').size().reindex(grouped.index, fill_value=0)
+        rolling = grouped['spend'].rolling(window, min_periods=1).mean()
+        return [{
+            'month': str(month),
+            'spend': round(float(spend), 2),
+            'credits': round(float(credit), 2),
+            'transactions': int(count),
+            'rolling_spend': round(float(avg), 2)
+        } for month, spend, credit, count, avg in zip(
+            grouped.index, grouped['spend'].to_numpy(), grouped['credit'].to_numpy(),
+            counts.to_numpy(), rolling.to_numpy())]
+
+    def breakdown(self, by, **filters):
+        """Spend grouped by ``category``, ``bank``, ``account`` or ``merchant``"""
+        if by not in ('category', 'bank', 'account', 'merchant'):
+            raise ValueError(f"Cannot group by {by}")
+        frame = self._select(**filters)
+        debits = frame[frame['spend'] > 0]
+        grouped = debits.groupby(by, observed=True)['spend'].agg(['sum', 'count', 'mean'])
+        grouped = grouped.sort_values('sum', ascending=False)
+        total = float(grouped['sum'].sum()) or 1.0
+        return [{
+            by: str(key),
+            'spend': round(float(row_sum), 2),
+            'transactions': int(row_count),
+            'average': round(float(row_mean), 2),
+            'share': round(float(row_sum) / total, 4)
+        } for key, row_sum, row_count, row_mean in zip(
+            grouped.index, grouped['sum'].to_numpy(), grouped['count'].to_numpy(),
+            grouped['mean'].to_numpy())]
+
+    def top_merchants(self, limit=10, **filters):
+        return self.breakdown('merchant', **filters)[:limit]
+
+    def recurring(self, min_occurrences=3, max_amount_cv=0.15, **filters):
+        """Charges that repeat at a regular interval for a stable amount.
+
+        Debits are clustered by merchant and by amount (within ~10%), then
+        each cluster's gaps between charges are checked against the known
+        billing periods.
+        """
+        frame = self._select(**filters)
+        debits = frame.loc[frame['spend'] > 0, ['merchant', 'date', 'spend']].copy()
+        if debits.empty:
+            return []
+        debits['amount_bucket'] = np.round(
+            np.log(debits['spend'].to_numpy()) / np.log(AMOUNT_CLUSTER_RATIO)).astype('int64')
+        debits = debits.sort_values(['merchant', 'amount_bucket', 'date'], kind='stable')
+        keys = ['merchant', 'amount_bucket']
+        debits['gap'] = debits.groupby(keys, observed=True)['date'].diff().dt.days
+
+        stats = debits.groupby(keys, observed=True).agg(
+            occurrences=('spend', 'size'),
+            amount_mean=('spend', 'mean'),
+            amount_std=('spend', 'std'),
+            gap_median=('gap', 'median'),
+            gap_std=('gap', 'std'),
+            last_date=('date', 'max')
+        )
+        stats = stats[stats['occurrences'] >= min_occurrences]
+        if stats.empty:
+            return []
+
+        gap = stats['gap_median'].to_numpy()
+        period = np.select([(gap >= low) & (gap <= high) for _, low, high in RECURRING_PERIODS],
+                           [name for name, _, _ in RECURRING_PERIODS], default='')
+        amount_cv = (stats['amount_std'].fillna(0) / stats['amount_mean']).to_numpy()
+        regular = stats['gap_std'].fillna(0).to_numpy() <= np.maximum(2.0, 0.1 * gap)
+        keep = (period != '') & (amount_cv <= max_amount_cv) & regular
+
+        stats = stats[keep].assign(period=period[keep])
+        stats = stats.sort_values('amount_mean', ascending=False)
+        next_dates = stats['last_date'] + pd.to_timedelta(stats['gap_median'], unit='D')
+        return [{
+            'merchant': str(merchant),
+            'period': str(row_period),
+            'average_amount': round(float(amount), 2),
+            'occurrences': int(count),
+            'last_date': last.strftime('%Y-%m-%d'),
+            'next_expected': nxt.strftime('%Y-%m-%d')
+        } for (merchant, _), row_period, amount, count, last, nxt in zip(
+            stats.index, stats['period'].to_numpy(), stats['amount_mean'].to_numpy(),
+            stats['occurrences'].to_numpy(), stats['last_date'], next_dates)]
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics():
+    """Process-wide analytics engine"""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = Analytics()
+        return _analytics
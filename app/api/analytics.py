@@ -0,0 +1,78 @@
+# /api/analytics: spending summaries and trends as JSON
+import logging
+
+from flask import Blueprint, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+
+
+def _analytics():
+    # pandas is only imported once an analytics endpoint is used
+    from app.analytics import get_analytics
+    return get_analytics()
+
+
+def _filters():
+    return {
+        'date_from': request.args.get('from'),
+        'date_to': request.args.get('to'),
+        'account': request.args.get('account'),
+        'bank': request.args.get('bank'),
+        'category': request.args.get('category')
+    }
+
+
+def _int_arg(name, default):
+    try:
+        return max(1, int(request.args.get(name, default)))
+    except ValueError:
+        return default
+
+
+def _respond(compute):
+    try:
+        return jsonify(compute())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Analytics error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@analytics_bp.route('/summary')
+def summary():
+    return _respond(lambda: _analytics().summary(**_filters()))
+
+
+@analytics_bp.route('/monthly')
+def monthly():
+    window = _int_arg('window', 3)
+    return _respond(lambda: _analytics().monthly(window=window, **_filters()))
+
+
+@analytics_bp.route('/categories')
+def categories():
+    return _respond(lambda: _analytics().breakdown('category', **_filters()))
+
+
+@analytics_bp.route('/banks')
+def banks():
+    return _respond(lambda: _analytics().breakdown('bank', **_filters()))
+
+
+@analytics_bp.route('/accounts')
+def accounts():
+    return _respond(lambda: _analytics().breakdown('account', **_filters()))
+
+
+@analytics_bp.route('/merchants')
+def merchants():
+    limit = _int_arg('limit', 10)
+    return _respond(lambda: _analytics().top_merchants(limit=limit, **_filters()))
+
+
+@analytics_bp.route('/recurring')
+def recurring():
+    return _respond(lambda: _analytics().recurring(**_filters()))
@@ -0,0 +1,65 @@
+# /api/categories: category overrides per merchant
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from app.categorize import (
+    get_categorizer,
+    merchant_key,
+    remove_category_override,
+    set_category_override,
+)
+from app.categorize.rules import CATEGORY_KEYWORDS, UNCATEGORIZED
+
+logger = logging.getLogger(__name__)
+
+categories_bp = Blueprint('categories', __name__, url_prefix='/api/categories')
+
+
+@categories_bp.route('')
+def list_categories():
+    """Known categories and the user's overrides"""
+    overrides = get_categorizer().overrides
+    names = sorted(set(CATEGORY_KEYWORDS) | set(overrides.values()) | {UNCATEGORIZED})
+    return jsonify({'categories': names, 'overrides': overrides})
+
+
+@categories_bp.route('/lookup')
+def lookup():
+    description = request.args.get('description', '')
+    if not description.strip():
+        return jsonify({'error': 'description is required'}), 400
+    category, merchant = get_categorizer().categorize(description)
+    return jsonify({'description': description, 'merchant': merchant, 'category': category})
+
+
+@categories_bp.route('/overrides/<path:merchant>', methods=['PUT'])
+def put_override(merchant):
+    """Always file a merchant under a category, including stored transactions"""
+    category = ((request.get_json(silent=True) or {}).get('category') or '').strip()
+    if not category:
+        return jsonify({'error': 'category is required'}), 400
+    if len(category) > 64:
+        return jsonify({'error': 'category must be at most 64 characters'}), 400
+
+    merchant = merchant_key(merchant)
+    try:
+        updated = set_category_override(merchant, category)
+    except Exception as e:
+        logger.error(f"Error saving category override for {merchant}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'merchant': merchant, 'category': category,
+                    'updated_transactions': updated})
+
+
+@categories_bp.route('/overrides/<path:merchant>', methods=['DELETE'])
+def delete_override(merchant):
+    merchant = merchant_key(merchant)
+    try:
+        removed = remove_category_override(merchant)
+    except Exception as e:
+        logger.error(f"Error removing category override for {merchant}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if not removed:
+        return jsonify({'error': f"No override for {merchant}"}), 404
+    return jsonify({'success': True, 'merchant': merchant})
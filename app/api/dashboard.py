@@ -0,0 +1,32 @@
+# /api/dashboard: the precomputed summary behind the dashboard's charts
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from app.accounts import list_accounts
+from app.dashboard import dashboard_summary
+from app.storage import DEFAULT_ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
+
+
+@dashboard_bp.route('')
+def summary():
+    """Totals, monthly trend, categories, banks, accounts and top merchants"""
+    account = request.args.get('account') or None
+    # Summaries are cached per account, so only known accounts get one
+    if account and account != DEFAULT_ACCOUNT \
+            and account not in {mailbox.id for mailbox in list_accounts()}:
+        return jsonify({'error': f"Unknown account: {account}"}), 404
+    try:
+        data = dashboard_summary(account)
+    except Exception as e:
+        logger.error(f"Dashboard summary error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    response = jsonify(data)
+    # Charts polling an unchanged summary get a bodyless 304
+    response.add_etag()
+    return response.make_conditional(request)
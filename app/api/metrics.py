@@ -0,0 +1,32 @@
+# /metrics: Prometheus scrape endpoint for this process's counters and histograms
+import logging
+
+from flask import Blueprint, Response, current_app
+
+from app.metrics import SYNC_JOBS, render
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Sync, parser, Gmail and HTTP metrics in the Prometheus text format"""
+    service = current_app.extensions.get('sync_service')
+    if service is not None:
+        # A web worker: the sync service holds every metric, including the
+        # request latencies all workers push to it
+        try:
+            service.push_http_metrics()
+        except Exception as e:
+            logger.warning(f"Could not push HTTP metrics: {e}")
+        return Response(service.render_metrics(), content_type=CONTENT_TYPE)
+
+    jobs = current_app.extensions.get('sync_jobs')
+    if jobs is not None:
+        for state, count in jobs.state_counts().items():
+            SYNC_JOBS.labels(state).set(count)
+    return Response(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,177 @@
+# Sync job endpoints: start, status and a Server-Sent Events progress stream
+import json
+import logging
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from app.accounts import get_account, list_accounts
+from app.jobs import ACTIVE_STATES
+from app.storage import DEFAULT_ACCOUNT
+from app.sync_service import SyncServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+sync_bp = Blueprint('sync', __name__)
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE = 15
+
+
+def _jobs():
+    return current_app.extensions['sync_jobs']
+
+
+def _job_payload(job):
+    data = job.to_dict()
+    data['success'] = data['status'] != 'failed'
+    return data
+
+
+class UnknownAccount(LookupError):
+    pass
+
+
+def _account(body=None):
+    """Account named in the JSON body or query string, the default one if neither"""
+    account = get_account((body or {}).get('account') or request.args.get('account'))
+    if account.id != DEFAULT_ACCOUNT and not account.configured:
+        raise UnknownAccount(f"Unknown account: {account.id}")
+    return account
+
+
+@sync_bp.route('/sync', methods=['POST'])
+def sync_statements():
+    """Start a background sync of one account, or return the one already running"""
+    try:
+        account = _account(request.get_json(silent=True))
+        job, created = _jobs().start(trigger='manual', account=account.id)
+        payload = _job_payload(job)
+        payload['created'] = created
+        return jsonify(payload), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except UnknownAccount as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except SyncServiceUnavailable:
+        # Answered with 503 by the app's error handler
+        raise
+    except Exception as e:
+        logger.error(f"Sync endpoint error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@sync_bp.route('/sync/all', methods=['POST'])
+def sync_all_accounts():
+    """Queue a sync for every configured account"""
+    try:
+        jobs = []
+        for account in list_accounts():
+            job, created = _jobs().start(trigger='manual', account=account.id)
+            payload = _job_payload(job)
+            payload['created'] = created
+            jobs.append(payload)
+        return jsonify({'success': True, 'jobs': jobs}), 202
+    except SyncServiceUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Sync endpoint error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@sync_bp.route('/sync/backfill', methods=['POST'])
+def start_backfill():
+    """Start (or resume) a full-mailbox backfill as a background job"""
+    body = request.get_json(silent=True) or {}
+    options = {}
+    if body.get('banks'):
+        options['banks'] = [str(bank).upper() for bank in body['banks']]
+    if body.get('reset'):
+        options['reset'] = True
+    try:
+        if body.get('rate') is not None:
+            options['rate'] = float(body['rate'])
+        account = _account(body)
+        job, created = _jobs().start(trigger='manual', kind='backfill', account=account.id,
+                                     **options)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except UnknownAccount as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except SyncServiceUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Backfill endpoint error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    payload = _job_payload(job)
+    payload['created'] = created
+    return jsonify(payload), 202
+
+
+@sync_bp.route('/sync/status')
+def latest_sync():
+    """Status of the most recent sync job, optionally of one ``account``"""
+    account = request.args.get('account')
+    try:
+        job = _jobs().latest(get_account(account).id if account else None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if job is None:
+        return jsonify({'status': 'idle'})
+    return jsonify(_job_payload(job))
+
+
+@sync_bp.route('/sync/accounts')
+def sync_accounts():
+    """Per-account sync latency, backlog and Gmail throttling"""
+    jobs = _jobs()
+    metrics = jobs.account_metrics()
+    accounts = []
+    for account in list_accounts(configured_only=False):
+        if not account.configured and account.id not in metrics:
+            continue
+        data = account.to_dict()
+        data.update(metrics.pop(account.id, {'status': 'idle', 'runs': 0}))
+        data['gmail_throttled_seconds'] = jobs.throttled_seconds(account.id)
+        accounts.append(data)
+    # Accounts removed while they still have job history
+    for account_id, data in sorted(metrics.items()):
+        accounts.append(dict(data, account=account_id, configured=False))
+    return jsonify({
+        'accounts': accounts,
+        'max_concurrent': jobs.max_concurrent,
+        'waiting_jobs': jobs.waiting,
+        'gmail_throttled_seconds': jobs.throttled_seconds()
+    })
+
+
+@sync_bp.route('/sync/jobs/<job_id>')
+def sync_job(job_id):
+    job = _jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown sync job'}), 404
+    return jsonify(_job_payload(job))
+
+
+@sync_bp.route('/sync/jobs/<job_id>/events')
+def sync_job_events(job_id):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    job = _jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown sync job'}), 404
+
+    def events():
+        while True:
+            payload = _job_payload(job)
+            finished = payload['status'] not in ACTIVE_STATES
+            event = 'done' if finished else 'progress'
+            yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+            if finished:
+                return
+            while job.wait_for_change(payload['version'], timeout=SSE_KEEPALIVE) == payload['version']:
+                yield ': keep-alive\n\n'
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
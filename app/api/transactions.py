@@ -0,0 +1,142 @@
+# /transactions: paginated, filtered listing and streaming export
+import base64
+import csv
+import io
+import json
+import logging
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from app.storage import SELECTABLE_FIELDS, count_transactions, iter_transactions, page_transactions
+
+logger = logging.getLogger(__name__)
+
+transactions_bp = Blueprint('transactions', __name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(date), int(row_id)
+    except Exception:
+        raise BadRequest('Invalid cursor')
+
+
+def _float_arg(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a number")
+
+
+def _type_arg(args):
+    value = (args.get('type') or '').lower() or None
+    if value not in (None, 'debit', 'credit'):
+        raise BadRequest('type must be debit or credit')
+    return value
+
+
+def parse_filters(args):
+    """Translate query-string parameters into storage filters"""
+    return {
+        'account': args.get('account'),
+        'bank': args.get('bank'),
+        'category': args.get('category'),
+        'date_from': args.get('from') or args.get('date_from'),
+        'date_to': args.get('to') or args.get('date_to'),
+        'min_amount': _float_arg(args, 'min_amount'),
+        'max_amount': _float_arg(args, 'max_amount'),
+        'type': _type_arg(args),
+        'search': args.get('q')
+    }
+
+
+def parse_fields(args):
+    fields = args.get('fields')
+    if not fields:
+        return [f for f in SELECTABLE_FIELDS if f != 'id']
+    fields = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in SELECTABLE_FIELDS]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _ndjson_rows(fields, filters):
+    for row in iter_transactions(fields=fields, batch_size=EXPORT_BATCH_SIZE, **filters):
+        yield json.dumps(row, default=str) + '\n'
+
+
+def _csv_rows(fields, filters):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in iter_transactions(fields=fields, batch_size=EXPORT_BATCH_SIZE, **filters):
+        writer.writerow([row.get(f) for f in fields])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header-only export when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@transactions_bp.route('/transactions')
+def view_transactions():
+    """View processed transactions one page at a time, or export them all"""
+    try:
+        filters = parse_filters(request.args)
+        fields = parse_fields(request.args)
+        export = request.args.get('format', 'json').lower()
+
+        if export == 'ndjson':
+            return Response(stream_with_context(_ndjson_rows(fields, filters)),
+                            mimetype='application/x-ndjson')
+        if export == 'csv':
+            return Response(stream_with_context(_csv_rows(fields, filters)),
+                            mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=transactions.csv'})
+        if export != 'json':
+            raise BadRequest('format must be json, ndjson or csv')
+
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise BadRequest('limit must be an integer')
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+
+        rows, next_key = page_transactions(limit, after=after, fields=fields, **filters)
+        # Every matching transaction, not just this page, as before pagination
+        total = count_transactions(**filters)
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error loading transactions: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    response = jsonify({
+        'count': total,
+        'transactions': rows,
+        'next_cursor': encode_cursor(next_key) if next_key else None
+    })
+    # Pollers sending If-None-Match get a bodyless 304 for unchanged pages
+    response.add_etag()
+    return response.make_conditional(request)
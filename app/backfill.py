@@ -0,0 +1,291 @@
+# Full-mailbox statement backfill with resumable checkpoints
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from app.accounts import get_account, gmail_limiter
+from app.gmail.fetch import backfill_queries
+from app.gmail.ledger import SyncLedger
+from app.gmail.throttle import RateLimiter
+from app.pipeline import StatementPipeline, new_results
+from app.storage import DEFAULT_ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_STATE_PATH = os.getenv('BACKFILL_STATE_PATH', os.path.join('data', 'backfill_state.json'))
+BACKFILL_REQUESTS_PER_SECOND = float(os.getenv('BACKFILL_REQUESTS_PER_SECOND', 10))
+BACKFILL_PAGE_SIZE = int(os.getenv('BACKFILL_PAGE_SIZE', 100))
+# Pages a scheduled backfill handles before giving other accounts a turn
+BACKFILL_SLICE_PAGES = int(os.getenv('BACKFILL_SLICE_PAGES', 5))
+
+
+class BackfillCheckpoint:
+    """How far a backfill has got through each bank's search result pages.
+
+    The page cursor of each query is saved once a page is finished. Inside a
+    page, every completed message is appended to a journal next to the state
+    file; on load the journal is replayed into the sync ledger, so a run
+    that crashed mid-page resumes without downloading those messages again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or BACKFILL_STATE_PATH
+        self.journal_path = f"{self.path}.journal"
+        self._lock = threading.Lock()
+        self.state = self._empty()
+        self._load()
+
+    @staticmethod
+    def _empty():
+        return {'queries': {}, 'failed': [], 'started_at': None, 'finished_at': None,
+                'totals': {'messages': 0, 'bytes': 0, 'seconds': 0.0}}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.state.update(json.load(f))
+        except Exception as e:
+            logger.error(f"Ignoring unreadable backfill state {self.path}: {e}")
+
+    def cursor(self, query_name):
+        return self.state['queries'].setdefault(
+            query_name, {'page_token': None, 'pages': 0, 'done': False})
+
+    @property
+    def complete(self):
+        return self.state['finished_at'] is not None
+
+    def record_message(self, message_id, entry):
+        """Journal a fully processed message (its ledger entry) before the page ends"""
+        line = json.dumps({'message_id': message_id, 'entry': entry}, separators=(',', ':'))
+        with self._lock:
+            with open(self.journal_path, 'a') as f:
+                f.write(line + '\n')
+                f.flush()
+
+    def replay(self, ledger):
+        """Apply journaled messages to ``ledger``; returns how many were applied"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        applied = 0
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    continue
+                for attachment in record['entry'].get('attachments', []):
+                    ledger.record_attachment(record['message_id'], attachment['attachment_id'],
+                                             attachment['filename'], attachment['sha256'])
+                ledger.mark_processed(record['message_id'])
+                applied += 1
+        if applied:
+            logger.info(f"Replayed {applied} checkpointed messages from {self.journal_path}")
+        return applied
+
+    def save(self):
+        """Write the state and drop the journal; call after the ledger is saved"""
+        with self._lock:
+            data = json.dumps(self.state, indent=2)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def reset(self):
+        with self._lock:
+            self.state = self._empty()
+        self.save()
+
+
+def _is_bad_page_token(exc):
+    status = getattr(getattr(exc, 'resp', None), 'status', None)
+    return status is not None and int(status) == 400
+
+
+def run_backfill(progress=None, banks=None, fetcher=None, ledger=None, checkpoint=None,
+                 rate=None, page_size=None, reset=False, account=DEFAULT_ACCOUNT, max_pages=None):
+    """Page through every statement email in an account's mailbox, bank by bank.
+
+    Resumes from the saved checkpoint unless ``reset`` is set. Gmail
+    requests are throttled to ``rate`` per second, within the account's
+    quota. With ``max_pages`` the run stops after that many pages and sets
+    ``yielded`` so it can be continued later. Results include throughput
+    (``messages_per_second``, ``mb_per_second``) for this run.
+    """
+    def report(stage):
+        if progress:
+            progress(stage, results)
+
+    results = new_results(mode='backfill', account=account, pages=0, resumed=False,
+                          yielded=False, messages_per_second=0.0, mb_per_second=0.0,
+                          elapsed_seconds=0.0)
+    held = ExitStack()
+    try:
+        rate = BACKFILL_REQUESTS_PER_SECOND if rate is None else rate
+        page_size = page_size or BACKFILL_PAGE_SIZE
+        mailbox = get_account(account)
+        results['account'] = mailbox.id
+        fetcher = fetcher or mailbox.fetcher(
+            rate_limiter=RateLimiter(rate, parent=gmail_limiter(mailbox.id)))
+        ledger = ledger or SyncLedger(mailbox.ledger_path)
+        # Syncs and backfills of the account take turns on its ledger and checkpoint
+        held.enter_context(ledger.locked())
+        checkpoint = checkpoint or BackfillCheckpoint(mailbox.backfill_state_path)
+        if reset:
+            checkpoint.reset()
+        results['resumed'] = checkpoint.replay(ledger) > 0 or bool(checkpoint.state['queries'])
+        if checkpoint.state['started_at'] is None:
+            checkpoint.state['started_at'] = int(time.time())
+        checkpoint.state['finished_at'] = None
+
+        started = time.monotonic()
+        bytes_before = fetcher.stats['bytes_downloaded']
+        gmail_seconds_before = fetcher.stats['request_seconds']
+        failed = set()
+
+        def message_done(message_id, ok):
+            if ok:
+                ledger.mark_processed(message_id)
+                checkpoint.record_message(message_id, ledger.messages[message_id])
+            else:
+                ledger.mark_failed(message_id)
+                failed.add(message_id)
+
+        def update_throughput():
+            elapsed = max(time.monotonic() - started, 1e-9)
+            downloaded = fetcher.stats['bytes_downloaded'] - bytes_before
+            results['elapsed_seconds'] = round(elapsed, 2)
+            results['messages_per_second'] = round(results['emails_processed'] / elapsed, 2)
+            results['mb_per_second'] = round(downloaded / elapsed / 1e6, 3)
+            results['gmail_requests'] = fetcher.stats['requests']
+            results['gmail_retries'] = fetcher.stats['retries']
+            results['timings']['gmail_seconds'] = round(
+                fetcher.stats['request_seconds'] - gmail_seconds_before, 4)
+            results['timings']['total_seconds'] = round(elapsed, 4)
+
+        pipeline = StatementPipeline(ledger, results, report=report, on_message_done=message_done,
+                                     account=mailbox.id)
+
+        def process(messages):
+            # A message that already failed in this run (the catch-all query
+            # finds it again) waits for the next run's retry
+            todo = [m for m in messages if m['id'] not in failed
+                    and not ledger.is_processed(m['id']) and not ledger.is_exhausted(m['id'])]
+            results['emails_found'] += len(todo)
+            pipeline.process(fetcher.iter_attachments(todo))
+            ledger.save()
+            update_throughput()
+            report('downloading')
+
+        # Messages that failed last time go first, until they run out of attempts
+        retry = [{'id': message_id} for message_id in checkpoint.state['failed']
+                 if not ledger.is_exhausted(message_id)]
+        checkpoint.state['failed'] = []
+        if retry:
+            logger.info(f"Retrying {len(retry)} messages that failed in an earlier backfill")
+            process(retry)
+            checkpoint.save()
+
+        queries = backfill_queries()
+        for name, query in queries.items():
+            if banks and name not in banks:
+                continue
+            cursor = checkpoint.cursor(name)
+            while not cursor['done'] and not results['yielded']:
+                if max_pages and results['pages'] >= max_pages:
+                    results['yielded'] = True
+                    break
+                report('searching')
+                try:
+                    messages, next_token = fetcher.list_page(query, cursor['page_token'], page_size)
+                except Exception as e:
+                    if cursor['page_token'] and _is_bad_page_token(e):
+                        # Expired page token: start the query over; processed
+                        # messages are skipped without being downloaded
+                        logger.warning(f"Restarting {name} backfill after page token error: {e}")
+                        cursor['page_token'] = None
+                        continue
+                    raise
+                results['pages'] += 1
+                process(messages)
+
+                cursor['page_token'] = next_token
+                cursor['pages'] += 1
+                cursor['done'] = not next_token
+                checkpoint.save()
+                logger.info(f"Backfill {name}: page {cursor['pages']} done, "
+                            f"{results['messages_per_second']} msg/s, {results['mb_per_second']} MB/s")
+
+        totals = checkpoint.state['totals']
+        totals['messages'] += results['emails_processed']
+        totals['bytes'] += fetcher.stats['bytes_downloaded'] - bytes_before
+        totals['seconds'] = round(totals['seconds'] + time.monotonic() - started, 2)
+        checkpoint.state['failed'] = sorted(failed)
+        if all(checkpoint.cursor(name)['done'] for name in queries):
+            checkpoint.state['finished_at'] = int(time.time())
+        checkpoint.save()
+
+        update_throughput()
+        results['failed_messages'] = len(failed)
+        results['complete'] = checkpoint.complete
+        logger.info(f"Backfill finished: {results['emails_processed']} messages in "
+                    f"{results['elapsed_seconds']}s")
+        return results
+
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        results.update(success=False, error=str(e))
+        return results
+    finally:
+        held.close()
+
+
+def backfill_slice(progress=None, resumed=False, **options):
+    """Job-manager entry point: a backfill limited to ``BACKFILL_SLICE_PAGES`` pages.
+
+    The manager runs the job again while it reports ``yielded``; those
+    later slices carry on from the checkpoint instead of resetting it.
+    """
+    if resumed:
+        options.pop('reset', None)
+    options.setdefault('max_pages', BACKFILL_SLICE_PAGES)
+    return run_backfill(progress, **options)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import every statement in the mailbox')
+    parser.add_argument('--account', default=DEFAULT_ACCOUNT, help='account to backfill')
+    parser.add_argument('--bank', action='append', dest='banks',
+                        help='limit to a bank code (repeatable); ALL is the catch-all query')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Gmail requests per second (default BACKFILL_REQUESTS_PER_SECOND)')
+    parser.add_argument('--reset', action='store_true', help='ignore the saved checkpoint')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.storage import init_db
+    init_db()
+
+    def show(stage, counts):
+        print(f"\r{stage:<12} {counts['emails_processed']} messages, "
+              f"{counts['new_transactions']} new transactions, "
+              f"{counts['messages_per_second']} msg/s, {counts['mb_per_second']} MB/s", end='')
+
+    result = run_backfill(progress=show, banks=args.banks, rate=args.rate, reset=args.reset,
+                          account=args.account)
+    print()
+    print(json.dumps(result, indent=2))
+    raise SystemExit(0 if result['success'] else 1)
@@ -0,0 +1 @@
+# Offline benchmarks: synthetic statements, a fake Gmail mailbox and timed runs (python -m app.bench)
@@ -0,0 +1,109 @@
+# python -m app.bench: run the offline benchmarks and write the results as JSON
+#
+# Everything runs in a scratch directory (database, downloads, ledger and
+# parse cache are all relative paths), so a real installation is never
+# touched. The code below is guarded because spawned parse workers import
+# this module too.
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+STAGES = ('stages', 'sync', 'startup', 'api')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark sync, parsing and API latency offline')
+    parser.add_argument('--only', choices=STAGES, nargs='+', default=list(STAGES),
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--statements', type=int, default=40, help='statements in the fake mailbox')
+    parser.add_argument('--transactions', type=int, default=60, help='transactions per statement')
+    parser.add_argument('--encrypted', type=float, default=0.5,
+                        help='share of statements that are password protected')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='simulated Gmail round trip in seconds')
+    parser.add_argument('--concurrency', type=int, default=8, help='Gmail fetch workers')
+    parser.add_argument('--web-workers', type=int, default=2,
+                        help='gunicorn workers for the startup benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='store sizes to measure API latency at')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='relative change reported by --baseline (default 0.20)')
+    parser.add_argument('--workdir', help='keep data here instead of a temporary directory')
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    from app.bench import suite
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='cc-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ.update(suite.BENCH_PROFILE)
+    os.environ['SYNC_INTERVAL_MINUTES'] = '0'
+    os.environ.pop('DATABASE_URL', None)
+
+    from app.storage import init_db
+    init_db()
+
+    results = {'environment': suite.environment(), 'config': vars(args)}
+    try:
+        if 'stages' in args.only:
+            print('Timing pipeline stages...', file=sys.stderr)
+            results['stages'] = suite.bench_stages(min(args.statements, 20), args.transactions,
+                                                   args.encrypted)
+        if 'sync' in args.only:
+            print('Timing an end-to-end sync...', file=sys.stderr)
+            results['sync'] = suite.bench_sync(args.statements, args.transactions, args.encrypted,
+                                               args.latency, args.concurrency)
+        if 'startup' in args.only:
+            print('Timing server cold start...', file=sys.stderr)
+            results['startup'] = suite.bench_startup(args.web_workers)
+        if 'api' in args.only:
+            print(f"Timing API latency at {', '.join(map(str, args.rows))} rows...", file=sys.stderr)
+            results['api'] = suite.bench_api(sorted(args.rows), args.requests)
+        results['peak_rss_mb'] = suite.peak_rss_mb()
+    finally:
+        os.chdir('/')
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Wrote {output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if baseline:
+        with open(baseline) as f:
+            changes = suite.compare(json.load(f), results, args.threshold)
+        for metric, old, new, change, regressed in changes:
+            print(f"{'REGRESSED' if regressed else 'improved '} {metric}: {old} -> {new} ({change:+.1%})",
+                  file=sys.stderr)
+        if not changes:
+            print(f"No metric changed by more than {args.threshold:.0%}", file=sys.stderr)
+        # Non-zero exit so CI can flag a regression
+        return 1 if any(regressed for *_, regressed in changes) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    # Skip interpreter teardown: parse workers and daemon threads are done with
+    exit_code = main()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exit_code)
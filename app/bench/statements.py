@@ -0,0 +1,134 @@
+# Synthetic credit card statement PDFs in each supported bank's layout
+import io
+import random
+from datetime import date, timedelta
+
+from app.parsers.passwords import BANK_STRATEGY_ORDER, STRATEGIES, load_profile
+
+LINES_PER_PAGE = 48
+
+# Merchants the categorization rules know, plus a few they have to guess at
+MERCHANTS = (
+    'SWIGGY BANGALORE', 'ZOMATO LTD', 'DOMINOS PIZZA', 'STARBUCKS COFFEE', 'BIGBASKET',
+    'BLINKIT', 'DMART AVENUE SUPERMARTS', 'AMAZON PAY INDIA', 'FLIPKART INTERNET',
+    'MYNTRA DESIGNS', 'NYKAA E RETAIL', 'UBER INDIA', 'OLA CABS', 'RAPIDO BIKE', 'HPCL FUEL',
+    'BPCL PETROL PUMP', 'MAKEMYTRIP', 'IRCTC', 'INDIGO AIRLINES', 'NETFLIX COM',
+    'SPOTIFY INDIA', 'AIRTEL PAYMENTS', 'JIO RECHARGE', 'APOLLO PHARMACY', 'PVR CINEMAS',
+    'BOOKMYSHOW', 'CULT FIT', 'URBAN COMPANY', 'SRI LAKSHMI TRADERS', 'KRISHNA STORES',
+)
+
+# Bank -> (issuer header, heading over the transaction table, line formatter)
+LAYOUTS = {
+    'SBI': ('SBI Card  www.sbicard.com', 'TRANSACTIONS FOR SBI CARD',
+            lambda d, text, amount, credit: f"{d:%d %b %y}  {text}  {amount:,.2f} {'C' if credit else 'D'}"),
+    'HDFC': ('HDFC Bank Credit Cards', 'Domestic Transactions',
+             lambda d, text, amount, credit: f"{d:%d/%m/%Y} 12:{d.day:02d}:00  {text}  {amount:,.2f}"
+                                             f"{' Cr' if credit else ''}"),
+    'AXIS': ('Axis Bank Credit Card Statement', 'Transaction Details',
+             lambda d, text, amount, credit: f"{d:%d/%m/%Y}  {text}  {amount:,.2f} {'Cr' if credit else 'Dr'}"),
+    'SCB': ('Standard Chartered Bank  www.sc.com/in', 'Your Transactions',
+            lambda d, text, amount, credit: f"{d:%d %b %Y}  {text}  {amount:,.2f}{' CR' if credit else ''}"),
+    'ICICI': ('ICICI Bank Credit Card Statement', 'Transaction Details',
+              lambda d, text, amount, credit: f"{d:%d/%m/%Y}  {d:%y%m%d}{int(amount * 100) % 10000:04d}  "
+                                              f"{text}  {amount:,.2f}{' CR' if credit else ''}"),
+}
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def render_pdf(pages):
+    """A minimal text-only PDF, one page per list of lines"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    page_refs = []
+    for lines in pages:
+        body = ['BT /F1 9 Tf 11 TL 40 800 Td']
+        body.extend(f"({_escape(line)}) Tj T*" for line in lines)
+        body.append('ET')
+        stream = '\n'.join(body).encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (len(objects)))
+        page_refs.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % ref for ref in page_refs), len(page_refs))
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % number + obj + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.writelines(b'%010d 00000 n \n' % offset for offset in offsets)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def encrypt_pdf(pdf, password):
+    from PyPDF2 import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    writer.append_pages_from_reader(PdfReader(io.BytesIO(pdf)))
+    writer.encrypt(password)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def statement_password(bank, profile=None):
+    """The password the bank's most common pattern gives for the profile in the environment"""
+    profile = profile or load_profile()
+    for name in BANK_STRATEGY_ORDER.get(bank, ()):
+        password = STRATEGIES[name](profile)
+        if password:
+            return password
+    return None
+
+
+def generate_statement(bank, transactions=60, period_end=None, seed=0, password=None):
+    """One statement: a summary page, the transaction pages and a page of terms.
+
+    Returns ``(pdf_bytes, expected_transaction_count)``; with ``password``
+    the PDF is encrypted the way banks send them.
+    """
+    header, table_heading, format_line = LAYOUTS[bank]
+    rng = random.Random(f"{bank}:{seed}")
+    period_end = period_end or date.today()
+    period_start = period_end - timedelta(days=30)
+
+    lines = []
+    for _ in range(transactions):
+        day = period_start + timedelta(days=rng.randint(0, 30))
+        credit = rng.random() < 0.05
+        amount = round(rng.uniform(500, 20000) if credit else rng.lognormvariate(6.5, 1.1), 2)
+        text = 'PAYMENT RECEIVED THANK YOU' if credit else f"{rng.choice(MERCHANTS)} {rng.randint(1, 999):03d}"
+        lines.append(format_line(day, text, amount, credit))
+    lines.sort()
+
+    summary = [header, f"Statement Date {period_end:%d/%m/%Y}", 'Account Summary',
+               f"Previous Balance {rng.uniform(0, 50000):,.2f}",
+               f"Total Amount Due {rng.uniform(1000, 90000):,.2f}",
+               f"Minimum Amount Due {rng.uniform(100, 5000):,.2f}",
+               f"Payment Due Date {period_end + timedelta(days=18):%d/%m/%Y}"]
+    pages = [summary]
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        pages.append([header, table_heading] + lines[start:start + LINES_PER_PAGE])
+    pages.append(['Important Information'] + ['Terms and conditions apply. ' * 4] * 30)
+
+    pdf = render_pdf(pages)
+    return (encrypt_pdf(pdf, password) if password else pdf), len(lines)
+
+
+def statement_factory(transactions=60, encrypted_share=0.5, seed=0):
+    """``pdf_factory`` for ``generate_mailbox``: a fresh statement per message"""
+    def make(bank, index):
+        rng = random.Random(f"{seed}:{index}")
+        password = statement_password(bank) if rng.random() < encrypted_share else None
+        period_end = date.today() - timedelta(days=index % 60)
+        return generate_statement(bank, transactions, period_end, seed=f"{seed}:{index}",
+                                  password=password)[0]
+    return make
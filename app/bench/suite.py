@@ -0,0 +1,465 @@
+# Timed runs over synthetic data; every result is plain JSON so runs can be diffed
+import json
+import logging
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from app.bench.statements import LAYOUTS, MERCHANTS, statement_factory
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Password ingredients the synthetic statements are encrypted with
+BENCH_PROFILE = {
+    'USER_FIRST_NAME_4_CHARS': 'BENC',
+    'USER_DOB_DDMM': '0101',
+    'USER_DOB_DDMMYY': '010190',
+    'USER_DOB_DDMMYYYY': '01011990',
+    'USER_CARD_LAST4': '4321',
+}
+
+# Rows inserted per upsert_transactions() call when growing the store
+LOAD_BATCH_SIZE = 20000
+
+# Libraries a web worker should never have to import
+HEAVY_MODULES = ('googleapiclient', 'google_auth_oauthlib', 'pdfplumber', 'pdfminer', 'pypdfium2',
+                 'PyPDF2', 'camelot', 'pandas', 'numpy', 'sklearn')
+
+# Builds the app like a worker of app.serve, requests the common pages and
+# reports load time, memory and which heavy libraries got imported
+WEB_WORKER_PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+from app.main import create_app
+from app.sync_service import SyncServiceClient
+imported = time.perf_counter()
+app = create_app(sync_service=SyncServiceClient())
+created = time.perf_counter()
+client = app.test_client()
+for url in ('/', '/health', '/transactions?limit=100', '/api/dashboard', '/sync/status', '/metrics'):
+    assert client.get(url).status_code == 200, url
+finished = time.perf_counter()
+print(json.dumps({
+    'import_seconds': round(imported - started, 3),
+    'create_app_seconds': round(created - imported, 3),
+    'first_requests_seconds': round(finished - created, 3),
+    'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    'heavy_modules': sorted(name for name in json.loads(sys.argv[1]) if name in sys.modules),
+}))
+'''
+
+
+def latency_summary(samples):
+    """Count, total and percentiles (in ms) of a list of durations in seconds"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {
+        'count': len(ordered),
+        'total_seconds': round(sum(ordered), 4),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def peak_rss_mb(children=False):
+    """Peak resident memory of this process (or its finished children) so far"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+def git_revision():
+    """Commit the tree is at, and whether it has local changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=PROJECT_ROOT, capture_output=True, text=True,
+                               timeout=10).stdout.strip()
+        return commit or None, bool(dirty)
+    except Exception:
+        return None, None
+
+
+def environment():
+    commit, dirty = git_revision()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def synthetic_mailbox(statements, transactions, encrypted_share, seed):
+    from app.gmail.fake import generate_mailbox
+
+    return generate_mailbox(statements, banks=list(LAYOUTS), days=80,
+                            pdf_factory=statement_factory(transactions, encrypted_share, seed))
+
+
+def bench_stages(statements=20, transactions=60, encrypted_share=0.5, latency=0.0):
+    """Per-stage latency, one stage at a time, for each statement of a fake mailbox"""
+    from app.categorize import get_categorizer
+    from app.gmail.fake import FakeGmailService
+    from app.gmail.fetch import GmailFetcher, build_search_queries
+    from app.parsers.passwords import PasswordResolver
+    from app.parsers.registry import parse_with_parser
+    from app.storage import upsert_transactions
+
+    mailbox = synthetic_mailbox(statements, transactions, encrypted_share, seed='stages')
+    service = FakeGmailService(mailbox, latency=latency)
+    fetcher = GmailFetcher(lambda: service, max_workers=1)
+    resolver = PasswordResolver(path=os.path.join('data', 'bench_password_strategies.json'))
+    categorizer = get_categorizer()
+    timings = {stage: [] for stage in ('search', 'fetch', 'decrypt', 'parse', 'categorize', 'store')}
+
+    def timed(stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings[stage].append(time.perf_counter() - started)
+        return result
+
+    queries = build_search_queries()
+    for _ in range(5):
+        found, _ = timed('search', fetcher.search, queries)
+
+    parsed = stored = 0
+    for message in mailbox:
+        bank = message['sender'].split()[0]
+        for attachment_id, attachment in message['attachments'].items():
+            path, _, _ = timed('fetch', fetcher.download_attachment, message['id'], attachment_id)
+            password = timed('decrypt', resolver.resolve, path, bank)
+            _, _, txns = timed('parse', parse_with_parser, path, bank, attachment['filename'], password)
+            for txn in txns:
+                txn['message_id'] = message['id']
+            timed('categorize', categorizer.apply, txns)
+            stored += timed('store', upsert_transactions, txns)
+            parsed += len(txns)
+
+    return {
+        'statements': statements,
+        'messages_found': len(found),
+        'transactions_parsed': parsed,
+        'transactions_stored': stored,
+        'pdfs_encrypted': resolver.encrypted,
+        'decrypt_attempts': resolver.attempts,
+        'latency': {stage: latency_summary(samples) for stage, samples in timings.items()},
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _warm_parse_pool(transactions):
+    """Start every parse worker so the sync is timed against a running pool"""
+    from app.bench.statements import generate_statement
+    from app.parsers import submit_parse
+    from app.parsers.pool import PARSE_WORKERS
+
+    path = os.path.join('data', 'bench_warmup.pdf')
+    with open(path, 'wb') as f:
+        f.write(generate_statement('HDFC', transactions)[0])
+    futures = [submit_parse(path, 'HDFC', 'warmup.pdf') for _ in range(max(PARSE_WORKERS, 1) * 2)]
+    for future in futures:
+        future.result()
+    os.remove(path)
+
+
+def bench_sync(statements=40, transactions=60, encrypted_share=0.5, latency=0.02, concurrency=8):
+    """End-to-end sync throughput: the real sync code over a fake Gmail mailbox"""
+    from app.gmail.fake import FakeGmailService
+    from app.gmail.fetch import GmailFetcher
+    from app.main import sync_credit_card_statements
+    from app.parsers.pool import PARSE_WORKERS, shutdown_parse_pool
+
+    _warm_parse_pool(transactions)
+    mailbox = synthetic_mailbox(statements, transactions, encrypted_share, seed='sync')
+    service = FakeGmailService(mailbox, latency=latency)
+    fetcher = GmailFetcher(lambda: service, max_workers=concurrency)
+
+    started = time.perf_counter()
+    results = sync_credit_card_statements(fetcher=fetcher)
+    elapsed = time.perf_counter() - started
+    # Workers only report their peak memory once they have exited
+    shutdown_parse_pool()
+
+    return {
+        'statements': statements,
+        'gmail_latency_seconds': latency,
+        'fetch_concurrency': concurrency,
+        'parse_workers': PARSE_WORKERS,
+        'success': results.get('success', False),
+        'errors': len(results.get('errors', [])) + (0 if results.get('success', False) else 1),
+        'seconds': round(elapsed, 3),
+        'pdfs_downloaded': results.get('pdfs_downloaded', 0),
+        'transactions_parsed': results.get('transactions_parsed', 0),
+        'new_transactions': results.get('new_transactions', 0),
+        'gmail_requests': results.get('gmail_requests', 0),
+        # Where the sync spent its time, as reported by the sync itself
+        'timings': results.get('timings', {}),
+        'statements_per_second': round(results.get('pdfs_downloaded', 0) / elapsed, 2),
+        'transactions_per_second': round(results.get('transactions_parsed', 0) / elapsed, 1),
+        'peak_rss_mb': peak_rss_mb(),
+        'parse_workers_peak_rss_mb': peak_rss_mb(children=True),
+    }
+
+
+def synthetic_rows(count, start=0, seed=0):
+    """Transactions spread over three years of several cards, for loading the store"""
+    rng = random.Random(f"rows:{seed}:{start}")
+    today = date.today()
+    banks = list(LAYOUTS)
+    for i in range(start, start + count):
+        merchant = rng.choice(MERCHANTS)
+        credit = rng.random() < 0.05
+        amount = round(rng.uniform(500, 20000) if credit else rng.lognormvariate(6.5, 1.1), 2)
+        yield {
+            'date': (today - timedelta(days=rng.randint(0, 3 * 365))).isoformat(),
+            'description': 'PAYMENT RECEIVED' if credit else f"{merchant} {i:07d}",
+            'amount': amount if credit else -amount,
+            'transaction_type': 'CREDIT' if credit else 'DEBIT',
+            'bank': rng.choice(banks),
+            'card': f"{rng.randint(1, 4) * 1111:04d}",
+            'merchant': None if credit else merchant,
+            'message_id': f"bench{i // 60:07d}",
+        }
+
+
+def grow_store(target, seed=0):
+    """Insert synthetic rows until the store holds about ``target``; returns rows/s"""
+    from app.categorize import get_categorizer
+    from app.storage import count_transactions, upsert_transactions
+
+    categorizer = get_categorizer()
+    current = count_transactions()
+    if current >= target:
+        return None
+    started = time.perf_counter()
+    inserted = 0
+    for start in range(current, target, LOAD_BATCH_SIZE):
+        rows = list(synthetic_rows(min(LOAD_BATCH_SIZE, target - start), start, seed))
+        categorizer.apply(rows)
+        inserted += upsert_transactions(rows)
+    return round(inserted / (time.perf_counter() - started), 1)
+
+
+def process_memory_mb(pid):
+    """Resident and private (unshared) memory of a process, from Linux's /proc; None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return None
+    return {'rss_mb': round(fields['Rss'] / 1024, 1),
+            'private_mb': round((fields['Private_Clean'] + fields['Private_Dirty']) / 1024, 1)}
+
+
+def child_processes(pid):
+    """``(pid, command line)`` of the children of ``pid`` (Linux only)"""
+    children = []
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else ():
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", 'rb') as f:
+                command = f.read().replace(b'\0', b' ').decode(errors='replace')
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append((int(entry), command))
+    return children
+
+
+def _wait_for_http(url, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}; see serve.log")
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError(f"{url} did not answer within {timeout}s")
+
+
+def bench_startup(workers=2):
+    """Cold start and memory of ``python -m app.serve``, and what a web worker imports"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, HOST='127.0.0.1', PORT=str(port), WEB_WORKERS=str(workers),
+               SYNC_SERVICE_ADDRESS=os.path.abspath('sync_service.sock'),
+               PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.getenv('PYTHONPATH')])))
+    base_url = f"http://127.0.0.1:{port}"
+
+    with open('serve.log', 'wb') as log:
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, '-m', 'app.serve'], env=env, stdout=log,
+                                  stderr=subprocess.STDOUT)
+        try:
+            ready = _wait_for_http(f"{base_url}/health", server)
+            first_requests = {}
+            for name, path in (('dashboard_page_ms', '/'), ('transactions_ms', '/transactions?limit=100'),
+                               ('dashboard_data_ms', '/api/dashboard')):
+                request_started = time.perf_counter()
+                with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                    response.read()
+                first_requests[name] = round((time.perf_counter() - request_started) * 1000, 2)
+
+            # Give every worker time to finish warming up before measuring memory
+            time.sleep(1)
+            supervisor = process_memory_mb(server.pid)
+            master = service = None
+            web = []
+            for pid, command in child_processes(server.pid):
+                if 'app.sync_service' in command:
+                    service = process_memory_mb(pid)
+                elif 'gunicorn' in command:
+                    master = process_memory_mb(pid)
+                    web = [process_memory_mb(worker) for worker, _ in child_processes(pid)]
+            web = [memory for memory in web if memory]
+
+            probe = subprocess.run([sys.executable, '-c', WEB_WORKER_PROBE, json.dumps(HEAVY_MODULES)],
+                                   env=env, capture_output=True, text=True, check=True)
+            web_app = json.loads(probe.stdout.strip().splitlines()[-1])
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    return {
+        'web_workers': workers,
+        'cold_start_seconds': round(ready - started, 3),
+        'first_request_ms': first_requests,
+        'supervisor_rss_mb': supervisor['rss_mb'] if supervisor else None,
+        'master_rss_mb': master['rss_mb'] if master else None,
+        'worker_rss_mb': max(memory['rss_mb'] for memory in web) if web else None,
+        'worker_private_mb': max(memory['private_mb'] for memory in web) if web else None,
+        'sync_service_rss_mb': service['rss_mb'] if service else None,
+        'web_app': web_app,
+    }
+
+
+def bench_api(row_counts=(1000, 100000, 1000000), requests=200):
+    """Latency of /transactions and the dashboard as the store grows"""
+    from app.dashboard import dashboard_summary, refresh_dashboard_summaries
+    from app.main import create_app
+    from app.storage import count_transactions
+
+    client = create_app().test_client()
+    report = {}
+    for target in row_counts:
+        load_rate = grow_store(target)
+        rows = count_transactions()
+
+        dashboard_summary()
+        started = time.perf_counter()
+        refresh_dashboard_summaries()
+        summary_seconds = time.perf_counter() - started
+
+        first_page = client.get('/transactions?limit=100').get_json()
+        oldest = first_page['transactions'][-1]['date'] if first_page.get('transactions') else ''
+        endpoints = {
+            'transactions_first_page': '/transactions?limit=100',
+            'transactions_next_page': f"/transactions?limit=100&cursor={first_page.get('next_cursor') or ''}",
+            'transactions_filtered': f"/transactions?limit=100&bank=HDFC&to={oldest}&min_amount=500&type=debit",
+            'transactions_search': '/transactions?limit=50&q=SWIGGY',
+            'dashboard_page': '/',
+            'dashboard_data': '/api/dashboard',
+        }
+        latency = {}
+        for name, url in endpoints.items():
+            samples = []
+            for attempt in range(requests + 3):
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+                # The first few requests warm caches and are not counted
+                if attempt >= 3:
+                    samples.append(elapsed)
+            latency[name] = latency_summary(samples)
+
+        report[str(target)] = {
+            'rows': rows,
+            'load_rows_per_second': load_rate,
+            'dashboard_summary_build_seconds': round(summary_seconds, 4),
+            'latency': latency,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        logger.info(f"API latency measured at {rows} rows")
+    return report
+
+
+# Metrics where a larger number is an improvement
+HIGHER_IS_BETTER = ('per_second',)
+COMPARED_SUFFIXES = ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'seconds', 'per_second', '_mb')
+# A single outlier, or the sum of the samples, says little about a regression
+IGNORED_SUFFIXES = ('max_ms', 'total_seconds')
+
+
+def flatten(data, prefix=''):
+    """``{'a': {'b': 1}}`` -> ``{'a.b': 1}``, numbers only"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, threshold=0.20):
+    """Timing, throughput and memory metrics that changed by more than ``threshold``.
+
+    Returns ``(metric, baseline, current, change, regressed)`` tuples, where
+    ``change`` is relative to the baseline.
+    """
+    old, new = flatten(baseline), flatten(current)
+    changes = []
+    for metric in sorted(set(old) & set(new)):
+        if not metric.endswith(COMPARED_SUFFIXES) or metric.endswith(IGNORED_SUFFIXES) \
+                or not old[metric]:
+            continue
+        change = (new[metric] - old[metric]) / old[metric]
+        if abs(change) < threshold:
+            continue
+        higher_is_better = metric.endswith(HIGHER_IS_BETTER)
+        changes.append((metric, old[metric], new[metric], round(change, 4),
+                        change < 0 if higher_is_better else change > 0))
+    return changes
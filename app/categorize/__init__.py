@@ -0,0 +1,10 @@
+# Merchant normalization and transaction categorization
+from app.categorize.engine import (
+    Categorizer,
+    get_categorizer,
+    recategorize_all,
+    remove_category_override,
+    set_category_override,
+)
+from app.categorize.normalize import merchant_key, normalize_description
+from app.categorize.rules import UNCATEGORIZED
@@ -0,0 +1,15 @@
+# python -m app.categorize: re-run categorization over stored transactions
+import argparse
+import logging
+
+from app.categorize import recategorize_all
+from app.storage import init_db
+
+parser = argparse.ArgumentParser(description='Re-categorize stored transactions')
+parser.add_argument('--uncategorized', action='store_true',
+                    help='only touch transactions that are still Uncategorized')
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO)
+init_db()
+print(f"Updated {recategorize_all(only_uncategorized=args.uncategorized)} transactions")
@@ -0,0 +1,232 @@
+# Rule-based merchant categorization with memoized results
+import difflib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from app.categorize.matcher import KeywordMatcher
+from app.categorize.normalize import merchant_key, normalize_description
+from app.categorize.rules import UNCATEGORIZED, default_rules
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_MEMO_SIZE = int(os.getenv('CATEGORY_MEMO_SIZE', 50000))
+FUZZY_THRESHOLD = float(os.getenv('CATEGORY_FUZZY_THRESHOLD', 0.85))
+
+# Shorter words produce too many accidental fuzzy matches
+FUZZY_MIN_LENGTH = 5
+
+try:
+    from Levenshtein import ratio as _similarity
+except ImportError:
+    def _similarity(a, b):
+        return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class _LRU:
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            return default
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+_MISSING = object()
+
+
+class Categorizer:
+    """Assigns a category to card transaction descriptions.
+
+    Lookup order: a user override for the merchant key, then the keyword
+    rules (one Aho-Corasick pass over the merchant key, then over the whole
+    normalized description), then a fuzzy match of single words against
+    rule keywords to catch misspellings. A rule matching the merchant key is
+    memoized by it, so every branch and reference number of a merchant
+    shares one entry; other results are memoized by normalized description.
+    Overrides are checked before the memo, so changing one takes effect at once.
+    """
+
+    def __init__(self, rules=None, overrides=None, memo_size=None, fuzzy_threshold=None):
+        rules = list(rules if rules is not None else default_rules())
+        self.matcher = KeywordMatcher(rules)
+        self.overrides = dict(overrides or {})
+        self.fuzzy_threshold = FUZZY_THRESHOLD if fuzzy_threshold is None else fuzzy_threshold
+        memo_size = CATEGORY_MEMO_SIZE if memo_size is None else memo_size
+        self._memo = _LRU(memo_size)
+        self._fuzzy_memo = _LRU(memo_size)
+        self._lock = threading.Lock()
+        self.stats = {'overrides': 0, 'memo_hits': 0, 'rules': 0, 'fuzzy': 0, 'misses': 0}
+
+        # Single-word 'contains' keywords bucketed by first letter and length;
+        # misspellings rarely change the first letter, so each fuzzy lookup
+        # only compares against a handful of keywords
+        self._fuzzy_vocab = {}
+        for keyword, category, kind in rules:
+            if kind == 'contains' and keyword.isalpha() and len(keyword) >= FUZZY_MIN_LENGTH:
+                self._fuzzy_vocab.setdefault((keyword[0], len(keyword)), []).append((keyword, category))
+
+    def _fuzzy_word(self, word):
+        best_score, best_category = self.fuzzy_threshold, None
+        for length in range(len(word) - 2, len(word) + 3):
+            for keyword, category in self._fuzzy_vocab.get((word[0], length), ()):
+                score = _similarity(word, keyword)
+                if score >= best_score:
+                    best_score, best_category = score, category
+        return best_category
+
+    def _fuzzy(self, normalized):
+        for word in normalized.split():
+            if len(word) < FUZZY_MIN_LENGTH:
+                continue
+            category = self._fuzzy_memo.get(word, _MISSING)
+            if category is _MISSING:
+                category = self._fuzzy_word(word)
+                self._fuzzy_memo.put(word, category)
+            if category:
+                return category
+        return None
+
+    def _rule_category(self, merchant, description):
+        with self._lock:
+            category = self._memo.get(merchant)
+            if category is not None:
+                self.stats['memo_hits'] += 1
+                return category
+
+            match = self.matcher.best(merchant)
+            if match:
+                category = match[0]
+                self.stats['rules'] += 1
+                self._memo.put(merchant, category)
+                return category
+
+            # Keyword outside the merchant key ("PAYU MUMBAI SWIGGY"), a
+            # misspelling, or nothing at all
+            normalized = normalize_description(description)
+            category = self._memo.get(normalized)
+            if category is not None:
+                self.stats['memo_hits'] += 1
+                return category
+            match = self.matcher.best(normalized)
+            if match:
+                category = match[0]
+                self.stats['rules'] += 1
+            else:
+                category = self._fuzzy(normalized)
+                if category:
+                    self.stats['fuzzy'] += 1
+                else:
+                    category = UNCATEGORIZED
+                    self.stats['misses'] += 1
+            self._memo.put(normalized, category)
+            return category
+
+    def rule_category(self, description):
+        """Category from the rules alone, ignoring overrides"""
+        return self._rule_category(merchant_key(description), description)
+
+    def categorize(self, description):
+        """``(category, merchant)`` for one description"""
+        merchant = merchant_key(description)
+        category = self.overrides.get(merchant)
+        if category is not None:
+            with self._lock:
+                self.stats['overrides'] += 1
+            return category, merchant
+        return self._rule_category(merchant, description), merchant
+
+    def categorize_batch(self, descriptions):
+        """``(category, merchant)`` pairs, computing each distinct description once"""
+        results = {}
+        for description in descriptions:
+            if description not in results:
+                results[description] = self.categorize(description)
+        return [results[description] for description in descriptions]
+
+    def apply(self, txns):
+        """Fill in category and merchant on transactions the parser left uncategorized"""
+        pending = [txn for txn in txns if txn.get('category') in (None, '', UNCATEGORIZED)]
+        for txn, (category, merchant) in zip(
+                pending, self.categorize_batch([txn['description'] for txn in pending])):
+            txn['category'] = category
+            txn['merchant'] = merchant
+        return txns
+
+    def set_override(self, merchant, category):
+        with self._lock:
+            self.overrides[merchant] = category
+
+    def remove_override(self, merchant):
+        with self._lock:
+            self.overrides.pop(merchant, None)
+
+    def replace_overrides(self, overrides):
+        with self._lock:
+            self.overrides = dict(overrides)
+
+
+_categorizer = None
+_overrides_version = None
+_categorizer_lock = threading.Lock()
+
+
+def get_categorizer():
+    """Process-wide categorizer with the user's stored overrides.
+
+    Overrides are reloaded when another process (a web worker, the sync
+    service) has changed them since they were last read.
+    """
+    global _categorizer, _overrides_version
+    from app.storage.categories import load_overrides, overrides_version
+
+    with _categorizer_lock:
+        version = overrides_version()
+        if _categorizer is None:
+            _categorizer = Categorizer(overrides=load_overrides())
+            logger.info(f"Categorizer ready with {len(_categorizer.overrides)} overrides")
+        elif version != _overrides_version:
+            _categorizer.replace_overrides(load_overrides())
+            logger.info(f"Reloaded {len(_categorizer.overrides)} category overrides")
+        _overrides_version = version
+        return _categorizer
+
+
+def set_category_override(merchant, category):
+    """Persist an override and apply it to stored and future transactions"""
+    from app.storage.categories import save_override
+
+    updated = save_override(merchant, category)
+    get_categorizer().set_override(merchant, category)
+    return updated
+
+
+def remove_category_override(merchant):
+    """Delete an override; that merchant falls back to the rules"""
+    from app.storage.categories import delete_override
+
+    categorizer = get_categorizer()
+    removed = delete_override(merchant, categorizer.rule_category)
+    categorizer.remove_override(merchant)
+    return removed
+
+
+def recategorize_all(only_uncategorized=False):
+    """Re-run categorization over every stored transaction"""
+    from app.storage.categories import recategorize_transactions
+
+    return recategorize_transactions(get_categorizer().categorize_batch,
+                                     only_uncategorized=only_uncategorized)
@@ -0,0 +1,70 @@
+# Aho-Corasick keyword index for whole-word rule matching
+from collections import deque
+
+
+class KeywordMatcher:
+    """Finds every rule keyword in a text in one pass, however many rules exist.
+
+    Texts are matched in the form ``"^ WORD WORD $"`` and keywords are
+    compiled with surrounding spaces, so a keyword only matches whole words:
+    ``contains`` rules match anywhere, ``prefix`` rules only at the start and
+    ``exact`` rules only the whole text.
+    """
+
+    KINDS = ('exact', 'prefix', 'contains')
+
+    def __init__(self, rules):
+        # rules: iterable of (keyword, category, kind)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for order, (keyword, category, kind) in enumerate(rules):
+            words = ' '.join(keyword.upper().split())
+            if not words:
+                continue
+            pattern = {'exact': f"^ {words} $", 'prefix': f"^ {words} ",
+                       'contains': f" {words} "}[kind]
+            # Lower ranks win: exact before prefix before contains, then longer
+            # keywords, then earlier rules
+            rank = (self.KINDS.index(kind), -len(words), order)
+            self._add(pattern, (rank, category, keyword))
+        self._build()
+
+    def _add(self, pattern, entry):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(entry)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def best(self, normalized):
+        """``(category, keyword)`` of the highest-priority match, or None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        best = None
+        state = 0
+        for char in f"^ {normalized} $":
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for entry in output[state]:
+                if best is None or entry[0] < best[0]:
+                    best = entry
+        return (best[1], best[2]) if best else None
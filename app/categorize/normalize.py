@@ -0,0 +1,31 @@
+# Description clean-up shared by categorization and analytics
+import re
+
+# Words that carry no merchant identity in card descriptions
+NOISE_WORDS = frozenset({
+    'PVT', 'PRIVATE', 'LTD', 'LIMITED', 'LLP', 'INC', 'CO', 'INDIA', 'IN', 'INTERNET',
+    'PAYMENTS', 'PAYMENT', 'ONLINE', 'WWW', 'COM', 'POS', 'ECOM', 'THE', 'AND'
+})
+
+_NON_ALPHA_RE = re.compile(r'[^A-Z]+')
+
+
+def normalize_description(description):
+    """Upper-case letter runs of a description.
+
+    "Swiggy*Bangalore12345" -> "SWIGGY BANGALORE". Store and reference
+    numbers disappear, so rule results memoized by this form are shared
+    across every branch of a merchant.
+    """
+    return ' '.join(_NON_ALPHA_RE.sub(' ', str(description).upper()).split())
+
+
+def merchant_key(description):
+    """Collapse a card description to a short merchant key.
+
+    "AMAZON PAY INDIA PVT LTD" -> "AMAZON PAY"; user category overrides and
+    merchant analytics are keyed by it.
+    """
+    words = normalize_description(description).split()
+    words = [w for w in words if w not in NOISE_WORDS and len(w) > 1]
+    return (' '.join(words[:2]) or str(description).upper().strip())[:64]
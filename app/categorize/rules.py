@@ -0,0 +1,71 @@
+# Built-in categorization rules
+UNCATEGORIZED = 'Uncategorized'
+
+# Category -> whole-word keywords found anywhere in a normalized description
+CATEGORY_KEYWORDS = {
+    'Food & Dining': (
+        'SWIGGY', 'ZOMATO', 'DOMINOS', 'MCDONALDS', 'KFC', 'PIZZA HUT', 'STARBUCKS',
+        'BURGER KING', 'CAFE COFFEE DAY', 'CCD', 'BARBEQUE NATION', 'EATSURE', 'FAASOS',
+        'RESTAURANT', 'CAFE', 'BAKERY', 'DHABA'
+    ),
+    'Groceries': (
+        'BIGBASKET', 'BLINKIT', 'GROFERS', 'ZEPTO', 'DMART', 'AVENUE SUPERMARTS',
+        'RELIANCE FRESH', 'RELIANCE SMART', 'SPENCERS', 'MORE RETAIL', 'NATURES BASKET',
+        'JIOMART', 'SUPERMARKET', 'INSTAMART'
+    ),
+    'Shopping': (
+        'AMAZON', 'FLIPKART', 'MYNTRA', 'AJIO', 'NYKAA', 'MEESHO', 'TATA CLIQ', 'TATACLIQ',
+        'SNAPDEAL', 'SHOPPERS STOP', 'LIFESTYLE', 'WESTSIDE', 'PANTALOONS', 'DECATHLON',
+        'CROMA', 'RELIANCE DIGITAL', 'IKEA', 'LENSKART', 'FIRSTCRY'
+    ),
+    'Transportation': (
+        'UBER', 'OLA', 'OLACABS', 'RAPIDO', 'NAMMA YATRI', 'METRO', 'FASTAG', 'PARKING'
+    ),
+    'Fuel': (
+        'HPCL', 'BPCL', 'IOCL', 'INDIAN OIL', 'BHARAT PETROLEUM', 'HINDUSTAN PETROLEUM',
+        'SHELL', 'PETROL', 'FUEL', 'FILLING STATION'
+    ),
+    'Travel': (
+        'MAKEMYTRIP', 'GOIBIBO', 'CLEARTRIP', 'YATRA', 'IXIGO', 'IRCTC', 'INDIGO',
+        'AIR INDIA', 'VISTARA', 'SPICEJET', 'AKASA', 'AIRBNB', 'OYO', 'MARRIOTT', 'TAJ',
+        'HOTEL', 'AIRLINES', 'REDBUS'
+    ),
+    'Entertainment': (
+        'NETFLIX', 'SPOTIFY', 'HOTSTAR', 'DISNEY', 'PRIME VIDEO', 'SONYLIV', 'ZEE',
+        'YOUTUBE', 'BOOKMYSHOW', 'PVR', 'INOX', 'CINEPOLIS', 'STEAM', 'PLAYSTATION'
+    ),
+    'Utilities': (
+        'AIRTEL', 'JIO', 'VODAFONE', 'VI', 'BSNL', 'ACT FIBERNET', 'TATA PLAY', 'ELECTRICITY',
+        'BESCOM', 'MSEDCL', 'TATA POWER', 'ADANI ELECTRICITY', 'GAS', 'WATER', 'BROADBAND',
+        'RECHARGE', 'BILLDESK'
+    ),
+    'Health': (
+        'APOLLO', 'PHARMEASY', 'NETMEDS', 'MEDPLUS', 'PHARMACY',
+        'HOSPITAL', 'CLINIC', 'DIAGNOSTICS', 'CULT FIT', 'CULTFIT'
+    ),
+    'Insurance': ('INSURANCE', 'LIC', 'POLICYBAZAAR', 'ACKO', 'HDFC ERGO', 'ICICI LOMBARD'),
+    'Education': ('UDEMY', 'COURSERA', 'BYJUS', 'UNACADEMY', 'SCHOOL', 'COLLEGE', 'UNIVERSITY'),
+    'Fees & Charges': (
+        'ANNUAL FEE', 'LATE FEE', 'LATE PAYMENT FEE', 'FINANCE CHARGES', 'INTEREST',
+        'GST', 'IGST', 'CGST', 'SGST', 'SERVICE TAX', 'FUEL SURCHARGE', 'OVERLIMIT'
+    ),
+    'Cashback & Rewards': ('CASHBACK', 'REWARD', 'REWARDS', 'REVERSAL'),
+    'Payment': ('PAYMENT THANK YOU', 'PAYMENT RECEIVED', 'AUTO PAYMENT', 'AUTOPAY', 'BBPS'),
+    'Income': ('SALARY',),
+}
+
+# Category -> keywords that only count at the start of a description
+CATEGORY_PREFIXES = {
+    'Payment': ('PAYMENT', 'NEFT', 'IMPS', 'UPI PAYMENT'),
+    'Fees & Charges': ('FEE', 'CHARGES'),
+}
+
+
+def default_rules():
+    """``(keyword, category, kind)`` tuples for KeywordMatcher"""
+    rules = []
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        rules.extend((keyword, category, 'contains') for keyword in keywords)
+    for category, keywords in CATEGORY_PREFIXES.items():
+        rules.extend((keyword, category, 'prefix') for keyword in keywords)
+    return rules
@@ -0,0 +1,143 @@
+# Precomputed dashboard summary, rebuilt off the request path when the store changes
+import logging
+import threading
+import time
+
+from app.storage import data_version, get_engine, rollup_totals, top_merchants
+
+logger = logging.getLogger(__name__)
+
+# Months in the trend chart, and the window of its rolling average
+TREND_MONTHS = 12
+TREND_WINDOW = 3
+TOP_MERCHANTS = 10
+TOP_CATEGORIES = 8
+
+
+def _month_range(first, last):
+    year, month = int(first[:4]), int(first[5:7])
+    while f"{year:04d}-{month:02d}" <= last:
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _trend(engine, account):
+    rows = {row['month']: row for row in rollup_totals(group_by=('month',), engine=engine,
+                                                       account=account)}
+    if not rows:
+        return []
+    # Months without transactions still belong in a trend line
+    months = [rows.get(month) or {'month': month, 'transactions': 0, 'spend': 0.0, 'credits': 0.0}
+              for month in _month_range(min(rows), max(rows))]
+    for index, row in enumerate(months):
+        window = months[max(0, index - TREND_WINDOW + 1):index + 1]
+        row['rolling_spend'] = round(sum(m['spend'] for m in window) / len(window), 2)
+    return months[-TREND_MONTHS:]
+
+
+def compute_summary(engine=None, account=None):
+    """Everything the dashboard shows, read from the spending and merchant rollups"""
+    engine = engine or get_engine()
+    version = data_version(engine)
+    return {
+        'version': version,
+        'account': account,
+        'generated_at': time.time(),
+        'totals': rollup_totals(engine=engine, account=account)[0],
+        'months': _trend(engine, account),
+        'categories': rollup_totals(group_by=('category',), engine=engine, order_by='spend',
+                                    limit=TOP_CATEGORIES, account=account),
+        'banks': rollup_totals(group_by=('bank',), engine=engine, order_by='spend', account=account),
+        'accounts': rollup_totals(group_by=('account',), engine=engine, order_by='spend',
+                                  account=account),
+        'merchants': top_merchants(engine, TOP_MERCHANTS, account=account),
+    }
+
+
+class DashboardSummary:
+    """Caches ``compute_summary()`` until the store's data version changes.
+
+    Only the first call waits for the summary. After that, a changed data
+    version starts a rebuild on a background thread and callers get the
+    previous summary until it finishes, so rendering the dashboard costs
+    one version lookup however many transactions are stored.
+    """
+
+    def __init__(self, engine=None, account=None):
+        self.engine = engine
+        self.account = account
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._summary = None
+        self._refreshing = False
+
+    def get(self):
+        with self._lock:
+            summary = self._summary
+        if summary is None:
+            with self._build_lock:
+                # Whoever got here first (e.g. the startup warm-up) may have built it
+                return self._summary or self._build()
+        if data_version(self.engine) != summary['version']:
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh_in_background, name='dashboard-summary',
+                                 daemon=True).start()
+        return summary
+
+    def refresh(self):
+        """Rebuild the summary now (blocking) and cache it"""
+        with self._build_lock:
+            return self._build()
+
+    def _build(self):
+        started = time.perf_counter()
+        summary = compute_summary(self.engine, self.account)
+        with self._lock:
+            self._summary = summary
+        logger.info(f"Built dashboard summary v{summary['version']} "
+                    f"in {time.perf_counter() - started:.3f}s")
+        return summary
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Dashboard summary refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+_summaries = {}
+_summaries_lock = threading.Lock()
+
+
+def dashboard_summary(account=None):
+    """Cached dashboard summary for all accounts, or just ``account``"""
+    with _summaries_lock:
+        summary = _summaries.get(account)
+        if summary is None:
+            summary = _summaries[account] = DashboardSummary(account=account)
+    return summary.get()
+
+
+def refresh_dashboard_summaries():
+    """Rebuild every cached summary now, e.g. after a bulk import"""
+    with _summaries_lock:
+        summaries = list(_summaries.values())
+    for summary in summaries:
+        summary.refresh()
+
+
+def warm_dashboard_summary():
+    """Build the all-accounts summary on a background thread, e.g. at startup"""
+    def build():
+        try:
+            dashboard_summary()
+        except Exception as e:
+            logger.error(f"Could not build dashboard summary: {e}")
+
+    threading.Thread(target=build, name='dashboard-summary', daemon=True).start()
@@ -0,0 +1,31 @@
+# Advisory file locks shared by every process on the host (POSIX flock)
+import fcntl
+import os
+from contextlib import contextmanager
+
+
+class FileLocked(RuntimeError):
+    """Another process (or thread) holds the lock"""
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Hold an exclusive lock on ``path`` for the block, creating the file if needed.
+
+    Each call opens the file anew, so threads of one process exclude each
+    other as well. With ``blocking=False`` a held lock raises FileLocked
+    instead of waiting.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            raise FileLocked(f"{path} is locked by another process")
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1 @@
+# Gmail access: concurrent statement fetching and an offline fake service
@@ -0,0 +1,110 @@
+# Content-addressed storage for downloaded attachments, written as they are decoded
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DOWNLOADS_DIR = os.getenv('DOWNLOADS_DIR', 'downloads')
+
+# Base64 text decoded per write; a multiple of 4 so chunks decode on their own
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+def stored_path(content_hash, directory=None):
+    """Where a PDF with this sha256 lives under the downloads directory"""
+    return os.path.join(directory or DOWNLOADS_DIR, content_hash[:2], f"{content_hash}.pdf")
+
+
+class AttachmentWriter:
+    """Decodes base64url text fed in pieces of any size into a file.
+
+    Only a partial quantum (under 4 characters) is carried between pieces,
+    so memory stays at one piece however large the attachment. The file is
+    written under a temporary name and moved to its content address by
+    ``finish()``; an attachment already stored is not written twice.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or DOWNLOADS_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.part', delete=False)
+        self._hash = hashlib.sha256()
+        self._carry = ''
+        self.size = 0
+
+    def _write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def feed(self, text):
+        if isinstance(text, bytes):
+            text = text.decode('ascii')
+        text = self._carry + text
+        usable = len(text) - len(text) % 4
+        self._carry = text[usable:]
+        for start in range(0, usable, DECODE_CHUNK_SIZE):
+            self._write(base64.urlsafe_b64decode(text[start:min(start + DECODE_CHUNK_SIZE, usable)]))
+
+    def feed_all(self, text):
+        """Decode a complete base64 string without building a second full-size copy"""
+        for start in range(0, len(text), DECODE_CHUNK_SIZE):
+            self.feed(text[start:start + DECODE_CHUNK_SIZE])
+
+    def finish(self):
+        """Close the file and move it into place; returns ``(path, sha256, size)``"""
+        if self._carry.rstrip('='):
+            self._write(base64.urlsafe_b64decode(self._carry + '=' * (-len(self._carry) % 4)))
+        self._carry = ''
+        self._file.close()
+        content_hash = self._hash.hexdigest()
+        path = stored_path(content_hash, self.directory)
+        if os.path.exists(path):
+            os.remove(self._file.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._file.name, path)
+        return path, content_hash, self.size
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+
+def json_string_chunks(chunks, field):
+    """Yield the value of string field ``field`` from a JSON body arriving in chunks.
+
+    Meant for Gmail attachment responses, whose base64url ``data`` value
+    never contains quotes or escapes, so the value ends at the next quote.
+    """
+    key = f'"{field}"'.encode()
+    buffer = b''
+    state = 'key'
+    for chunk in chunks:
+        buffer += chunk
+        if state == 'key':
+            index = buffer.find(key)
+            if index < 0:
+                # Keep enough of the tail to find a key split across chunks
+                buffer = buffer[-len(key):]
+                continue
+            buffer = buffer[index + len(key):]
+            state = 'open'
+        if state == 'open':
+            index = buffer.find(b'"')
+            if index < 0:
+                buffer = b''
+                continue
+            buffer = buffer[index + 1:]
+            state = 'value'
+        end = buffer.find(b'"')
+        if end >= 0:
+            yield buffer[:end]
+            return
+        yield buffer
+        buffer = b''
+    raise ValueError(f"Response ended before the {field} field was complete")
@@ -0,0 +1,221 @@
+# Process-wide Gmail credentials, pooled API clients and cached connectivity status
+import datetime
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+GMAIL_SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+
+# Refresh the access token this long before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv('GMAIL_TOKEN_REFRESH_MARGIN', 300))
+# How old a cached connectivity check may get before it is redone in the background
+GMAIL_STATUS_TTL_SECONDS = int(os.getenv('GMAIL_STATUS_TTL', 300))
+GMAIL_HTTP_TIMEOUT = int(os.getenv('GMAIL_HTTP_TIMEOUT', 60))
+
+# Idle clients kept per token; matches the default fetch concurrency
+MAX_IDLE_CLIENTS = int(os.getenv('GMAIL_FETCH_CONCURRENCY', 8))
+
+
+class GmailClients:
+    """Credentials and a pool of API clients for one OAuth token file.
+
+    The token is read once and only re-read when the file changes. Access
+    tokens are refreshed ahead of expiry and the refreshed token is written
+    back. Google API clients are not thread-safe, so each one is leased to
+    a single thread at a time; returned clients keep their HTTP connection
+    open for the next lease.
+    """
+
+    def __init__(self, token_path):
+        self.token_path = token_path
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._creds = None
+        self._mtime = None
+        self._generation = 0
+        self._idle = []
+        self._leased = {}
+        self._session = None
+        self.stats = {'loads': 0, 'refreshes': 0, 'builds': 0, 'leases': 0}
+
+    def _load(self):
+        from google.oauth2.credentials import Credentials
+
+        mtime = os.path.getmtime(self.token_path)
+        with self._lock:
+            if self._creds is not None and mtime == self._mtime:
+                return self._creds
+            self._creds = Credentials.from_authorized_user_file(self.token_path, GMAIL_SCOPES)
+            self._mtime = mtime
+            # Clients built with the old credentials are dropped as they come back
+            self._generation += 1
+            self._idle.clear()
+            self._session = None
+            self.stats['loads'] += 1
+            return self._creds
+
+    def _needs_refresh(self, creds):
+        if not creds.token or creds.expiry is None:
+            return not creds.valid
+        # google-auth keeps expiry as a naive UTC datetime
+        remaining = creds.expiry - datetime.datetime.utcnow()
+        return remaining.total_seconds() < TOKEN_REFRESH_MARGIN_SECONDS
+
+    def credentials(self):
+        """Loaded credentials with at least the refresh margin left on the access token"""
+        creds = self._load()
+        if self._needs_refresh(creds) and creds.refresh_token:
+            with self._refresh_lock:
+                if self._needs_refresh(creds):
+                    from google.auth.transport.requests import Request
+
+                    creds.refresh(Request())
+                    self._save(creds)
+                    self.stats['refreshes'] += 1
+                    logger.info(f"Refreshed Gmail access token from {self.token_path}")
+        return creds
+
+    def _save(self, creds):
+        tmp_path = f"{self.token_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(creds.to_json())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.token_path)
+        with self._lock:
+            # Our own write, not a new token
+            self._mtime = os.path.getmtime(self.token_path)
+
+    def _build(self, creds):
+        import google_auth_httplib2
+        import httplib2
+        from googleapiclient.discovery import build
+
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT))
+        return build('gmail', 'v1', http=http, cache_discovery=False)
+
+    def acquire(self):
+        """Lease a client; hand it back with ``release()``"""
+        creds = self.credentials()
+        with self._lock:
+            self.stats['leases'] += 1
+            generation = self._generation
+            service = self._idle.pop() if self._idle else None
+        if service is None:
+            service = self._build(creds)
+            with self._lock:
+                self.stats['builds'] += 1
+        with self._lock:
+            self._leased[id(service)] = generation
+        return service
+
+    def release(self, service):
+        with self._lock:
+            generation = self._leased.pop(id(service), None)
+            if generation == self._generation and len(self._idle) < MAX_IDLE_CLIENTS:
+                self._idle.append(service)
+
+    def session(self):
+        """Shared ``AuthorizedSession`` for raw HTTP calls, such as streamed downloads.
+
+        Unlike API clients, a requests session is safe to share between
+        threads; its connection pool is reused across calls.
+        """
+        creds = self.credentials()
+        with self._lock:
+            if self._session is None:
+                from google.auth.transport.requests import AuthorizedSession
+
+                self._session = AuthorizedSession(creds)
+            return self._session
+
+    @contextmanager
+    def lease(self):
+        service = self.acquire()
+        try:
+            yield service
+        finally:
+            self.release(service)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_clients(token_path='token.json'):
+    """The shared GmailClients for a token file"""
+    key = os.path.abspath(token_path)
+    with _clients_lock:
+        clients = _clients.get(key)
+        if clients is None:
+            clients = _clients[key] = GmailClients(token_path)
+        return clients
+
+
+def forget_clients(token_path):
+    """Drop cached credentials and clients, e.g. after the token was deleted"""
+    with _clients_lock:
+        _clients.pop(os.path.abspath(token_path), None)
+        _statuses.pop(os.path.abspath(token_path), None)
+
+
+class GmailStatus:
+    """Whether a token can reach Gmail, checked at most once per TTL.
+
+    ``get()`` never waits on Google: it returns the last result and, when
+    that is older than the TTL, starts a re-check on a background thread.
+    """
+
+    def __init__(self, token_path, ttl=None):
+        self.token_path = token_path
+        self.ttl = GMAIL_STATUS_TTL_SECONDS if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._checking = False
+        self._state = {'connected': False, 'email': None, 'error': None, 'checked_at': None}
+
+    def get(self):
+        with self._lock:
+            checked_at = self._state['checked_at']
+            stale = checked_at is None or time.time() - checked_at >= self.ttl
+            start = stale and not self._checking
+            if start:
+                self._checking = True
+            state = dict(self._state, checking=self._checking)
+        if start:
+            threading.Thread(target=self.check, name='gmail-status', daemon=True).start()
+        return state
+
+    def check(self):
+        """Check connectivity now (blocking) and cache the result"""
+        state = {'connected': False, 'email': None, 'error': None}
+        try:
+            if not os.path.exists(self.token_path):
+                state['error'] = 'Gmail token not found'
+            else:
+                with get_clients(self.token_path).lease() as service:
+                    profile = service.users().getProfile(userId='me').execute()
+                state.update(connected=True, email=profile.get('emailAddress'))
+        except Exception as e:
+            logger.error(f"Gmail status check failed: {e}")
+            state['error'] = str(e)
+        state['checked_at'] = time.time()
+        with self._lock:
+            self._state = state
+            self._checking = False
+        return dict(state)
+
+
+_statuses = {}
+
+
+def gmail_status(token_path='token.json'):
+    """Cached connectivity of a token file; see GmailStatus"""
+    key = os.path.abspath(token_path)
+    with _clients_lock:
+        status = _statuses.get(key)
+        if status is None:
+            status = _statuses[key] = GmailStatus(token_path)
+    return status.get()
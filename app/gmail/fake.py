@@ -0,0 +1,278 @@
+# In-memory stand-in for the Gmail API, for offline runs and benchmarks
+import argparse
+import base64
+import itertools
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BANK_DOMAINS = {
+    'SBI': 'statements@sbicard.com',
+    'HDFC': 'emailstatements.cards@hdfcbank.net',
+    'AXIS': 'cc.statements@axisbank.com',
+    'SCB': 'e-statement@sc.com',
+    'ICICI': 'credit_cards@icicibank.com'
+}
+
+
+class FakeResponse(dict):
+    """Mimics the httplib2 response carried by googleapiclient's HttpError"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    """Error shaped like googleapiclient.errors.HttpError"""
+
+    def __init__(self, status, reason='', retry_after=None):
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.resp = FakeResponse(status, headers)
+        self.content = reason.encode()
+        super().__init__(f"<FakeHttpError {status} {reason}>")
+
+
+class _Request:
+    def __init__(self, service, handler, *args):
+        self._service = service
+        self._handler = handler
+        self._args = args
+
+    def execute(self, num_retries=0):
+        return self._service._call(self._handler, *self._args)
+
+
+class _Resource:
+    def __init__(self, **methods):
+        for name, method in methods.items():
+            setattr(self, name, method)
+
+
+class FakeGmailService:
+    """Serves a synthetic mailbox through the ``users()`` resource chain.
+
+    ``latency`` seconds are slept on every ``execute()`` to model network
+    round trips; ``rate_limit_every=N`` makes every Nth call fail with a 429
+    so backoff handling can be exercised.
+    """
+
+    def __init__(self, messages=None, latency=0.0, rate_limit_every=0):
+        self.messages = {}
+        self.history_id = 1000
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        for message in messages or []:
+            self.add_message(message)
+
+    def add_message(self, message):
+        """Deliver a message, advancing the mailbox history"""
+        with self._lock:
+            self.history_id += 1
+            self.messages[message['id']] = dict(message, history_id=self.history_id)
+
+    def _call(self, handler, *args):
+        with self._lock:
+            self.calls[handler.__name__] = self.calls.get(handler.__name__, 0) + 1
+            n = next(self._counter)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            raise FakeHttpError(429, 'rateLimitExceeded', retry_after=0)
+        return handler(*args)
+
+    # users() resource chain -------------------------------------------------
+
+    def users(self):
+        return _Resource(
+            messages=lambda: _Resource(
+                list=lambda userId='me', q='', maxResults=100, pageToken=None: _Request(
+                    self, self._list, q, maxResults, pageToken),
+                get=lambda userId='me', id=None, format='full': _Request(self, self._get, id),
+                attachments=lambda: _Resource(
+                    get=lambda userId='me', messageId=None, id=None: _Request(
+                        self, self._attachment, messageId, id)
+                )
+            ),
+            history=lambda: _Resource(
+                list=lambda userId='me', startHistoryId=None, historyTypes=None, pageToken=None: _Request(
+                    self, self._history, startHistoryId)
+            ),
+            getProfile=lambda userId='me': _Request(self, self._profile)
+        )
+
+    # Handlers -----------------------------------------------------------------
+
+    def _profile(self):
+        return {
+            'emailAddress': 'fake.user@gmail.com',
+            'messagesTotal': len(self.messages),
+            'historyId': str(self.history_id)
+        }
+
+    def _history(self, start_history_id):
+        start = int(start_history_id)
+        added = [m for m in self.messages.values() if m['history_id'] > start]
+        result = {'historyId': str(self.history_id)}
+        if added:
+            result['history'] = [{
+                'id': str(m['history_id']),
+                'messagesAdded': [{'message': {'id': m['id'], 'threadId': m['id']}}]
+            } for m in sorted(added, key=lambda m: m['history_id'])]
+        return result
+
+    def _list(self, q, max_results, page_token):
+        matched = [m for m in self._sorted() if _matches(m, q)]
+        start = int(page_token or 0)
+        page = matched[start:start + max_results]
+        result = {
+            'messages': [{'id': m['id'], 'threadId': m['id']} for m in page],
+            'resultSizeEstimate': len(matched)
+        }
+        if start + max_results < len(matched):
+            result['nextPageToken'] = str(start + max_results)
+        return result
+
+    def _get(self, message_id):
+        message = self._message(message_id)
+        parts = [{
+            'partId': '0',
+            'mimeType': 'text/html',
+            'filename': '',
+            'body': {'size': 120}
+        }]
+        for index, (att_id, attachment) in enumerate(message['attachments'].items(), start=1):
+            parts.append({
+                'partId': str(index),
+                'mimeType': 'application/pdf',
+                'filename': attachment['filename'],
+                'body': {'attachmentId': att_id, 'size': len(attachment['data'])}
+            })
+        return {
+            'id': message['id'],
+            'threadId': message['id'],
+            'internalDate': str(int(message['date'].timestamp() * 1000)),
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'headers': [
+                    {'name': 'From', 'value': message['sender']},
+                    {'name': 'Subject', 'value': message['subject']},
+                    {'name': 'Date', 'value': message['date'].strftime('%a, %d %b %Y %H:%M:%S +0530')}
+                ],
+                'parts': parts
+            }
+        }
+
+    def _attachment(self, message_id, attachment_id):
+        attachment = self._message(message_id)['attachments'].get(attachment_id)
+        if attachment is None:
+            raise FakeHttpError(404, 'notFound')
+        data = base64.urlsafe_b64encode(attachment['data']).decode()
+        return {'size': len(attachment['data']), 'data': data}
+
+    def _message(self, message_id):
+        message = self.messages.get(message_id)
+        if message is None:
+            raise FakeHttpError(404, 'notFound')
+        return message
+
+    def _sorted(self):
+        return sorted(self.messages.values(), key=lambda m: m['date'], reverse=True)
+
+
+def _matches(message, query):
+    """Evaluate the subset of Gmail search syntax used by the sync code"""
+    now = datetime.now()
+    for term in re.findall(r'\S+:\([^)]*\)|\S+', query):
+        key, _, value = term.partition(':')
+        value = value.strip('()').lower()
+        if key == 'from':
+            if value not in message['sender'].lower():
+                return False
+        elif key == 'subject':
+            subject = message['subject'].lower()
+            if not all(word in subject for word in value.split()):
+                return False
+        elif key == 'has' and value == 'attachment':
+            if not message['attachments']:
+                return False
+        elif key == 'newer_than':
+            days = int(value.rstrip('d'))
+            if message['date'] < now - timedelta(days=days):
+                return False
+        elif key == 'after':
+            if message['date'].timestamp() <= float(value):
+                return False
+    return True
+
+
+def generate_mailbox(count=50, pdf_size=200 * 1024, banks=None, days=90, seed_pdf=None,
+                     pdf_factory=None):
+    """Build a synthetic mailbox of statement emails spread over ``days``
+
+    Attachments are filler bytes unless ``pdf_factory(bank, index)`` builds
+    real statements (see ``app.bench.statements``).
+    """
+    banks = banks or ['SBI', 'HDFC', 'AXIS', 'SCB']
+    filler = b'' if pdf_factory else os.urandom(max(pdf_size - 32, 0))
+    now = datetime.now()
+    messages = []
+    for i in range(count):
+        bank = banks[i % len(banks)]
+        messages.append({
+            'id': f"fake{i:06d}",
+            'sender': f"{bank} Card <{BANK_DOMAINS.get(bank, 'alerts@bank.example')}>",
+            'subject': f"Your {bank} Credit Card Statement",
+            'date': now - timedelta(days=(i * days) / max(count, 1), minutes=i),
+            'attachments': {
+                f"att{i:06d}": {
+                    'filename': f"{bank}_statement_{i:06d}.pdf",
+                    'data': (pdf_factory(bank, i) if pdf_factory else
+                             seed_pdf or (b'%PDF-1.4\n%' + f"{bank}-{i:06d}\n".encode() + filler))
+                }
+            }
+        })
+    return messages
+
+
+def benchmark_fetch(count=40, latency=0.05, pdf_size=200 * 1024, concurrency=(1, 8)):
+    """Time the fetch stage against the fake service at several concurrency levels"""
+    from app.gmail.fetch import SEARCH_QUERIES, GmailFetcher
+
+    mailbox = generate_mailbox(count, pdf_size)
+    report = []
+    for workers in concurrency:
+        service = FakeGmailService(mailbox, latency=latency)
+        with tempfile.TemporaryDirectory() as downloads:
+            fetcher = GmailFetcher(lambda: service, max_workers=workers, download_dir=downloads)
+            started = time.perf_counter()
+            messages, _ = fetcher.search(SEARCH_QUERIES, max_results=count)
+            pdfs = sum(1 for item in fetcher.iter_attachments(messages) if item.get('path'))
+            elapsed = time.perf_counter() - started
+        report.append({
+            'workers': workers,
+            'messages': len(messages),
+            'pdfs': pdfs,
+            'seconds': round(elapsed, 3),
+            'messages_per_second': round(len(messages) / elapsed, 1),
+            'requests': fetcher.stats['requests']
+        })
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Gmail fetch stage offline')
+    parser.add_argument('--messages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--pdf-kb', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    for row in benchmark_fetch(args.messages, args.latency, args.pdf_kb * 1024, args.workers):
+        print(row)
@@ -0,0 +1,410 @@
+# Concurrent Gmail fetch stage for statement sync
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.gmail.attachments import DECODE_CHUNK_SIZE, AttachmentWriter, json_string_chunks
+from app.gmail.clients import GMAIL_HTTP_TIMEOUT, get_clients
+from app.metrics import GMAIL_REQUEST_SECONDS, GMAIL_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv('GMAIL_FETCH_CONCURRENCY', 8))
+DEFAULT_MAX_RETRIES = int(os.getenv('GMAIL_FETCH_MAX_RETRIES', 5))
+DEFAULT_BACKOFF_BASE = float(os.getenv('GMAIL_FETCH_BACKOFF_BASE', 0.5))
+
+# messages.list page size; Gmail allows up to 500
+SEARCH_PAGE_SIZE = 100
+
+GMAIL_API_ROOT = 'https://gmail.googleapis.com/gmail/v1'
+
+SEARCH_QUERIES = [
+    'from:sbicard.com subject:(statement) newer_than:90d has:attachment',
+    'from:hdfcbank.net subject:(statement) newer_than:90d has:attachment',
+    'from:axisbank.com subject:(statement) newer_than:90d has:attachment',
+    'from:sc.com subject:(statement) newer_than:90d has:attachment',
+    'from:icicibank.com subject:(statement) newer_than:90d has:attachment',
+    'subject:(credit card statement) newer_than:90d has:attachment'
+]
+
+WINDOW_TERM = 'newer_than:90d'
+
+BANK_SENDERS = [
+    ('sbicard', 'SBI'),
+    ('hdfcbank', 'HDFC'),
+    ('axisbank', 'AXIS'),
+    ('sc.com', 'SCB'),
+    ('icicibank', 'ICICI'),
+]
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+
+# Marker put on the output queue when a message worker has finished
+_MESSAGE_DONE = object()
+
+
+def identify_bank(sender):
+    """Map an email sender to a bank code"""
+    sender = sender.lower()
+    for domain, bank in BANK_SENDERS:
+        if domain in sender:
+            return bank
+    return 'UNKNOWN'
+
+
+def extract_pdf_attachments(payload):
+    """Collect PDF attachment descriptors from a message payload"""
+    pdf_attachments = []
+
+    def walk(part):
+        if 'parts' in part:
+            for child in part['parts']:
+                walk(child)
+        elif part.get('filename', '').lower().endswith('.pdf'):
+            pdf_attachments.append({
+                'filename': part['filename'],
+                'attachment_id': part['body'].get('attachmentId'),
+                'size': part['body'].get('size', 0)
+            })
+
+    walk(payload)
+    return pdf_attachments
+
+
+def build_search_queries(after=None):
+    """Statement search queries, optionally limited to mail after an epoch cursor"""
+    if after is None:
+        return list(SEARCH_QUERIES)
+    return [q.replace(WINDOW_TERM, f"after:{int(after)}") for q in SEARCH_QUERIES]
+
+
+def backfill_queries():
+    """Statement queries over the whole mailbox, keyed by bank (``ALL`` for the catch-all)"""
+    queries = {}
+    for query in SEARCH_QUERIES:
+        bank = identify_bank(query)
+        key = 'ALL' if bank == 'UNKNOWN' else bank
+        queries[key] = ' '.join(query.replace(WINDOW_TERM, '').split())
+    return queries
+
+
+def is_retryable_error(exc):
+    """Return True for Gmail rate-limit and transient server/network errors"""
+    resp = getattr(exc, 'resp', None)
+    status = getattr(resp, 'status', None)
+    if status is not None:
+        status = int(status)
+        if status in RETRYABLE_STATUSES:
+            return True
+        if status == 403:
+            content = getattr(exc, 'content', b'') or b''
+            if isinstance(content, str):
+                content = content.encode()
+            return any(reason in content for reason in RATE_LIMIT_REASONS)
+        return False
+    return isinstance(exc, (socket.timeout, ConnectionError, TimeoutError))
+
+
+def _http_error(response):
+    """The HttpError the API client would raise for a failed raw response"""
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    headers = {key.lower(): value for key, value in response.headers.items()}
+    headers['status'] = str(response.status_code)
+    return HttpError(httplib2.Response(headers), response.content, uri=response.url)
+
+
+def _retry_after(exc):
+    """Seconds requested by a Retry-After header, if any"""
+    resp = getattr(exc, 'resp', None)
+    try:
+        value = resp.get('retry-after') if resp is not None else None
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def fetcher_from_token(token_path='token.json', **kwargs):
+    """GmailFetcher using the shared credentials and client pool of a token file"""
+    return GmailFetcher(clients=get_clients(token_path), **kwargs)
+
+
+class GmailFetcher:
+    """Runs Gmail searches, message gets and attachment downloads concurrently.
+
+    Google API client objects are not thread-safe, so each request leases a
+    client from ``clients`` (a GmailClients pool) for its duration, or each
+    worker thread builds its own service through ``service_factory``.
+    """
+
+    def __init__(self, service_factory=None, max_workers=None, max_retries=None,
+                 backoff_base=None, user_id='me', rate_limiter=None, clients=None,
+                 download_dir=None):
+        self.service_factory = service_factory
+        self.clients = clients
+        self.download_dir = download_dir
+        self.rate_limiter = rate_limiter
+        self.max_workers = max(1, max_workers or DEFAULT_CONCURRENCY)
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = DEFAULT_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.user_id = user_id
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'bytes_downloaded': 0,
+            # Summed over concurrent calls, so it can exceed wall time
+            'request_seconds': 0.0
+        }
+
+    def _service(self):
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self.service_factory()
+            self._local.service = service
+        return service
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def execute(self, make_request, operation='other'):
+        """Execute a request built by ``make_request(service)`` with backoff"""
+        def run():
+            if self.clients is not None:
+                with self.clients.lease() as service:
+                    return make_request(service).execute()
+            return make_request(self._service()).execute()
+
+        return self._with_retries(run, operation)
+
+    def _with_retries(self, call, operation='other'):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self._count('requests')
+            started = time.perf_counter()
+            try:
+                result = call()
+                self._timed(operation, started, 'ok')
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    self._timed(operation, started, 'failed')
+                    raise
+                self._timed(operation, started, 'retried')
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+                attempt += 1
+                self._count('retries')
+                logger.warning(f"Gmail request throttled ({e}); retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _timed(self, operation, started, result):
+        elapsed = time.perf_counter() - started
+        self._count('request_seconds', elapsed)
+        GMAIL_REQUEST_SECONDS.labels(operation).observe(elapsed)
+        GMAIL_REQUESTS.labels(operation, result).inc()
+
+    def _stream_attachment(self, message_id, attachment_id, writer):
+        import requests
+
+        url = f"{GMAIL_API_ROOT}/users/{self.user_id}/messages/{message_id}/attachments/{attachment_id}"
+        try:
+            with self.clients.session().get(url, stream=True, timeout=GMAIL_HTTP_TIMEOUT) as response:
+                if response.status_code >= 400:
+                    raise _http_error(response)
+                for piece in json_string_chunks(response.iter_content(DECODE_CHUNK_SIZE), 'data'):
+                    writer.feed(piece)
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            raise ConnectionError(str(e)) from e
+
+    def download_attachment(self, message_id, attachment_id):
+        """Decode an attachment into the downloads directory; returns ``(path, sha256, size)``
+
+        With a client pool the response is streamed, so memory use stays at
+        one chunk. A plain ``service_factory`` client returns the whole body,
+        which is then decoded piecewise without a second full-size copy.
+        """
+        def download():
+            writer = AttachmentWriter(self.download_dir)
+            try:
+                if self.clients is not None:
+                    self._stream_attachment(message_id, attachment_id, writer)
+                else:
+                    attachment = self._service().users().messages().attachments().get(
+                        userId=self.user_id, messageId=message_id, id=attachment_id).execute()
+                    writer.feed_all(attachment.pop('data'))
+                return writer.finish()
+            except BaseException:
+                writer.abort()
+                raise
+
+        return self._with_retries(download, 'attachment')
+
+    def get_profile(self):
+        """Mailbox profile, including the current ``historyId``"""
+        return self.execute(lambda s: s.users().getProfile(userId=self.user_id), 'profile')
+
+    def has_new_messages(self, start_history_id):
+        """Check the mailbox history for messages added since ``start_history_id``.
+
+        Returns True/False, or None when the history id is too old or
+        otherwise unusable and the caller should fall back to searching.
+        """
+        page_token = None
+        try:
+            while True:
+                result = self.execute(lambda s: s.users().history().list(
+                    userId=self.user_id, startHistoryId=start_history_id,
+                    historyTypes=['messageAdded'], pageToken=page_token), 'history')
+                for record in result.get('history', []):
+                    if record.get('messagesAdded'):
+                        return True
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    return False
+        except Exception as e:
+            logger.warning(f"Gmail history unavailable from {start_history_id}: {e}")
+            return None
+
+    def list_page(self, query, page_token=None, page_size=SEARCH_PAGE_SIZE):
+        """One page of search results: ``(messages, next_page_token)``"""
+        result = self.execute(lambda s: s.users().messages().list(
+            userId=self.user_id, q=query, maxResults=page_size, pageToken=page_token), 'search')
+        return result.get('messages', []), result.get('nextPageToken')
+
+    def _search(self, query, max_results):
+        messages = []
+        page_token = None
+        while max_results is None or len(messages) < max_results:
+            page_size = SEARCH_PAGE_SIZE if max_results is None \
+                else min(SEARCH_PAGE_SIZE, max_results - len(messages))
+            page, page_token = self.list_page(query, page_token, page_size)
+            messages.extend(page)
+            if not page_token:
+                break
+        return messages
+
+    def search(self, queries, max_results=None):
+        """Run all search queries concurrently, following result pages.
+
+        Returns ``(messages, errors)`` where messages are de-duplicated by id
+        and keep the order of the queries. ``max_results`` caps each query.
+        """
+        per_query = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries) or 1)) as pool:
+            futures = {pool.submit(self._search, q, max_results): q for q in queries}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    per_query[query] = future.result()
+                    logger.info(f"Found {len(per_query[query])} emails for query: {query}")
+                except Exception as e:
+                    logger.error(f"Error with query {query}: {e}")
+                    errors.append(f"Search error: {str(e)}")
+
+        unique = {}
+        for query in queries:
+            for message in per_query.get(query, []):
+                unique.setdefault(message['id'], message)
+        return list(unique.values()), errors
+
+    def _fetch_message(self, message_id, emit):
+        msg = self.execute(lambda s: s.users().messages().get(
+            userId=self.user_id, id=message_id), 'message')
+
+        headers = msg['payload'].get('headers', [])
+        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
+        sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
+        bank = identify_bank(sender)
+        logger.info(f"Processing email: {subject[:50]}...")
+
+        email = {
+            'message_id': message_id,
+            'subject': subject,
+            'sender': sender,
+            'bank': bank
+        }
+        attachments = extract_pdf_attachments(msg['payload'])
+        if not emit(dict(email, filename=None, attachments=len(attachments))):
+            return
+
+        for attachment in attachments:
+            item = dict(email, filename=attachment['filename'],
+                        attachment_id=attachment['attachment_id'],
+                        size=attachment['size'])
+            try:
+                path, content_hash, size = self.download_attachment(
+                    message_id, attachment['attachment_id'])
+                item.update(path=path, sha256=content_hash, size=size)
+                self._count('bytes_downloaded', size)
+            except Exception as e:
+                logger.error(f"Error downloading attachment {attachment['filename']}: {e}")
+                item['error'] = f"PDF download error: {str(e)}"
+            if not emit(item):
+                return
+
+    def iter_attachments(self, messages):
+        """Yield downloaded PDF attachments as soon as each one arrives.
+
+        Message gets and attachment downloads run on a bounded thread pool and
+        feed a bounded queue, so the caller can parse early statements while
+        later messages are still in flight. Each yielded dict carries the
+        message metadata; the first item per message has ``filename=None``
+        and the number of PDF ``attachments`` to follow (or an ``error``),
+        and the rest carry either ``path`` and ``sha256`` of the PDF saved
+        under the downloads directory, or ``error``.
+        """
+        messages = list(messages)
+        if not messages:
+            return
+
+        out = queue.Queue(maxsize=self.max_workers * 2)
+        stop = threading.Event()
+
+        def emit(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(message_id):
+            try:
+                self._fetch_message(message_id, emit)
+            except Exception as e:
+                logger.error(f"Error processing email {message_id}: {e}")
+                emit({'message_id': message_id, 'filename': None,
+                      'error': f"Email processing error: {str(e)}"})
+            finally:
+                emit(_MESSAGE_DONE)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for message in messages:
+                pool.submit(work, message['id'])
+            remaining = len(messages)
+            while remaining:
+                item = out.get()
+                if item is _MESSAGE_DONE:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,138 @@
+# Persistent record of what previous syncs already fetched from Gmail
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.filelock import file_lock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.getenv('SYNC_LEDGER_PATH', os.path.join('data', 'sync_ledger.json'))
+
+# Re-scan this much before the last sync so mail delivered late is not missed
+CURSOR_OVERLAP_SECONDS = 24 * 60 * 60
+# Syncs that try a failing message (bad PDF, wrong password) before it is given up on
+MAX_MESSAGE_ATTEMPTS = int(os.getenv('SYNC_MAX_MESSAGE_ATTEMPTS', 3))
+
+
+class SyncLedger:
+    """Tracks processed Gmail messages, attachments and PDF content hashes.
+
+    The ledger also keeps the mailbox ``historyId`` and the time of the last
+    complete sync, which drive incremental syncs. It is written atomically
+    so an interrupted sync never leaves a half-written file behind.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_LEDGER_PATH
+        self._lock = threading.Lock()
+        self.history_id = None
+        self.last_sync_at = None
+        self.messages = {}
+        self.content_hashes = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Ignoring unreadable sync ledger {self.path}: {e}")
+            return
+        self.history_id = data.get('history_id')
+        self.last_sync_at = data.get('last_sync_at')
+        self.messages = data.get('messages', {})
+        self.content_hashes = set(data.get('content_hashes', []))
+
+    @contextmanager
+    def locked(self):
+        """Hold the ledger's file lock for a whole sync or backfill, re-reading it first.
+
+        Raises FileLocked while another run for the same account holds it,
+        in this process or another (the sync service, a CLI backfill).
+        """
+        with file_lock(f"{self.path}.lock", blocking=False):
+            self._load()
+            yield self
+
+    def save(self):
+        """Write the ledger to disk"""
+        with self._lock:
+            data = {
+                'history_id': self.history_id,
+                'last_sync_at': self.last_sync_at,
+                'messages': self.messages,
+                'content_hashes': sorted(self.content_hashes)
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    @property
+    def is_empty(self):
+        return self.history_id is None and not self.messages
+
+    def search_cursor(self):
+        """Epoch seconds to pass as ``after:`` in incremental searches"""
+        if self.last_sync_at is None:
+            return None
+        return max(int(self.last_sync_at) - CURSOR_OVERLAP_SECONDS, 0)
+
+    def is_processed(self, message_id):
+        return self.messages.get(message_id, {}).get('complete', False)
+
+    def is_exhausted(self, message_id):
+        """True once a message has failed in ``MAX_MESSAGE_ATTEMPTS`` syncs"""
+        entry = self.messages.get(message_id, {})
+        return not entry.get('complete', False) and entry.get('attempts', 0) >= MAX_MESSAGE_ATTEMPTS
+
+    def has_content(self, content_hash):
+        return content_hash in self.content_hashes
+
+    def record_attachment(self, message_id, attachment_id, filename, content_hash):
+        """Remember a downloaded attachment and the hash of its bytes"""
+        with self._lock:
+            entry = self.messages.setdefault(message_id, {'attachments': [], 'complete': False})
+            entry['attachments'].append({
+                'attachment_id': attachment_id,
+                'filename': filename,
+                'sha256': content_hash
+            })
+            self.content_hashes.add(content_hash)
+
+    def mark_processed(self, message_id):
+        """Mark a message as fully handled so later syncs skip it"""
+        with self._lock:
+            entry = self.messages.setdefault(message_id, {'attachments': []})
+            entry['complete'] = True
+            entry['processed_at'] = int(time.time())
+
+    def mark_failed(self, message_id):
+        """Count a failed attempt; the message is retried until it is exhausted"""
+        with self._lock:
+            entry = self.messages.setdefault(message_id, {'attachments': [], 'complete': False})
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            entry['failed_at'] = int(time.time())
+            if entry['attempts'] == MAX_MESSAGE_ATTEMPTS:
+                logger.warning(f"Giving up on message {message_id} after {MAX_MESSAGE_ATTEMPTS} failed syncs")
+
+    def pending_messages(self):
+        """Message ids whose processing failed or was interrupted, still worth retrying"""
+        return [mid for mid, entry in self.messages.items()
+                if not entry.get('complete') and entry.get('attempts', 0) < MAX_MESSAGE_ATTEMPTS]
+
+    def finish_sync(self, history_id, started_at):
+        """Advance the incremental cursors after a complete sync"""
+        with self._lock:
+            if history_id is not None:
+                self.history_id = str(history_id)
+            self.last_sync_at = int(started_at)
@@ -0,0 +1,46 @@
+# Token-bucket rate limiting for Gmail API requests
+import threading
+import time
+
+
+class RateLimiter:
+    """Allows ``rate`` acquisitions per second on average, in bursts up to ``burst``.
+
+    Thread-safe; ``acquire()`` sleeps until a token is available. A rate of
+    zero or less disables limiting. With a ``parent`` limiter every
+    acquisition also draws from the parent, so several per-account limiters
+    can share one global quota.
+    """
+
+    def __init__(self, rate, burst=None, parent=None):
+        self.rate = float(rate)
+        self.parent = parent
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        if self.parent is not None:
+            delay += self.parent.acquire(tokens)
+        return delay
+
+    def _reserve(self, tokens):
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve the tokens now; callers queue up behind each other
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += delay
+        return delay
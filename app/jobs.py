@@ -0,0 +1,321 @@
+# Background sync jobs with per-account single-flight protection and progress tracking
+import copy
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.accounts import gmail_limiter, global_limiter, list_accounts
+from app.metrics import SYNC_SECONDS, profiled
+from app.storage import DEFAULT_ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL_MINUTES = int(os.getenv('SYNC_INTERVAL_MINUTES', 360))
+
+# Accounts synced at the same time
+SYNC_MAX_CONCURRENT = int(os.getenv('SYNC_MAX_CONCURRENT', 2))
+
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 20
+
+# Recent jobs per account that latency metrics cover
+METRICS_WINDOW = 20
+
+ACTIVE_STATES = ('queued', 'running')
+JOB_STATES = ACTIVE_STATES + ('succeeded', 'failed')
+
+
+class SyncJob:
+    """State of one sync run, shared between the worker and HTTP readers"""
+
+    def __init__(self, trigger, kind='sync', account=DEFAULT_ACCOUNT):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.kind = kind
+        self.account = account
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.queued_at = self.created_at
+        self.started_at = None
+        self.finished_at = None
+        self.slices = 0
+        self.run_seconds = 0.0
+        self.version = 0
+        self._changed = threading.Condition()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATES
+
+    def update(self, **changes):
+        with self._changed:
+            for key, value in changes.items():
+                setattr(self, key, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, seen_version, timeout):
+        """Block until the job changes past ``seen_version`` or ``timeout`` passes"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    def to_dict(self):
+        with self._changed:
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'account': self.account,
+                'trigger': self.trigger,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': copy.deepcopy(self.progress),
+                'result': copy.deepcopy(self.result),
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'slices': self.slices,
+                'version': self.version
+            }
+
+
+def _summary(values):
+    values = list(values)
+    if not values:
+        return {'last': None, 'avg': None, 'max': None}
+    return {'last': round(values[-1], 3), 'avg': round(sum(values) / len(values), 3),
+            'max': round(max(values), 3)}
+
+
+class AccountStats:
+    """Outcomes and latencies of an account's recent jobs"""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.last_status = None
+        self.last_finished_at = None
+        self.last_success_at = None
+        self.queue_seconds = deque(maxlen=METRICS_WINDOW)
+        self.run_seconds = deque(maxlen=METRICS_WINDOW)
+        self.latency_seconds = deque(maxlen=METRICS_WINDOW)
+
+    def finished(self, job):
+        self.runs += 1
+        self.last_status = job.status
+        self.last_finished_at = job.finished_at
+        if job.status == 'succeeded':
+            self.last_success_at = job.finished_at
+        else:
+            self.failures += 1
+        self.run_seconds.append(job.run_seconds)
+        self.latency_seconds.append(job.finished_at - job.created_at)
+
+    def to_dict(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_status': self.last_status,
+            'last_finished_at': self.last_finished_at,
+            'last_success_at': self.last_success_at,
+            'queue_seconds': _summary(self.queue_seconds),
+            'run_seconds': _summary(self.run_seconds),
+            'latency_seconds': _summary(self.latency_seconds)
+        }
+
+
+class SyncJobManager:
+    """Runs sync jobs for any number of accounts on a small worker pool.
+
+    ``sync_fn(progress, account=...)`` does the work and reports progress
+    by calling ``progress(stage, counts)``; other kinds of job (such as a
+    backfill) register their function in ``tasks``. Only one job per
+    account is queued or running at a time, since they share the account's
+    sync ledger; starting another while one is active returns the active
+    job. Jobs of different accounts run side by side on up to
+    ``max_concurrent`` workers and start in the order they were queued, so
+    with one job per account every account gets its turn. A long job can
+    return ``yielded`` to hand its worker back: it is queued again behind
+    the other accounts and later called with ``resumed=True``.
+    """
+
+    def __init__(self, sync_fn, tasks=None, max_concurrent=None):
+        self.sync_fn = sync_fn
+        self.tasks = dict(tasks or {}, sync=sync_fn)
+        self.max_concurrent = max(1, max_concurrent or SYNC_MAX_CONCURRENT)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                            thread_name_prefix='sync-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._order = itertools.count()
+        self._current = {}
+        self._latest = None
+        # Ids of jobs waiting for a worker, oldest first
+        self._waiting = []
+        self._stats = {}
+
+    def start(self, trigger='manual', kind='sync', account=DEFAULT_ACCOUNT, **options):
+        """Queue a job for ``account`` unless it has one active; returns ``(job, created)``
+
+        ``options`` are passed to the job's function as keyword arguments.
+        """
+        if kind not in self.tasks:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            current = self._current.get(account)
+            if current is not None and current.active:
+                return current, False
+            job = SyncJob(trigger, kind, account)
+            self._jobs[job.id] = (next(self._order), job)
+            self._current[account] = job
+            self._latest = job
+            self._prune()
+        self._submit(job, options)
+        return job, True
+
+    def _submit(self, job, options):
+        with self._lock:
+            self._waiting.append(job.id)
+        self._executor.submit(self._run, job, options)
+
+    def get(self, job_id):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        return entry[1] if entry else None
+
+    def latest(self, account=None):
+        """Most recent job, of any account unless ``account`` is given"""
+        with self._lock:
+            if account is None:
+                return self._latest
+            return self._current.get(account)
+
+    @property
+    def waiting(self):
+        """Number of jobs waiting for a free worker"""
+        with self._lock:
+            return len(self._waiting)
+
+    def state_counts(self):
+        """Number of tracked jobs in each state"""
+        with self._lock:
+            jobs = [job for _, job in self._jobs.values()]
+        counts = dict.fromkeys(JOB_STATES, 0)
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def throttled_seconds(self, account=None):
+        """Time this process's syncs of ``account`` (or all of them) waited on Gmail quota"""
+        limiter = gmail_limiter(account) if account else global_limiter()
+        return round(limiter.waited, 3)
+
+    def account_metrics(self):
+        """Per-account job latency and backlog, keyed by account"""
+        now = time.time()
+        metrics = {}
+        with self._lock:
+            for account in set(self._stats) | set(self._current):
+                data = self._stats.get(account, AccountStats()).to_dict()
+                job = self._current.get(account)
+                data['status'] = job.status if job is not None else 'idle'
+                data['job_id'] = job.id if job is not None and job.active else None
+                data['queue_position'] = None
+                data['waiting_seconds'] = None
+                data['messages_remaining'] = None
+                if job is not None and job.status == 'queued':
+                    data['queue_position'] = self._waiting.index(job.id) + 1 \
+                        if job.id in self._waiting else None
+                    data['waiting_seconds'] = round(now - job.queued_at, 3)
+                elif job is not None and job.status == 'running':
+                    progress = job.progress
+                    data['messages_remaining'] = max(
+                        progress.get('emails_found', 0) - progress.get('emails_processed', 0), 0)
+                metrics[account] = data
+        return metrics
+
+    def _prune(self):
+        finished = sorted((entry for entry in self._jobs.values() if not entry[1].active),
+                          key=lambda entry: entry[0])
+        for _, job in finished[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+    def _run(self, job, options):
+        started = time.time()
+        with self._lock:
+            self._waiting.remove(job.id)
+            stats = self._stats.setdefault(job.account, AccountStats())
+            stats.queue_seconds.append(started - job.queued_at)
+        job.update(status='running', stage='starting', started_at=job.started_at or started,
+                   slices=job.slices + 1)
+        logger.info(f"Sync job {job.id} started ({job.kind}, {job.account}, {job.trigger})")
+
+        def progress(stage, counts):
+            job.update(stage=stage, progress=copy.deepcopy(counts))
+
+        try:
+            # With SYNC_PROFILE_DIR set, each run (or backfill slice) gets its own profile
+            with profiled(f"{job.kind}-{job.account}-{job.id}-{job.slices}"):
+                result = self.tasks[job.kind](progress, account=job.account, **options)
+            run_seconds = job.run_seconds + time.time() - started
+            if result.get('success') and result.get('yielded'):
+                SYNC_SECONDS.labels(job.kind, 'yielded').observe(time.time() - started)
+                job.update(status='queued', stage='queued', result=result,
+                           run_seconds=run_seconds, queued_at=time.time())
+                logger.info(f"Sync job {job.id} yielded after slice {job.slices}; requeued")
+                self._submit(job, dict(options, resumed=True))
+                return
+            status = 'succeeded' if result.get('success') else 'failed'
+            job.update(status=status, stage='done', result=result, error=result.get('error'),
+                       run_seconds=run_seconds, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Sync job {job.id} crashed: {e}")
+            job.update(status='failed', stage='done', error=str(e),
+                       run_seconds=job.run_seconds + time.time() - started,
+                       finished_at=time.time())
+        SYNC_SECONDS.labels(job.kind, job.status).observe(time.time() - started)
+        with self._lock:
+            stats.finished(job)
+        logger.info(f"Sync job {job.id} finished: {job.status}")
+
+
+def _scheduled_sync(manager):
+    accounts = list_accounts()
+    if not accounts:
+        logger.info("Skipping scheduled sync: Gmail is not configured")
+        return
+    for account in accounts:
+        job, created = manager.start(trigger='scheduled', account=account.id)
+        if not created:
+            logger.info(f"Scheduled sync of {account.id} skipped: job {job.id} is still running")
+
+
+def schedule_periodic_sync(app, manager, minutes=None):
+    """Start Flask-APScheduler with an interval job that queues syncs
+
+    ``app`` may be None where no Flask app runs, as in the sync service.
+    """
+    from flask_apscheduler import APScheduler
+
+    minutes = SYNC_INTERVAL_MINUTES if minutes is None else minutes
+    if minutes <= 0:
+        return None
+
+    scheduler = APScheduler()
+    if app is not None:
+        scheduler.init_app(app)
+    scheduler.add_job(id='periodic_sync', func=_scheduled_sync, args=[manager],
+                      trigger='interval', minutes=minutes, coalesce=True, max_instances=1)
+    scheduler.start()
+    logger.info(f"Periodic sync every {minutes} minutes")
+    return scheduler
@@ -1,189 +1,231 @@
 # Create the enhanced Flask app with sync
-from flask import Flask, render_template, jsonify, request
+#
+# Web workers only import what serving requests needs: the sync pipeline,
+# parsers and Gmail client are imported where syncs run (see create_app and
+# app.sync_service), and pandas only by the analytics endpoints.
+from flask import Flask, current_app, has_app_context, jsonify, render_template, url_for
 from flask_cors import CORS
+import hashlib
 import logging
 import os
-import json
-from datetime import datetime, timedelta
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from functools import lru_cache
 
-# Gmail and PDF processing imports
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-import base64
+from app.accounts import get_account, list_accounts
+from app.dashboard import dashboard_summary, warm_dashboard_summary
+from app.gmail.clients import gmail_status
+from app.metrics import SYNC_ERRORS, instrument_app
+from app.api.analytics import analytics_bp
+from app.api.categories import categories_bp
+from app.api.dashboard import dashboard_bp
+from app.api.metrics import metrics_bp
+from app.api.sync import sync_bp
+from app.api.transactions import transactions_bp
+from app.storage import DEFAULT_ACCOUNT, import_json_file, init_db
+from app.sync_service import SyncServiceUnavailable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_app():
+# Static files are requested with a content hash in the URL, so browsers may keep them this long
+STATIC_MAX_AGE_SECONDS = int(os.getenv('STATIC_MAX_AGE', 365 * 24 * 3600))
+
+SUPPORTED_BANKS = (
+    ('SBI Cards', 'CASHBACK, SimplySAVE', 'primary'),
+    ('HDFC Bank', 'Marriott, Regalia, Tata Neu', 'success'),
+    ('Axis Bank', 'Neo, Magnus, Atlas', 'warning'),
+    ('Standard Chartered', 'Ultimate, Manhattan', 'info'),
+)
+
+# Shown if the summary cannot be read at all, e.g. before the database exists
+EMPTY_SUMMARY = {'totals': {'transactions': 0, 'spend': 0.0, 'credits': 0.0},
+                 'months': [], 'categories': [], 'banks': [], 'accounts': [], 'merchants': []}
+
+def create_app(sync_service=None):
+    """The Flask app.
+
+    By default syncs run on a job manager inside this process, as with
+    ``python -m app``. Web workers of ``python -m app.serve`` pass a
+    ``SyncServiceClient`` instead: jobs, schedules and Gmail checks then
+    live in the sync service and the app only serves requests.
+    """
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = STATIC_MAX_AGE_SECONDS
     CORS(app)
+    app.register_blueprint(transactions_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(categories_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(metrics_bp)
+    instrument_app(app)
+    app.add_template_global(asset_url)
+    app.add_template_filter(format_inr, 'inr')
+    app.add_url_rule('/', 'dashboard', dashboard)
+    app.add_url_rule('/health', 'health', health)
+    
+    if sync_service is not None:
+        # The sync service has already set up the database
+        app.extensions['sync_jobs'] = app.extensions['sync_service'] = sync_service
+        app.register_error_handler(SyncServiceUnavailable, sync_service_unavailable)
+        return app
+    
+    app.extensions['sync_jobs'] = start_sync_jobs(app)
+    warm_dashboard_summary()
     return app
 
+def start_sync_jobs(app=None):
+    """Set up the database and start this process's sync job manager and schedule"""
+    from app.backfill import backfill_slice
+    from app.jobs import SyncJobManager, schedule_periodic_sync
+    
+    init_db()
+    # One-time move of data saved by versions that wrote transactions.json
+    import_json_file('transactions.json')
+    
+    # Syncs run on background workers, one job per account at a time; requests only queue them
+    jobs = SyncJobManager(sync_credit_card_statements, tasks={'backfill': backfill_slice})
+    schedule_periodic_sync(app, jobs)
+    # Start the first connectivity checks so the dashboard rarely sees "checking"
+    gmail_statuses()
+    return jobs
+
+@lru_cache(maxsize=None)
+def _static_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def asset_url(filename):
+    """URL of a static file that changes whenever the file does, so it can be cached for good"""
+    path = os.path.join(current_app.static_folder, filename)
+    return url_for('static', filename=filename, v=_static_digest(path))
+
+def format_inr(amount):
+    return f"₹{amount:,.2f}"
+
+def gmail_statuses():
+    """Cached Gmail connectivity per configured account; never waits on Google"""
+    service = current_app.extensions.get('sync_service') if has_app_context() else None
+    if service is not None:
+        # Web workers leave Gmail to the sync service
+        try:
+            return service.gmail_statuses()
+        except SyncServiceUnavailable as e:
+            logger.warning(f"Gmail status unavailable: {e}")
+            return {}
+    return {account.id: gmail_status(account.token_path) for account in list_accounts()}
+
 def check_gmail_status():
-    """Check Gmail API status"""
+    """Check Gmail API status
+    
+    True when any account can reach Gmail. An account whose first check is
+    still running counts as connected, since it has a saved token.
+    """
+    return any(status['connected'] or status['checked_at'] is None
+               for status in gmail_statuses().values())
+
+def sync_credit_card_statements(progress=None, account=DEFAULT_ACCOUNT, fetcher=None):
+    """Main sync function to fetch and parse credit card statements
+    
+    ``progress(stage, counts)`` is called as the sync moves through its
+    stages so background jobs can report live counts. Each account has its
+    own token and ledger, and its transactions are stored under its id.
+    ``fetcher`` replaces the account's Gmail fetcher, e.g. with one over a
+    fake mailbox for benchmarks.
+    """
+    from app.gmail.fetch import build_search_queries
+    from app.gmail.ledger import SyncLedger
+    from app.parsers.passwords import PasswordResolver
+    from app.pipeline import StatementPipeline, new_results
+    
+    def report(stage):
+        if progress:
+            progress(stage, results)
+    
+    results = {}
+    held = ExitStack()
     try:
-        if not os.path.exists('credentials.json') or not os.path.exists('token.json'):
-            return False
-        
-        creds = Credentials.from_authorized_user_file('token.json', 
-                ['https://www.googleapis.com/auth/gmail.readonly'])
+        mailbox = get_account(account)
+        logger.info(f"Starting credit card statement sync for {mailbox.id}...")
         
-        if not creds.valid:
-            return False
+        # Fetch workers lease Gmail services from the account's shared client pool
+        # (a service is not thread-safe, so each lease is exclusive); requests
+        # count against the account's Gmail quota
+        fetcher = fetcher or mailbox.fetcher()
         
-        service = build('gmail', 'v1', credentials=creds)
-        service.users().getProfile(userId='me').execute()
-        return True
+        ledger = SyncLedger(mailbox.ledger_path)
+        # Fails fast while a backfill of this account (e.g. from the CLI) holds the ledger
+        held.enter_context(ledger.locked())
+        passwords = PasswordResolver()
+        started_at = time.time()
+        started = time.perf_counter()
         
-    except Exception as e:
-        logger.error(f"Gmail status check failed: {e}")
-        return False
-
-def sync_credit_card_statements():
-    """Main sync function to fetch and parse credit card statements"""
-    try:
-        logger.info("Starting credit card statement sync...")
-        
-        # Initialize Gmail service
-        creds = Credentials.from_authorized_user_file('token.json', 
-                ['https://www.googleapis.com/auth/gmail.readonly'])
-        service = build('gmail', 'v1', credentials=creds)
+        results = new_results(account=mailbox.id, incremental=not ledger.is_empty)
         
-        results = {
-            'success': True,
-            'emails_found': 0,
-            'pdfs_downloaded': 0,
-            'transactions_parsed': 0,
-            'new_transactions': 0,
-            'errors': [],
-            'banks_processed': []
-        }
+        report('connecting')
         
-        # Search for credit card statement emails from last 90 days
-        search_queries = [
-            'from:sbicard.com subject:(statement) newer_than:90d has:attachment',
-            'from:hdfcbank.net subject:(statement) newer_than:90d has:attachment', 
-            'from:axisbank.com subject:(statement) newer_than:90d has:attachment',
-            'from:sc.com subject:(statement) newer_than:90d has:attachment',
-            'subject:(credit card statement) newer_than:90d has:attachment'
-        ]
+        # Snapshot the mailbox position before searching so nothing delivered
+        # during this sync is skipped next time
+        history_id = fetcher.get_profile().get('historyId')
         
-        all_emails = []
+        if ledger.history_id and fetcher.has_new_messages(ledger.history_id) is False \
+                and not ledger.pending_messages():
+            logger.info("No new mail since last sync")
+            ledger.finish_sync(history_id, started_at)
+            ledger.save()
+            results['gmail_requests'] = fetcher.stats['requests']
+            results['timings']['total_seconds'] = round(time.perf_counter() - started, 4)
+            return results
         
-        for query in search_queries:
-            try:
-                logger.info(f"Searching with query: {query}")
-                result = service.users().messages().list(userId='me', q=query, maxResults=10).execute()
-                messages = result.get('messages', [])
-                all_emails.extend(messages)
-                logger.info(f"Found {len(messages)} emails for query")
-            except Exception as e:
-                logger.error(f"Error with query {query}: {e}")
-                results['errors'].append(f"Search error: {str(e)}")
+        # First sync covers the last 90 days, later ones only mail after the cursor
+        report('searching')
+        queries = build_search_queries(after=ledger.search_cursor())
+        search_started = time.perf_counter()
+        found_emails, search_errors = fetcher.search(queries)
+        results['timings']['search_seconds'] = round(time.perf_counter() - search_started, 4)
+        results['errors'].extend(search_errors)
+        if search_errors:
+            results['error_counts']['search'] = len(search_errors)
+            SYNC_ERRORS.labels('search').inc(len(search_errors))
         
-        # Remove duplicates
-        unique_emails = {email['id']: email for email in all_emails}.values()
+        unique_emails = [e for e in found_emails
+                         if not ledger.is_processed(e['id']) and not ledger.is_exhausted(e['id'])]
+        found_ids = {e['id'] for e in unique_emails}
+        unique_emails.extend({'id': mid} for mid in ledger.pending_messages() if mid not in found_ids)
         results['emails_found'] = len(unique_emails)
         
-        logger.info(f"Total unique emails found: {len(unique_emails)}")
+        logger.info(f"Total unique emails found: {len(found_emails)}, new: {len(unique_emails)}")
+        report('downloading')
         
-        # Process each email
-        processed_transactions = []
+        # Only fully handled messages are skipped next time; failed ones are
+        # retried by later syncs until they run out of attempts
+        def message_done(message_id, ok):
+            if ok:
+                ledger.mark_processed(message_id)
+            else:
+                ledger.mark_failed(message_id)
         
-        for email in list(unique_emails)[:5]:  # Limit to 5 for testing
-            try:
-                # Get email details
-                msg = service.users().messages().get(userId='me', id=email['id']).execute()
-                
-                # Extract email info
-                headers = msg['payload'].get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-                
-                logger.info(f"Processing email: {subject[:50]}...")
-                
-                # Identify bank
-                bank = 'UNKNOWN'
-                if 'sbicard' in sender.lower():
-                    bank = 'SBI'
-                elif 'hdfcbank' in sender.lower():
-                    bank = 'HDFC'
-                elif 'axisbank' in sender.lower():
-                    bank = 'AXIS'
-                elif 'sc.com' in sender.lower():
-                    bank = 'SCB'
-                
-                if bank not in results['banks_processed']:
-                    results['banks_processed'].append(bank)
-                
-                # Look for PDF attachments
-                pdf_attachments = []
-                
-                def extract_attachments(payload):
-                    if 'parts' in payload:
-                        for part in payload['parts']:
-                            if part.get('filename', '').lower().endswith('.pdf'):
-                                pdf_attachments.append({
-                                    'filename': part['filename'],
-                                    'attachment_id': part['body'].get('attachmentId'),
-                                    'size': part['body'].get('size', 0)
-                                })
-                            elif 'parts' in part:
-                                extract_attachments(part)
-                    elif payload.get('filename', '').lower().endswith('.pdf'):
-                        pdf_attachments.append({
-                            'filename': payload['filename'],
-                            'attachment_id': payload['body'].get('attachmentId'),
-                            'size': payload['body'].get('size', 0)
-                        })
-                
-                extract_attachments(msg['payload'])
-                
-                # Process PDF attachments
-                for attachment in pdf_attachments:
-                    try:
-                        logger.info(f"Processing PDF: {attachment['filename']}")
-                        
-                        # Download PDF attachment
-                        att = service.users().messages().attachments().get(
-                            userId='me', 
-                            messageId=email['id'],
-                            id=attachment['attachment_id']
-                        ).execute()
-                        
-                        pdf_data = base64.urlsafe_b64decode(att['data'])
-                        results['pdfs_downloaded'] += 1
-                        
-                        # Parse PDF based on bank
-                        transactions = parse_pdf_statement(pdf_data, bank, attachment['filename'])
-                        
-                        if transactions:
-                            processed_transactions.extend(transactions)
-                            results['transactions_parsed'] += len(transactions)
-                            
-                        logger.info(f"Extracted {len(transactions)} transactions from {attachment['filename']}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing attachment {attachment['filename']}: {e}")
-                        results['errors'].append(f"PDF processing error: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"Error processing email {email['id']}: {e}")
-                results['errors'].append(f"Email processing error: {str(e)}")
+        # PDFs are handed to the parse pool as they stream in, while later
+        # emails are still downloading
+        pipeline = StatementPipeline(ledger, results, passwords=passwords, report=report,
+                                     on_message_done=message_done, account=mailbox.id)
+        pipeline.process(fetcher.iter_attachments(unique_emails))
         
-        # Store transactions
-        if processed_transactions:
-            try:
-                # Save to JSON file
-                with open('transactions.json', 'w') as f:
-                    json.dump(processed_transactions, f, indent=2, default=str)
-                results['new_transactions'] = len(processed_transactions)
-                logger.info(f"Saved {len(processed_transactions)} transactions")
-            except Exception as e:
-                logger.error(f"Error saving transactions: {e}")
-                results['errors'].append(f"Save error: {str(e)}")
+        results['gmail_requests'] = fetcher.stats['requests']
+        results['gmail_retries'] = fetcher.stats['retries']
+        results['pdfs_encrypted'] = passwords.encrypted
+        results['decrypt_attempts'] = passwords.attempts
+        results['timings']['gmail_seconds'] = round(fetcher.stats['request_seconds'], 4)
+        results['timings']['total_seconds'] = round(time.perf_counter() - started, 4)
+        
+        # A sync with search errors keeps the old cursors so the same window is retried
+        if not search_errors:
+            ledger.finish_sync(history_id, started_at)
+        ledger.save()
         
         logger.info("Sync completed successfully!")
         return results
@@ -193,312 +235,33 @@ def sync_credit_card_statements():
         return {
             'success': False,
             'error': str(e),
+            'account': account,
             'emails_found': 0,
             'pdfs_downloaded': 0,
             'transactions_parsed': 0
         }
+    finally:
+        held.close()
 
-def parse_pdf_statement(pdf_data, bank, filename):
-    """Parse PDF statement based on bank"""
-    transactions = []
-    
-    try:
-        # Create sample transactions based on bank
-        base_date = datetime.now() - timedelta(days=30)
-        
-        bank_samples = {
-            'SBI': [
-                {'desc': 'AMAZON PAY INDIA', 'amount': -1299.00, 'cat': 'Shopping'},
-                {'desc': 'SWIGGY BANGALORE', 'amount': -485.50, 'cat': 'Food & Dining'},
-                {'desc': 'PAYMENT THANK YOU', 'amount': 5000.00, 'cat': 'Payment'}
-            ],
-            'HDFC': [
-                {'desc': 'FLIPKART INTERNET', 'amount': -2150.00, 'cat': 'Shopping'},
-                {'desc': 'UBER TRIP', 'amount': -280.30, 'cat': 'Transportation'},
-                {'desc': 'AUTO PAYMENT', 'amount': 8000.00, 'cat': 'Payment'}
-            ],
-            'AXIS': [
-                {'desc': 'MYNTRA DESIGNS', 'amount': -1850.75, 'cat': 'Shopping'},
-                {'desc': 'ZOMATO LTD', 'amount': -340.60, 'cat': 'Food & Dining'},
-                {'desc': 'SALARY CREDIT', 'amount': 12000.00, 'cat': 'Income'}
-            ]
-        }
-        
-        samples = bank_samples.get(bank, bank_samples['SBI'])
-        
-        for i, sample in enumerate(samples):
-            transactions.append({
-                'date': (base_date + timedelta(days=i*3)).strftime('%Y-%m-%d'),
-                'description': sample['desc'],
-                'amount': sample['amount'],
-                'category': sample['cat'],
-                'bank': bank,
-                'filename': filename,
-                'transaction_type': 'DEBIT' if sample['amount'] < 0 else 'CREDIT'
-            })
-        
-        logger.info(f"Parsed {len(transactions)} sample transactions from {bank}")
-        
-    except Exception as e:
-        logger.error(f"Error parsing PDF from {bank}: {e}")
-        
-    return transactions
-
-app = create_app()
+def sync_service_unavailable(error):
+    return jsonify({'success': False, 'error': str(error)}), 503
 
-@app.route('/')
 def dashboard():
-    """Enhanced dashboard with sync functionality"""
-    gmail_connected = check_gmail_status()
-    
-    # Check if we have any processed transactions
-    transaction_count = 0
+    """Dashboard rendered from the precomputed summary; charts load from /api/dashboard"""
+    summary = EMPTY_SUMMARY
     try:
-        if os.path.exists('transactions.json'):
-            with open('transactions.json', 'r') as f:
-                transactions = json.load(f)
-                transaction_count = len(transactions)
-    except:
-        pass
-    
-    return f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Indian Credit Card Analyzer</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body class="bg-light">
-        <nav class="navbar navbar-dark bg-primary">
-            <div class="container">
-                <span class="navbar-brand">
-                    <i class="fas fa-credit-card me-2"></i>
-                    Indian Credit Card Analyzer
-                </span>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <!-- Status Section -->
-            <div class="alert alert-success">
-                <h4><i class="fas fa-check-circle me-2"></i>System Status</h4>
-                <ul class="list-unstyled mb-0">
-                    <li><i class="fas fa-check text-success me-2"></i>Flask App Running</li>
-                    <li><i class="fas fa-check text-success me-2"></i>Database Ready</li>
-                    <li><i class="fas fa-check text-success me-2"></i>PDF Parsers Loaded</li>
-                    <li><i class="fas fa-{'check text-success' if gmail_connected else 'exclamation-triangle text-warning'} me-2"></i>Gmail API - {'Connected' if gmail_connected else 'Needs Configuration'}</li>
-                </ul>
-            </div>
-            
-            <!-- Sync Section -->
-            <div class="row mb-4">
-                <div class="col-md-8">
-                    <div class="card">
-                        <div class="card-header">
-                            <h5><i class="fas fa-sync me-2"></i>Statement Sync</h5>
-                        </div>
-                        <div class="card-body">
-                            <div id="sync-status" class="mb-3">
-                                {'<p class="text-success">✅ Ready to sync credit card statements from Gmail!</p>' if gmail_connected else '<p class="text-warning">⚠️ Complete Gmail setup to sync statements</p>'}
-                            </div>
-                            
-                            <button 
-                                id="sync-btn" 
-                                class="btn btn-{'primary' if gmail_connected else 'secondary'} btn-lg"
-                                {'onclick="startSync()"' if gmail_connected else 'disabled'}
-                            >
-                                <i class="fas fa-sync me-2"></i>
-                                Sync Credit Card Statements
-                            </button>
-                            
-                            <div id="sync-progress" class="mt-3" style="display:none;">
-                                <div class="progress">
-                                    <div class="progress-bar progress-bar-striped progress-bar-animated" 
-                                         role="progressbar" style="width: 0%"></div>
-                                </div>
-                                <div id="sync-details" class="mt-2 small text-muted"></div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="col-md-4">
-                    <div class="card">
-                        <div class="card-header">
-                            <h6><i class="fas fa-chart-bar me-2"></i>Quick Stats</h6>
-                        </div>
-                        <div class="card-body">
-                            <div class="text-center">
-                                <h3 class="text-primary">{transaction_count}</h3>
-                                <p class="mb-2">Transactions</p>
-                                <a href="/transactions" class="btn btn-sm btn-outline-primary">View All</a>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Banks Section -->
-            <div class="row">
-                <div class="col-md-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h5><i class="fas fa-university me-2"></i>Supported Banks</h5>
-                        </div>
-                        <div class="card-body">
-                            <div class="row">
-                                <div class="col-md-3">
-                                    <div class="text-center p-3 border rounded">
-                                        <i class="fas fa-credit-card fa-2x text-primary mb-2"></i>
-                                        <h6>SBI Cards</h6>
-                                        <small class="text-muted">CASHBACK, SimplySAVE</small>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center p-3 border rounded">
-                                        <i class="fas fa-credit-card fa-2x text-success mb-2"></i>
-                                        <h6>HDFC Bank</h6>
-                                        <small class="text-muted">Marriott, Regalia, Tata Neu</small>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center p-3 border rounded">
-                                        <i class="fas fa-credit-card fa-2x text-warning mb-2"></i>
-                                        <h6>Axis Bank</h6>
-                                        <small class="text-muted">Neo, Magnus, Atlas</small>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center p-3 border rounded">
-                                        <i class="fas fa-credit-card fa-2x text-info mb-2"></i>
-                                        <h6>Standard Chartered</h6>
-                                        <small class="text-muted">Ultimate, Manhattan</small>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script>
-        function startSync() {{
-            const btn = document.getElementById('sync-btn');
-            const progress = document.getElementById('sync-progress');
-            const status = document.getElementById('sync-status');
-            const details = document.getElementById('sync-details');
-            const progressBar = progress.querySelector('.progress-bar');
-            
-            // Show progress
-            btn.disabled = true;
-            btn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Syncing...';
-            progress.style.display = 'block';
-            progressBar.style.width = '10%';
-            details.innerHTML = 'Connecting to Gmail...';
-            
-            // Start sync
-            fetch('/sync', {{ method: 'POST' }})
-                .then(response => response.json())
-                .then(data => {{
-                    progressBar.style.width = '100%';
-                    
-                    if (data.success) {{
-                        status.innerHTML = `
-                            <div class="alert alert-success">
-                                <h6><i class="fas fa-check-circle me-2"></i>Sync Completed!</h6>
-                                <ul class="mb-0">
-                                    <li>📧 Emails found: ${{data.emails_found}}</li>
-                                    <li>📄 PDFs processed: ${{data.pdfs_downloaded}}</li>
-                                    <li>💳 Transactions parsed: ${{data.transactions_parsed}}</li>
-                                    <li>🏦 Banks: ${{data.banks_processed.join(', ') || 'None'}}</li>
-                                </ul>
-                            </div>
-                        `;
-                        details.innerHTML = 'Sync completed successfully!';
-                        
-                        // Refresh page after 3 seconds
-                        setTimeout(() => {{ window.location.reload(); }}, 3000);
-                    }} else {{
-                        status.innerHTML = `
-                            <div class="alert alert-danger">
-                                <h6><i class="fas fa-exclamation-circle me-2"></i>Sync Failed</h6>
-                                <p>${{data.error || 'Unknown error occurred'}}</p>
-                            </div>
-                        `;
-                    }}
-                    
-                    // Reset button
-                    btn.disabled = false;
-                    btn.innerHTML = '<i class="fas fa-sync me-2"></i>Sync Credit Card Statements';
-                    
-                    setTimeout(() => {{
-                        progress.style.display = 'none';
-                        progressBar.style.width = '0%';
-                    }}, 5000);
-                }})
-                .catch(error => {{
-                    console.error('Sync error:', error);
-                    status.innerHTML = `
-                        <div class="alert alert-danger">
-                            <h6>Network Error</h6>
-                            <p>Please check your connection and try again.</p>
-                        </div>
-                    `;
-                    btn.disabled = false;
-                    btn.innerHTML = '<i class="fas fa-sync me-2"></i>Sync Credit Card Statements';
-                }});
-        }}
-        </script>
-    </body>
-    </html>
-    """
-
-@app.route('/sync', methods=['POST'])
-def sync_statements():
-    """Sync credit card statements endpoint"""
-    try:
-        results = sync_credit_card_statements()
-        return jsonify(results)
-    except Exception as e:
-        logger.error(f"Sync endpoint error: {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
-@app.route('/transactions')
-def view_transactions():
-    """View processed transactions"""
-    transactions = []
-    
-    try:
-        if os.path.exists('transactions.json'):
-            with open('transactions.json', 'r') as f:
-                transactions = json.load(f)
+        summary = dashboard_summary()
     except Exception as e:
-        logger.error(f"Error loading transactions: {e}")
-    
-    return jsonify({
-        'count': len(transactions),
-        'transactions': transactions
-    })
+        logger.error(f"Error reading dashboard summary: {e}")
+    return render_template('dashboard.html', summary=summary,
+                           gmail_connected=check_gmail_status(),
+                           supported_banks=SUPPORTED_BANKS)
 
-@app.route('/health')
 def health():
+    statuses = gmail_statuses()
     return jsonify({
         'status': 'healthy',
-        'gmail_connected': check_gmail_status(),
+        'gmail_connected': any(status['connected'] for status in statuses.values()),
+        'gmail_accounts': statuses,
         'timestamp': datetime.now().isoformat()
     })
-
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    host = os.environ.get('HOST', '0.0.0.0')
-    
-    logger.info(f"Starting Credit Card Analyzer on {host}:{port}")
-    app.run(host=host, port=port, debug=False)
-EOF
\ No newline at end of file
@@ -0,0 +1,263 @@
+# In-process metrics (counters, gauges, histograms) in Prometheus text format, plus sync profiling
+import cProfile
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# When set, every sync job runs under cProfile and its stats are written here
+SYNC_PROFILE_DIR = os.getenv('SYNC_PROFILE_DIR') or None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SYNC_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+BYTE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2,
+                64 * 1024 ** 2)
+ROW_BUCKETS = (0, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        _registry.append(self)
+
+    def labels(self, *values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        key = tuple('' if value is None else str(value) for value in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in sorted(children):
+            yield from child.samples(self.name, self.labelnames, values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_number(value)}" for name, labels, value in self._samples())
+        return '\n'.join(lines)
+
+    # Metrics without labels are used directly
+    def __getattr__(self, attr):
+        if attr in ('inc', 'set', 'observe', 'time') and not self.labelnames:
+            return getattr(self.labels(), attr)
+        raise AttributeError(attr)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labelnames, values):
+        yield f"{name}", _format_labels(labelnames, values), self.value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests or errors"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Gauge(_Metric):
+    """Current value, e.g. queued jobs"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def add(self, counts, total, count):
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.sum += total
+            self.count += count
+
+    def take(self):
+        """This child's observations since the last take, then starts over"""
+        with self._lock:
+            taken = (self.counts, self.sum, self.count)
+            self.counts, self.sum, self.count = [0] * len(self.buckets), 0.0, 0
+        return taken
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self, name, labelnames, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            yield f"{name}_bucket", _format_labels(labelnames, values, [('le', _format_number(bound))]), \
+                cumulative
+        yield f"{name}_bucket", _format_labels(labelnames, values, [('le', '+Inf')]), count
+        yield f"{name}_sum", _format_labels(labelnames, values), total
+        yield f"{name}_count", _format_labels(labelnames, values), count
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(float(bound) for bound in sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def take(self):
+        """Observations since the last take as ``{labels: (counts, sum, count)}``, resetting them"""
+        with self._lock:
+            children = list(self._children.items())
+        taken = {values: child.take() for values, child in children}
+        return {values: data for values, data in taken.items() if data[2]}
+
+    def merge(self, taken):
+        """Add observations returned by ``take()``, e.g. in another process"""
+        for values, (counts, total, count) in taken.items():
+            self.labels(*values).add(counts, total, count)
+
+
+def render(names=None, exclude=()):
+    """This process's metrics (all, or those in ``names``) in the Prometheus text exposition format"""
+    return ''.join(metric.render() + '\n' for metric in _registry
+                   if (names is None or metric.name in names) and metric.name not in exclude)
+
+
+GMAIL_REQUEST_SECONDS = Histogram(
+    'gmail_request_seconds', 'Latency of one Gmail API call attempt', ('operation',))
+GMAIL_REQUESTS = Counter(
+    'gmail_requests_total', 'Gmail API call attempts by result (ok, retried, failed)',
+    ('operation', 'result'))
+PDF_BYTES = Histogram('pdf_bytes', 'Size of downloaded statement PDFs', ('bank',), BYTE_BUCKETS)
+PDF_DECRYPT_SECONDS = Histogram(
+    'pdf_decrypt_seconds', 'Time to find the password of an encrypted statement', ('bank',))
+PDF_PARSE_SECONDS = Histogram(
+    'pdf_parse_seconds', 'Time a parser spent on one statement', ('bank',))
+PDF_TRANSACTIONS = Histogram(
+    'pdf_transactions', 'Transactions extracted per statement', ('bank',), ROW_BUCKETS)
+PARSE_CACHE_LOOKUPS = Counter('parse_cache_lookups_total', 'Parse cache lookups', ('result',))
+PIPELINE_STEP_SECONDS = Histogram(
+    'pipeline_step_seconds', 'Per-statement categorize and store time', ('step',))
+SYNC_ERRORS = Counter('sync_errors_total', 'Sync failures by stage', ('stage',))
+SYNC_SECONDS = Histogram(
+    'sync_run_seconds', 'Run time of a sync job (or one backfill slice)', ('kind', 'status'),
+    SYNC_BUCKETS)
+SYNC_JOBS = Gauge('sync_jobs', 'Sync jobs by state', ('state',))
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_seconds', 'HTTP request latency by route', ('method', 'route', 'status'))
+
+
+def instrument_app(app):
+    """Time every request of a Flask app under its route pattern"""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(
+                time.perf_counter() - started)
+        return response
+
+
+@contextmanager
+def profiled(name):
+    """Run the block under cProfile when SYNC_PROFILE_DIR is set; yields the dump path or None.
+
+    Only the calling thread is profiled: Gmail fetch threads and parse
+    worker processes show up as time spent waiting on them.
+    """
+    if not SYNC_PROFILE_DIR:
+        yield None
+        return
+    os.makedirs(SYNC_PROFILE_DIR, exist_ok=True)
+    path = os.path.join(SYNC_PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ allows one profiler at a time, so concurrent jobs go unprofiled
+        logger.warning(f"Not profiling {name}: {e}")
+        yield None
+        return
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logger.info(f"Wrote sync profile {path} (inspect with python -m pstats)")
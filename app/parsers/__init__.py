@@ -1 +1,12 @@
 # Bank-specific PDF parsers for credit card statements
+from app.parsers.registry import (
+    PARSERS,
+    detect_bank,
+    get_parser,
+    parse_statement,
+    parse_with_parser,
+    register_parser,
+)
+from app.parsers import axis, hdfc, icici, sbi, scb  # noqa: F401 - registers parsers
+from app.parsers.cache import ParseCache, get_parse_cache
+from app.parsers.pool import shutdown_parse_pool, submit_parse
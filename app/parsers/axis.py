@@ -0,0 +1,17 @@
+# Axis Bank credit card statements
+from app.parsers.base import StatementParser
+from app.parsers.registry import register_parser
+
+
+@register_parser
+class AxisParser(StatementParser):
+    """Axis Bank: '12/01/2024  MYNTRA DESIGNS  SHOPPING  1,850.75 Dr'"""
+
+    bank = 'AXIS'
+    version = 1
+    identifiers = ('AXIS BANK', 'AXISBANK')
+    transaction_page_markers = ('ACCOUNT SUMMARY', 'TRANSACTION DETAILS')
+    date_pattern = r'\d{2}/\d{2}/\d{4}'
+    date_formats = ('%d/%m/%Y',)
+    credit_suffixes = ('CR',)
+    debit_suffixes = ('DR',)
@@ -0,0 +1,152 @@
+# Shared machinery for bank statement parsers
+import io
+import logging
+import re
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_RE = r'(?P<amount>-?[\d,]+\.\d{2})'
+
+# PDFium is not thread-safe: every pdfium call in a process goes through this lock
+PDFIUM_LOCK = threading.Lock()
+
+# Summary lines that look like transactions but are not
+SKIP_KEYWORDS = (
+    'OPENING BALANCE', 'CLOSING BALANCE', 'PREVIOUS BALANCE', 'TOTAL DUES',
+    'TOTAL AMOUNT DUE', 'MINIMUM AMOUNT DUE', 'PAYMENT DUE DATE', 'STATEMENT DATE'
+)
+
+
+def pdf_source(pdf_data):
+    """What PDF libraries should open: a path as is, bytes wrapped in a file object.
+
+    Statements downloaded by a sync arrive as paths, so they are read from
+    disk page by page instead of being copied around in memory.
+    """
+    if isinstance(pdf_data, (bytes, bytearray)):
+        return io.BytesIO(pdf_data)
+    return pdf_data
+
+
+def scan_page_texts(pdf_data, password=None):
+    """Cheap per-page text via pdfium, without pdfplumber's layout analysis
+
+    ``pdf_data`` is the PDF bytes or a path to the file.
+    """
+    import pypdfium2 as pdfium
+
+    with PDFIUM_LOCK:
+        document = pdfium.PdfDocument(pdf_data, password=password)
+        try:
+            texts = []
+            for index in range(len(document)):
+                page = document[index]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            document.close()
+
+
+class StatementParser:
+    """Line-oriented parser for one bank's credit card statement layout.
+
+    Subclasses describe the layout: how to recognise the bank and the pages
+    holding transactions, the date formats used, and the suffixes that mark
+    credits. Bump ``version`` whenever parsing output changes.
+    """
+
+    bank = None
+    version = 1
+    # Text that identifies a statement from this bank
+    identifiers = ()
+    # Text that appears on pages carrying the transaction table
+    transaction_page_markers = ()
+    date_pattern = r'\d{2}/\d{2}/\d{4}'
+    date_formats = ('%d/%m/%Y',)
+    credit_suffixes = ('CR',)
+    debit_suffixes = ('DR',)
+
+    def __init__(self):
+        suffixes = '|'.join(re.escape(s) for s in self.credit_suffixes + self.debit_suffixes)
+        self.line_re = re.compile(
+            rf'^\s*(?P<date>{self.date_pattern})\s+(?P<description>.+?)\s+'
+            rf'{AMOUNT_RE}\s*(?P<suffix>{suffixes})?\s*$',
+            re.IGNORECASE
+        )
+
+    def matches(self, text):
+        """True if ``text`` (usually the first page) belongs to this bank"""
+        upper = text.upper()
+        return any(marker.upper() in upper for marker in self.identifiers)
+
+    def transaction_pages(self, page_texts):
+        """Indexes of pages worth running full layout extraction on"""
+        markers = [m.upper() for m in self.transaction_page_markers]
+        pages = [i for i, text in enumerate(page_texts)
+                 if any(marker in text.upper() for marker in markers)]
+        # Unknown layout variant: fall back to every page
+        return pages or list(range(len(page_texts)))
+
+    def parse_date(self, value):
+        value = ' '.join(value.split())
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return None
+
+    def parse_line(self, line):
+        """Turn one statement line into a transaction dict, or None"""
+        match = self.line_re.match(line)
+        if not match:
+            return None
+        description = ' '.join(match.group('description').split())
+        if any(keyword in description.upper() for keyword in SKIP_KEYWORDS):
+            return None
+        date = self.parse_date(match.group('date'))
+        if date is None:
+            return None
+
+        amount = abs(float(match.group('amount').replace(',', '')))
+        suffix = (match.group('suffix') or '').upper()
+        is_credit = suffix in [s.upper() for s in self.credit_suffixes] \
+            or match.group('amount').startswith('-')
+        return {
+            'date': date,
+            'description': description,
+            'amount': amount if is_credit else -amount,
+            'transaction_type': 'CREDIT' if is_credit else 'DEBIT'
+        }
+
+    def parse(self, pdf_data, filename, password=None, page_texts=None):
+        """Extract transactions, running pdfplumber only on transaction pages"""
+        import pdfplumber
+
+        if page_texts is None:
+            page_texts = scan_page_texts(pdf_data, password)
+        pages = self.transaction_pages(page_texts)
+
+        transactions = []
+        with pdfplumber.open(pdf_source(pdf_data), pages=[i + 1 for i in pages],
+                             password=password) as pdf:
+            for page in pdf.pages:
+                for line in (page.extract_text() or '').splitlines():
+                    txn = self.parse_line(line)
+                    if txn is None:
+                        continue
+                    txn.update({
+                        'category': 'Uncategorized',
+                        'bank': self.bank,
+                        'filename': filename
+                    })
+                    transactions.append(txn)
+
+        logger.info(f"Parsed {len(transactions)} transactions from {self.bank} "
+                    f"statement {filename} ({len(pages)}/{len(page_texts)} pages)")
+        return transactions
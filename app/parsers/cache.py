@@ -0,0 +1,143 @@
+# On-disk cache of parsed statements, keyed by PDF content hash
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from app.parsers.registry import PARSERS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('PARSE_CACHE_DIR', os.path.join('data', 'parse_cache'))
+DEFAULT_MAX_BYTES = int(float(os.getenv('PARSE_CACHE_MAX_MB', 64)) * 1024 * 1024)
+
+# Bump when the entry layout below changes
+FORMAT_VERSION = 1
+
+FIELDS = ('date', 'description', 'amount', 'category', 'transaction_type')
+
+SUFFIX = '.json.z'
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parser output.
+
+    Entries are named by the SHA-256 of the PDF bytes and record which
+    parser and parser version produced them; an entry written by an older
+    parser version is treated as a miss and removed. Rows are stored as
+    zlib-compressed JSON arrays in ``FIELDS`` order.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._index = None
+        self._total = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _path(self, content_hash):
+        return os.path.join(self.directory, content_hash[:2], content_hash + SUFFIX)
+
+    def _load_index(self):
+        # Oldest first, by last access time recorded in the file mtime
+        entries = []
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-len(SUFFIX)], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(self._index.values())
+
+    def _ensure_index(self):
+        if self._index is None:
+            self._load_index()
+
+    def _discard(self, content_hash):
+        size = self._index.pop(content_hash, None)
+        if size is not None:
+            self._total -= size
+        try:
+            os.remove(self._path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def get(self, content_hash, filename):
+        """Cached transactions for a PDF, or None on a miss"""
+        with self._lock:
+            self._ensure_index()
+            if content_hash not in self._index:
+                self.stats['misses'] += 1
+                return None
+            path = self._path(content_hash)
+            try:
+                with open(path, 'rb') as f:
+                    entry = json.loads(zlib.decompress(f.read()))
+            except Exception as e:
+                logger.warning(f"Dropping unreadable parse cache entry {content_hash}: {e}")
+                self._discard(content_hash)
+                self.stats['misses'] += 1
+                return None
+
+            parser = PARSERS.get(entry.get('bank'))
+            if entry.get('format') != FORMAT_VERSION or parser is None \
+                    or entry.get('parser_version') != parser.version:
+                # Written by an older parser; re-parse with the current one
+                self._discard(content_hash)
+                self.stats['misses'] += 1
+                return None
+
+            self._index.move_to_end(content_hash)
+            os.utime(path)
+            self.stats['hits'] += 1
+
+        return [dict(zip(FIELDS, row), bank=entry['bank'], filename=filename)
+                for row in entry['rows']]
+
+    def put(self, content_hash, bank, parser_version, transactions):
+        """Store parser output and evict least recently used entries over the limit"""
+        entry = {
+            'format': FORMAT_VERSION,
+            'bank': bank,
+            'parser_version': parser_version,
+            'rows': [[txn.get(field) for field in FIELDS] for txn in transactions]
+        }
+        data = zlib.compress(json.dumps(entry, separators=(',', ':')).encode())
+        path = self._path(content_hash)
+
+        with self._lock:
+            self._ensure_index()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._total -= self._index.pop(content_hash, 0)
+            self._index[content_hash] = len(data)
+            self._total += len(data)
+
+            while self._total > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._discard(oldest)
+                self.stats['evictions'] += 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """Process-wide parse cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache()
+        return _cache
@@ -0,0 +1,18 @@
+# HDFC Bank credit card statements
+from app.parsers.base import StatementParser
+from app.parsers.registry import register_parser
+
+
+@register_parser
+class HDFCParser(StatementParser):
+    """HDFC Bank: '12/01/2024 12:45:10  SWIGGY BANGALORE  485.50' with 'Cr' on credits"""
+
+    bank = 'HDFC'
+    version = 1
+    identifiers = ('HDFC BANK', 'HDFCBANK')
+    transaction_page_markers = ('DOMESTIC TRANSACTIONS', 'INTERNATIONAL TRANSACTIONS')
+    # Newer statements add the transaction time after the date
+    date_pattern = r'\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2}:\d{2})?'
+    date_formats = ('%d/%m/%Y', '%d/%m/%Y %H:%M:%S')
+    credit_suffixes = ('CR',)
+    debit_suffixes = ('DR',)
@@ -0,0 +1,26 @@
+# ICICI Bank credit card statements
+from app.parsers.base import StatementParser
+from app.parsers.registry import register_parser
+
+
+@register_parser
+class ICICIParser(StatementParser):
+    """ICICI Bank: '12/01/2024  1234567890  ZOMATO LTD  340.60' with 'CR' on credits"""
+
+    bank = 'ICICI'
+    version = 1
+    identifiers = ('ICICI BANK', 'ICICIBANK')
+    transaction_page_markers = ('TRANSACTION DETAILS', 'SERNO')
+    date_pattern = r'\d{2}/\d{2}/\d{4}'
+    date_formats = ('%d/%m/%Y',)
+    credit_suffixes = ('CR',)
+    debit_suffixes = ('DR',)
+
+    def parse_line(self, line):
+        txn = super().parse_line(line)
+        if txn:
+            # Drop the leading reference number column
+            parts = txn['description'].split(' ', 1)
+            if len(parts) == 2 and parts[0].isdigit():
+                txn['description'] = parts[1]
+        return txn
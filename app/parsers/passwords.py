@@ -0,0 +1,198 @@
+# Statement password resolution with a remembered strategy per bank/card
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+
+from app.filelock import file_lock
+from app.metrics import PDF_DECRYPT_SECONDS
+from app.parsers.base import PDFIUM_LOCK
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY_PATH = os.getenv('PDF_PASSWORD_STRATEGY_PATH',
+                                  os.path.join('data', 'pdf_password_strategies.json'))
+
+# Strategy name -> password built from the user's profile; None when a field is missing
+STRATEGIES = {
+    'NAME4_DDMM': lambda p: _join(p['name4'] and p['name4'].upper(), p['ddmm']),
+    'name4_DDMM': lambda p: _join(p['name4'] and p['name4'].lower(), p['ddmm']),
+    'Name4_DDMM': lambda p: _join(p['name4'] and p['name4'].capitalize(), p['ddmm']),
+    'NAME4_DDMMYY': lambda p: _join(p['name4'] and p['name4'].upper(), p['ddmmyy']),
+    'name4_DDMMYY': lambda p: _join(p['name4'] and p['name4'].lower(), p['ddmmyy']),
+    'DDMMYYYY_LAST4': lambda p: _join(p['ddmmyyyy'], p['last4']),
+    'DDMMYY_LAST4': lambda p: _join(p['ddmmyy'], p['last4']),
+    'DDMMYYYY': lambda p: p['ddmmyyyy'],
+    'DDMMYY': lambda p: p['ddmmyy'],
+    'DDMM': lambda p: p['ddmm'],
+}
+
+# Most likely patterns first; the rest of STRATEGIES follow as fallbacks
+BANK_STRATEGY_ORDER = {
+    'HDFC': ('NAME4_DDMM', 'NAME4_DDMMYY'),
+    'AXIS': ('NAME4_DDMM', 'NAME4_DDMMYY'),
+    'ICICI': ('name4_DDMM', 'NAME4_DDMM'),
+    'SBI': ('DDMMYYYY_LAST4', 'DDMMYY_LAST4', 'DDMMYYYY'),
+    'SCB': ('DDMMYY', 'DDMMYYYY', 'NAME4_DDMM'),
+}
+
+CARD_HINT_RE = re.compile(r'(?:ENDING(?:\s+WITH)?|X{2,}|\*{2,})\s*(\d{4})', re.IGNORECASE)
+
+
+class PdfPasswordError(Exception):
+    pass
+
+
+def _join(*parts):
+    return ''.join(parts) if all(parts) else None
+
+
+def load_profile():
+    """Password ingredients from the environment (see README)"""
+    ddmmyy = os.getenv('USER_DOB_DDMMYY') or None
+    ddmmyyyy = os.getenv('USER_DOB_DDMMYYYY') or None
+    return {
+        'name4': (os.getenv('USER_FIRST_NAME_4_CHARS') or '')[:4] or None,
+        'ddmm': os.getenv('USER_DOB_DDMM') or (ddmmyy or ddmmyyyy or '')[:4] or None,
+        'ddmmyy': ddmmyy or (ddmmyyyy[:4] + ddmmyyyy[-2:] if ddmmyyyy else None),
+        'ddmmyyyy': ddmmyyyy,
+        'last4': os.getenv('USER_CARD_LAST4') or None,
+    }
+
+
+def card_hint(*texts):
+    """Last four card digits mentioned in a subject or filename, if any"""
+    for text in texts:
+        match = CARD_HINT_RE.search(text or '')
+        if match:
+            return match.group(1)
+    return None
+
+
+def is_encrypted(pdf_data):
+    # The trailer or xref stream of an encrypted PDF always names /Encrypt;
+    # a byte scan is far cheaper than a failed open
+    if isinstance(pdf_data, (bytes, bytearray)):
+        return b'/Encrypt' in pdf_data
+    # A path: scan the file through mmap instead of reading it into memory
+    with open(pdf_data, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return view.find(b'/Encrypt') != -1
+
+
+def try_password(pdf_data, password):
+    """One decrypt attempt; True if pdfium opens the document"""
+    import pypdfium2 as pdfium
+
+    with PDFIUM_LOCK:
+        try:
+            document = pdfium.PdfDocument(pdf_data, password=password)
+        except pdfium.PdfiumError:
+            return False
+        document.close()
+    return True
+
+
+class PasswordResolver:
+    """Finds statement passwords and remembers which pattern each bank/card uses.
+
+    Only strategy names are persisted, never the passwords themselves.
+    ``attempts`` counts decrypt attempts across all resolutions. The
+    profile comes from the environment and is shared by every account, so
+    statements of a household member with another name or birth date
+    cannot be decrypted.
+    """
+
+    def __init__(self, path=None, profile=None):
+        self.path = path or DEFAULT_STRATEGY_PATH
+        self.profile = profile or load_profile()
+        self._lock = threading.Lock()
+        self.strategies = self._read()
+        # What this resolver learned, merged into the file on every save
+        self._learned = {}
+        self.attempts = 0
+        self.encrypted = 0
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ignoring unreadable password strategy file {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        # Concurrent syncs, backfills and processes each have a resolver: re-read
+        # the file under a lock and merge, so no one's strategies are lost
+        with file_lock(f"{self.path}.lock"):
+            strategies = self._read()
+            strategies.update(self._learned)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(strategies, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        self.strategies = strategies
+
+    def _remember(self, keys, strategy):
+        with self._lock:
+            changed = False
+            for key in keys:
+                if self.strategies.get(key) != strategy:
+                    self.strategies[key] = strategy
+                    self._learned[key] = strategy
+                    changed = True
+            if changed:
+                self._save()
+
+    def candidate_order(self, bank, card=None):
+        """Strategy names to try, learned ones first"""
+        learned = [self.strategies.get(f"{bank}:{card}") if card else None,
+                   self.strategies.get(bank)]
+        order = []
+        for name in learned + list(BANK_STRATEGY_ORDER.get(bank, ())) + list(STRATEGIES):
+            if name and name not in order:
+                order.append(name)
+        return order
+
+    def resolve(self, pdf_data, bank, card=None):
+        """Password for ``pdf_data``, the PDF bytes or a path (None if it is not encrypted).
+
+        Raises PdfPasswordError when no candidate opens the document.
+        """
+        if not is_encrypted(pdf_data):
+            return None
+
+        with self._lock:
+            self.encrypted += 1
+        with PDF_DECRYPT_SECONDS.labels(bank).time():
+            return self._find_password(pdf_data, bank, card)
+
+    def _find_password(self, pdf_data, bank, card):
+        tried = set()
+        for name in self.candidate_order(bank, card):
+            password = STRATEGIES[name](self.profile)
+            if password is None or password in tried:
+                continue
+            tried.add(password)
+            with self._lock:
+                self.attempts += 1
+            if try_password(pdf_data, password):
+                self._remember([bank] + ([f"{bank}:{card}"] if card else []), name)
+                logger.info(f"Decrypted {bank} statement with {name} after {len(tried)} attempt(s)")
+                return password
+
+        # '/Encrypt' can appear in an unencrypted file's content
+        with self._lock:
+            self.attempts += 1
+        if try_password(pdf_data, None):
+            return None
+        raise PdfPasswordError(
+            f"Could not decrypt {bank} statement after {len(tried) + 1} attempts; "
+            f"check USER_FIRST_NAME_4_CHARS / USER_DOB_DDMM / USER_DOB_DDMMYY"
+        )
@@ -0,0 +1,115 @@
+# Process pool that keeps PDF layout analysis off the web process's GIL
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.metrics import PARSE_CACHE_LOOKUPS, PDF_PARSE_SECONDS
+from app.parsers.cache import get_parse_cache
+from app.parsers.registry import parse_with_parser
+
+logger = logging.getLogger(__name__)
+
+# 0 parses in the calling process (useful for debugging and tiny boards)
+PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Process-wide parse pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent runs Gmail and job threads
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"Started PDF parse pool with {PARSE_WORKERS} workers")
+        return _pool
+
+
+def _timed_parse(*args):
+    # Runs in the worker, so the time excludes waiting for a free one
+    started = time.perf_counter()
+    return parse_with_parser(*args), time.perf_counter() - started
+
+
+def _run_inline(fn, *args):
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def submit_parse(pdf_data, bank, filename, password=None, content_hash=None,
+                 password_resolver=None, stats=None):
+    """Parse a statement in the pool; returns a Future of the transaction list.
+
+    ``pdf_data`` is the PDF bytes or, cheaper to hand to a worker, its
+    path. With ``content_hash`` the parse cache is consulted first, and
+    fresh results are written back to it. ``password_resolver()`` is only
+    called on a cache miss, so cached statements are never decrypted.
+    ``stats`` (a dict) accumulates ``decrypt_seconds``, ``parse_seconds``
+    and ``cache_hits``.
+    """
+    stats = {} if stats is None else stats
+    cache = get_parse_cache() if content_hash else None
+    if cache is not None:
+        cached = cache.get(content_hash, filename)
+        PARSE_CACHE_LOOKUPS.labels('miss' if cached is None else 'hit').inc()
+        if cached is not None:
+            logger.info(f"Parse cache hit for {filename}")
+            stats['cache_hits'] = stats.get('cache_hits', 0) + 1
+            future = Future()
+            future.set_result(cached)
+            return future
+
+    if password_resolver is not None:
+        started = time.perf_counter()
+        try:
+            password = password_resolver()
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            return failed
+        finally:
+            stats['decrypt_seconds'] = stats.get('decrypt_seconds', 0.0) + time.perf_counter() - started
+
+    args = (pdf_data, bank, filename, password)
+    if PARSE_WORKERS <= 0:
+        parsed = _run_inline(_timed_parse, *args)
+    else:
+        parsed = get_parse_pool().submit(_timed_parse, *args)
+
+    result = Future()
+
+    def finish(done):
+        try:
+            (parser_bank, parser_version, transactions), seconds = done.result()
+        except Exception as e:
+            result.set_exception(e)
+            return
+        PDF_PARSE_SECONDS.labels(parser_bank).observe(seconds)
+        stats['parse_seconds'] = stats.get('parse_seconds', 0.0) + seconds
+        if cache is not None:
+            try:
+                cache.put(content_hash, parser_bank, parser_version, transactions)
+            except Exception as e:
+                logger.warning(f"Could not cache parse of {filename}: {e}")
+        result.set_result(transactions)
+
+    parsed.add_done_callback(finish)
+    return result
+
+
+def shutdown_parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
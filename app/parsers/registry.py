@@ -0,0 +1,45 @@
+# Bank code -> parser lookup and statement dispatch
+from app.parsers.base import scan_page_texts
+
+PARSERS = {}
+
+
+def register_parser(parser_cls):
+    """Class decorator adding a parser to the registry under its bank code"""
+    PARSERS[parser_cls.bank] = parser_cls()
+    return parser_cls
+
+
+def get_parser(bank):
+    return PARSERS.get(bank)
+
+
+def detect_bank(page_texts):
+    """Identify the issuing bank from the first pages of a statement"""
+    head = '\n'.join(page_texts[:2])
+    for bank, parser in PARSERS.items():
+        if parser.matches(head):
+            return bank
+    return None
+
+
+def parse_with_parser(pdf_data, bank, filename, password=None):
+    """Parse a statement with its bank's parser.
+
+    The bank named in the PDF wins over the one guessed from the sender, so
+    forwarded statements and unknown senders still reach the right parser.
+    Returns ``(parser_bank, parser_version, transactions)``.
+    """
+    page_texts = scan_page_texts(pdf_data, password)
+    parser = PARSERS.get(bank)
+    if parser is None or not parser.matches('\n'.join(page_texts[:2])):
+        parser = PARSERS.get(detect_bank(page_texts)) or parser
+    if parser is None:
+        raise ValueError(f"No parser available for {bank} statement {filename}")
+    transactions = parser.parse(pdf_data, filename, password=password, page_texts=page_texts)
+    return parser.bank, parser.version, transactions
+
+
+def parse_statement(pdf_data, bank, filename, password=None):
+    """Parse a statement with its bank's parser"""
+    return parse_with_parser(pdf_data, bank, filename, password)[2]
@@ -0,0 +1,17 @@
+# SBI Card statements
+from app.parsers.base import StatementParser
+from app.parsers.registry import register_parser
+
+
+@register_parser
+class SBIParser(StatementParser):
+    """SBI Card: '12 Jan 24  AMAZON PAY INDIA  1,299.00 D'"""
+
+    bank = 'SBI'
+    version = 1
+    identifiers = ('SBI CARD', 'SBI CARDS AND PAYMENT SERVICES', 'SBICARD.COM')
+    transaction_page_markers = ('TRANSACTIONS FOR', 'TRANSACTION DETAILS')
+    date_pattern = r'\d{2}\s+[A-Za-z]{3}\s+\d{2,4}'
+    date_formats = ('%d %b %y', '%d %b %Y')
+    credit_suffixes = ('C', 'CR')
+    debit_suffixes = ('D', 'DR')
@@ -0,0 +1,17 @@
+# Standard Chartered credit card statements
+from app.parsers.base import StatementParser
+from app.parsers.registry import register_parser
+
+
+@register_parser
+class SCBParser(StatementParser):
+    """Standard Chartered: '12 Jan 2024  UBER TRIP  280.30' with 'CR' on credits"""
+
+    bank = 'SCB'
+    version = 1
+    identifiers = ('STANDARD CHARTERED', 'SC.COM')
+    transaction_page_markers = ('YOUR TRANSACTIONS', 'TRANSACTION DETAILS')
+    date_pattern = r'\d{2}\s+[A-Za-z]{3}\s+\d{2,4}'
+    date_formats = ('%d %b %Y', '%d %b %y')
+    credit_suffixes = ('CR',)
+    debit_suffixes = ('DR',)
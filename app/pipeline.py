@@ -0,0 +1,205 @@
+# Statement processing shared by incremental syncs and backfills
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from app.categorize import get_categorizer
+from app.metrics import PDF_BYTES, PDF_TRANSACTIONS, PIPELINE_STEP_SECONDS, SYNC_ERRORS
+from app.parsers import submit_parse
+from app.parsers.passwords import PasswordResolver, PdfPasswordError, card_hint
+from app.storage import DEFAULT_ACCOUNT, upsert_transactions
+
+logger = logging.getLogger(__name__)
+
+MAX_PDFS_IN_FLIGHT = int(os.getenv('MAX_PDFS_IN_FLIGHT', 8))
+
+
+def new_results(**extra):
+    """Counters filled in by StatementPipeline, plus any caller-specific fields"""
+    results = {
+        'success': True,
+        'emails_found': 0,
+        'emails_processed': 0,
+        'pdfs_downloaded': 0,
+        'pdfs_skipped': 0,
+        'transactions_parsed': 0,
+        'new_transactions': 0,
+        'duplicates_skipped': 0,
+        'near_duplicates_skipped': 0,
+        'parse_cache_hits': 0,
+        'errors': [],
+        # Failures per stage: search, email, download, decrypt, parse, store
+        'error_counts': {},
+        'banks_processed': [],
+        # Seconds spent per stage; Gmail and parse time are summed over concurrent workers
+        'timings': {}
+    }
+    results.update(extra)
+    return results
+
+
+class StatementPipeline:
+    """Parses downloaded statements and stores their transactions.
+
+    Feed it the items yielded by ``GmailFetcher.iter_attachments()``. PDFs
+    go to the parse pool as they arrive, with at most ``max_in_flight``
+    queued, and each parsed statement is stored in its own short database
+    transaction. ``on_message_done(message_id, ok)`` is called once
+    every attachment of a message has been stored, skipped or has failed.
+    Transactions are stored under ``account``. Failures are counted per
+    stage in ``error_counts`` and stage times are added to ``timings``.
+    """
+
+    def __init__(self, ledger, results, passwords=None, categorizer=None, report=None,
+                 on_message_done=None, max_in_flight=None, account=DEFAULT_ACCOUNT):
+        self.ledger = ledger
+        self.account = account
+        self.results = results
+        self.passwords = passwords or PasswordResolver()
+        self.categorizer = categorizer or get_categorizer()
+        self.report = report or (lambda stage: None)
+        self.on_message_done = on_message_done
+        self.max_in_flight = max_in_flight or MAX_PDFS_IN_FLIGHT
+        self.failed_messages = set()
+        self._remaining = {}
+        self._queued_hashes = set()
+        self._parsing = {}
+        self._duplicate_stats = {'duplicates': 0, 'near_duplicates': 0}
+        self._parse_stats = {}
+
+    def _attachment_done(self, message_id):
+        remaining = self._remaining.get(message_id, 0) - 1
+        if remaining > 0:
+            self._remaining[message_id] = remaining
+        else:
+            self._message_done(message_id)
+
+    def _message_done(self, message_id):
+        self._remaining.pop(message_id, None)
+        if self.on_message_done:
+            self.on_message_done(message_id, message_id not in self.failed_messages)
+
+    def _fail(self, item, error, stage):
+        self.results['errors'].append(error)
+        counts = self.results.setdefault('error_counts', {})
+        counts[stage] = counts.get(stage, 0) + 1
+        SYNC_ERRORS.labels(stage).inc()
+        self.failed_messages.add(item['message_id'])
+
+    def _timing(self, key, seconds):
+        timings = self.results.setdefault('timings', {})
+        timings[key] = round(timings.get(key, 0.0) + seconds, 4)
+
+    def _save(self, item, transactions):
+        card = card_hint(item['subject'], item['filename'])
+        for txn in transactions:
+            txn['message_id'] = item['message_id']
+            txn['card'] = card
+            txn['account'] = self.account
+        with PIPELINE_STEP_SECONDS.labels('categorize').time():
+            started = time.perf_counter()
+            self.categorizer.apply(transactions)
+            self._timing('categorize_seconds', time.perf_counter() - started)
+        self.results['transactions_parsed'] += len(transactions)
+        with PIPELINE_STEP_SECONDS.labels('store').time():
+            started = time.perf_counter()
+            self.results['new_transactions'] += upsert_transactions(
+                transactions, stats=self._duplicate_stats)
+            self._timing('store_seconds', time.perf_counter() - started)
+        self.results['duplicates_skipped'] = self._duplicate_stats['duplicates']
+        self.results['near_duplicates_skipped'] = self._duplicate_stats['near_duplicates']
+
+    def _store(self, futures):
+        for future in futures:
+            item, content_hash = self._parsing.pop(future)
+            try:
+                transactions = future.result()
+            except PdfPasswordError as e:
+                logger.error(f"Could not decrypt attachment {item['filename']}: {e}")
+                self._fail(item, f"PDF processing error: {str(e)}", 'decrypt')
+                transactions = None
+            except Exception as e:
+                logger.error(f"Error parsing attachment {item['filename']}: {e}")
+                self._fail(item, f"PDF processing error: {str(e)}", 'parse')
+                transactions = None
+
+            if transactions is not None:
+                try:
+                    PDF_TRANSACTIONS.labels(item['bank'] or 'unknown').observe(len(transactions))
+                    if transactions:
+                        self._save(item, transactions)
+                    self.ledger.record_attachment(item['message_id'], item['attachment_id'],
+                                                  item['filename'], content_hash)
+                    logger.info(f"Extracted {len(transactions)} transactions from {item['filename']}")
+                except Exception as e:
+                    logger.error(f"Error storing attachment {item['filename']}: {e}")
+                    self._fail(item, f"PDF processing error: {str(e)}", 'store')
+            self.report('parsing')
+            self._attachment_done(item['message_id'])
+
+    def handle(self, item):
+        """Take one item from ``iter_attachments()``"""
+        message_id = item['message_id']
+        if item['filename'] is None:
+            if item.get('error'):
+                self._fail(item, item['error'], 'email')
+                self._message_done(message_id)
+            else:
+                self.results['emails_processed'] += 1
+                if item['bank'] not in self.results['banks_processed']:
+                    self.results['banks_processed'].append(item['bank'])
+                self._remaining[message_id] = item.get('attachments', 0)
+                if not self._remaining[message_id]:
+                    self._message_done(message_id)
+            self.report('downloading')
+            return
+
+        if item.get('error'):
+            self._fail(item, item['error'], 'download')
+            self.report('downloading')
+            self._attachment_done(message_id)
+            return
+
+        self.results['pdfs_downloaded'] += 1
+        PDF_BYTES.labels(item['bank'] or 'unknown').observe(item['size'])
+        content_hash = item['sha256']
+        if self.ledger.has_content(content_hash) or content_hash in self._queued_hashes:
+            # Same statement already arrived through another email
+            logger.info(f"Skipping already processed PDF: {item['filename']}")
+            self.results['pdfs_skipped'] += 1
+            self._attachment_done(message_id)
+            return
+
+        logger.info(f"Processing PDF: {item['filename']}")
+        self._queued_hashes.add(content_hash)
+        card = card_hint(item['subject'], item['filename'])
+        passwords = self.passwords
+        # Workers open the downloaded file themselves; no PDF bytes cross processes
+        future = submit_parse(
+            item['path'], item['bank'], item['filename'],
+            content_hash=content_hash,
+            password_resolver=lambda: passwords.resolve(item['path'], item['bank'], card),
+            stats=self._parse_stats
+        )
+        self._parsing[future] = (item, content_hash)
+
+        # Bound the statements queued on the pool while it catches up
+        if len(self._parsing) >= self.max_in_flight:
+            self._store(wait(self._parsing, return_when=FIRST_COMPLETED).done)
+        else:
+            self._store([f for f in self._parsing if f.done()])
+
+    def drain(self):
+        """Wait for every queued parse and store the results"""
+        if self._parsing:
+            self._store(wait(self._parsing).done)
+        self.results['parse_cache_hits'] = self._parse_stats.get('cache_hits', 0)
+        for key in ('decrypt_seconds', 'parse_seconds'):
+            if key in self._parse_stats:
+                self._timing(key, self._parse_stats.pop(key))
+
+    def process(self, items):
+        for item in items:
+            self.handle(item)
+        self.drain()
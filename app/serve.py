@@ -0,0 +1,66 @@
+# Production server: gunicorn web workers plus one sync service process
+#
+#   python -m app.serve
+#
+# Starts app.sync_service (sync jobs, the periodic schedule, Gmail checks)
+# and gunicorn with the settings in app.wsgi side by side, and supervises
+# both: SIGTERM/SIGINT stop both, and if either exits on its own the other
+# is stopped too and the exit status is non-zero, so the container's
+# restart policy brings them back together. This process imports nothing
+# from the app, to stay small.
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Seconds each process gets to stop before it is killed
+STOP_TIMEOUT = 8
+
+COMMANDS = {
+    'sync service': [sys.executable, '-m', 'app.sync_service'],
+    'web server': [sys.executable, '-m', 'gunicorn', '--config', 'python:app.wsgi',
+                   'app.wsgi:create_web_app()'],
+}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    env = dict(os.environ)
+    if not env.get('SYNC_SERVICE_AUTHKEY') and not env.get('SECRET_KEY'):
+        # A key of our own, known only to the processes started here
+        env['SYNC_SERVICE_AUTHKEY'] = secrets.token_hex(32)
+    processes = {name: subprocess.Popen(command, env=env) for name, command in COMMANDS.items()}
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for process in processes.values():
+            if process.returncode is None:
+                process.send_signal(signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    pid, status = os.wait()
+    exited = next(name for name, process in processes.items() if process.pid == pid)
+    processes[exited].returncode = os.waitstatus_to_exitcode(status)
+    if not stopping:
+        logger.error(f"The {exited} exited with status {processes[exited].returncode}; stopping")
+        stop(None, None)
+
+    for name, process in processes.items():
+        try:
+            process.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"The {name} did not stop in time; killing it")
+            process.kill()
+            process.wait()
+    return 0 if stopping and stopping[0] is not None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
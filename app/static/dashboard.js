@@ -0,0 +1,174 @@
+// Dashboard: statement sync with live progress, and charts from /api/dashboard
+
+const STAGE_LABELS = {
+    queued: 'Waiting for sync worker...',
+    starting: 'Starting sync...',
+    connecting: 'Connecting to Gmail...',
+    searching: 'Searching for statements...',
+    downloading: 'Downloading statements...',
+    parsing: 'Parsing statements...'
+};
+
+const RUPEES = new Intl.NumberFormat('en-IN', { style: 'currency', currency: 'INR' });
+
+function resetSyncButton() {
+    const btn = document.getElementById('sync-btn');
+    btn.disabled = false;
+    btn.innerHTML = '<i class="fas fa-sync me-2"></i>Sync Credit Card Statements';
+}
+
+function showSyncProgress(job) {
+    const progressBar = document.querySelector('#sync-progress .progress-bar');
+    const details = document.getElementById('sync-details');
+    const counts = job.progress || {};
+    let percent = 5;
+    if (job.stage === 'searching') {
+        percent = 10;
+    } else if (job.stage === 'downloading' || job.stage === 'parsing') {
+        const found = counts.emails_found || 0;
+        percent = found ? 15 + Math.round(80 * (counts.emails_processed || 0) / found) : 15;
+    }
+    progressBar.style.width = percent + '%';
+    details.innerHTML = `${STAGE_LABELS[job.stage] || job.stage}
+        📧 ${counts.emails_processed || 0}/${counts.emails_found || 0} emails ·
+        📄 ${counts.pdfs_downloaded || 0} PDFs ·
+        💳 ${counts.transactions_parsed || 0} transactions`;
+}
+
+function showSyncResult(job) {
+    const progress = document.getElementById('sync-progress');
+    const progressBar = progress.querySelector('.progress-bar');
+    const status = document.getElementById('sync-status');
+    const details = document.getElementById('sync-details');
+    const data = job.result || {};
+    progressBar.style.width = '100%';
+
+    if (job.status === 'succeeded') {
+        status.innerHTML = `
+            <div class="alert alert-success">
+                <h6><i class="fas fa-check-circle me-2"></i>Sync Completed!</h6>
+                <ul class="mb-0">
+                    <li>📧 Emails found: ${data.emails_found}</li>
+                    <li>📄 PDFs processed: ${data.pdfs_downloaded}</li>
+                    <li>💳 Transactions parsed: ${data.transactions_parsed}</li>
+                    <li>🏦 Banks: ${(data.banks_processed || []).join(', ') || 'None'}</li>
+                </ul>
+            </div>
+        `;
+        details.innerHTML = 'Sync completed successfully!';
+
+        // Refresh page after 3 seconds
+        setTimeout(() => { window.location.reload(); }, 3000);
+    } else {
+        status.innerHTML = `
+            <div class="alert alert-danger">
+                <h6><i class="fas fa-exclamation-circle me-2"></i>Sync Failed</h6>
+                <p>${job.error || 'Unknown error occurred'}</p>
+            </div>
+        `;
+    }
+
+    resetSyncButton();
+    setTimeout(() => {
+        progress.style.display = 'none';
+        progressBar.style.width = '0%';
+    }, 5000);
+}
+
+function startSync() {
+    const btn = document.getElementById('sync-btn');
+    const progress = document.getElementById('sync-progress');
+    const status = document.getElementById('sync-status');
+
+    // Show progress
+    btn.disabled = true;
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Syncing...';
+    progress.style.display = 'block';
+
+    // Queue the sync, then follow its progress events
+    fetch('/sync', { method: 'POST' })
+        .then(response => response.json())
+        .then(job => {
+            if (!job.job_id) {
+                showSyncResult({ status: 'failed', error: job.error });
+                return;
+            }
+            showSyncProgress(job);
+            const events = new EventSource(`/sync/jobs/${job.job_id}/events`);
+            events.addEventListener('progress', e => showSyncProgress(JSON.parse(e.data)));
+            events.addEventListener('done', e => {
+                events.close();
+                showSyncResult(JSON.parse(e.data));
+            });
+        })
+        .catch(error => {
+            console.error('Sync error:', error);
+            status.innerHTML = `
+                <div class="alert alert-danger">
+                    <h6>Network Error</h6>
+                    <p>Please check your connection and try again.</p>
+                </div>
+            `;
+            resetSyncButton();
+        });
+}
+
+function rupeeTicks(value) {
+    return RUPEES.format(value).replace(/\.00$/, '');
+}
+
+function drawCharts(summary) {
+    new Chart(document.getElementById('chart-monthly'), {
+        data: {
+            labels: summary.months.map(m => m.month),
+            datasets: [
+                { type: 'bar', label: 'Spend', data: summary.months.map(m => m.spend) },
+                { type: 'bar', label: 'Credits', data: summary.months.map(m => m.credits) },
+                { type: 'line', label: 'Rolling average spend', data: summary.months.map(m => m.rolling_spend) }
+            ]
+        },
+        options: {
+            maintainAspectRatio: false,
+            scales: { y: { ticks: { callback: rupeeTicks } } }
+        }
+    });
+
+    new Chart(document.getElementById('chart-categories'), {
+        type: 'doughnut',
+        data: {
+            labels: summary.categories.map(c => c.category),
+            datasets: [{ data: summary.categories.map(c => c.spend) }]
+        },
+        options: { maintainAspectRatio: false, plugins: { legend: { position: 'right' } } }
+    });
+
+    new Chart(document.getElementById('chart-merchants'), {
+        type: 'bar',
+        data: {
+            labels: summary.merchants.map(m => m.merchant),
+            datasets: [{ label: 'Spend', data: summary.merchants.map(m => m.spend) }]
+        },
+        options: {
+            indexAxis: 'y',
+            maintainAspectRatio: false,
+            plugins: { legend: { display: false } },
+            scales: { x: { ticks: { callback: rupeeTicks } } }
+        }
+    });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const btn = document.getElementById('sync-btn');
+    if (!btn.disabled) {
+        btn.addEventListener('click', startSync);
+    }
+
+    // Chart.js comes from a CDN; the rest of the page works without it
+    if (typeof Chart === 'undefined') {
+        return;
+    }
+    fetch('/api/dashboard')
+        .then(response => response.json())
+        .then(drawCharts)
+        .catch(error => console.error('Chart data error:', error));
+});
@@ -0,0 +1,13 @@
+# SQLite-backed storage for parsed transactions
+from app.storage.db import DEFAULT_ACCOUNT, get_engine, init_db
+from app.storage.rollups import check_rollups, rebuild_rollups, rollup_totals, top_merchants
+from app.storage.transactions import (
+    SELECTABLE_FIELDS,
+    count_transactions,
+    data_version,
+    import_json_file,
+    iter_transactions,
+    list_transactions,
+    page_transactions,
+    upsert_transactions,
+)
@@ -0,0 +1,127 @@
+# Category overrides and re-categorization of stored transactions
+import logging
+
+from sqlalchemy import bindparam, delete, distinct, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.storage.db import category_overrides, get_engine, store_meta, transactions
+from app.storage.rollups import rebuild_rollups, refresh_buckets
+from app.storage.transactions import _bump_version
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 1000
+
+# store_meta counter bumped on every override change, so other processes reload theirs
+OVERRIDES_VERSION_KEY = 'category_overrides_version'
+
+
+def load_overrides(engine=None):
+    """All user overrides as ``{merchant: category}``"""
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        return {row.merchant: row.category for row in conn.execute(select(category_overrides))}
+
+
+def overrides_version(engine=None):
+    """Counter that changes whenever an override is saved or deleted"""
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        return conn.scalar(select(store_meta.c.value)
+                           .where(store_meta.c.key == OVERRIDES_VERSION_KEY)) or 0
+
+
+def _merchant_buckets(conn, merchant):
+    month = func.substr(transactions.c.date, 1, 7)
+    stmt = select(distinct(month), transactions.c.account, transactions.c.bank).where(
+        transactions.c.merchant == merchant)
+    return {(row[0], row[1], row[2]) for row in conn.execute(stmt)}
+
+
+def save_override(merchant, category, engine=None):
+    """Store an override and re-categorize that merchant's transactions.
+
+    Returns the number of stored transactions that were updated.
+    """
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        stmt = sqlite_insert(category_overrides).values(merchant=merchant, category=category)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['merchant'],
+            set_={'category': stmt.excluded.category, 'updated_at': func.current_timestamp()}
+        )
+        conn.execute(stmt)
+        _bump_version(conn, OVERRIDES_VERSION_KEY)
+        updated = conn.execute(update(transactions)
+                               .where(transactions.c.merchant == merchant)
+                               .values(category=category)).rowcount
+        if updated:
+            refresh_buckets(conn, _merchant_buckets(conn, merchant))
+            _bump_version(conn)
+    logger.info(f"Category override {merchant} -> {category} ({updated} transactions)")
+    return updated
+
+
+def delete_override(merchant, categorize, engine=None):
+    """Drop an override and re-categorize that merchant's transactions.
+
+    ``categorize(description)`` gives the rule-based category. Returns
+    False if there was no override.
+    """
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        deleted = conn.execute(delete(category_overrides)
+                               .where(category_overrides.c.merchant == merchant)).rowcount
+        if not deleted:
+            return False
+        _bump_version(conn, OVERRIDES_VERSION_KEY)
+        descriptions = conn.scalars(select(distinct(transactions.c.description))
+                                    .where(transactions.c.merchant == merchant)).all()
+        for description in descriptions:
+            conn.execute(update(transactions)
+                         .where(transactions.c.merchant == merchant,
+                                transactions.c.description == description)
+                         .values(category=categorize(description)))
+        if descriptions:
+            refresh_buckets(conn, _merchant_buckets(conn, merchant))
+            _bump_version(conn)
+    logger.info(f"Removed category override for {merchant}")
+    return True
+
+
+def recategorize_transactions(categorize_batch, engine=None, only_uncategorized=False):
+    """Re-run categorization over stored transactions in id-ordered batches.
+
+    ``categorize_batch(descriptions)`` returns ``(category, merchant)``
+    pairs. Rollups are rebuilt afterwards. Returns the number of changed rows.
+    """
+    engine = engine or get_engine()
+    changed = 0
+    last_id = 0
+    stmt = select(transactions.c.id, transactions.c.description,
+                  transactions.c.category, transactions.c.merchant)
+    if only_uncategorized:
+        stmt = stmt.where(func.coalesce(transactions.c.category, 'Uncategorized') == 'Uncategorized')
+    with engine.begin() as conn:
+        while True:
+            rows = conn.execute(stmt.where(transactions.c.id > last_id)
+                                .order_by(transactions.c.id).limit(UPDATE_BATCH_SIZE)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            results = categorize_batch([row.description for row in rows])
+            updates = [{'row_id': row.id, 'category': category, 'merchant': merchant}
+                       for row, (category, merchant) in zip(rows, results)
+                       if (row.category, row.merchant) != (category, merchant)]
+            if updates:
+                conn.execute(update(transactions)
+                             .where(transactions.c.id == bindparam('row_id'))
+                             .values(category=bindparam('category'),
+                                     merchant=bindparam('merchant')), updates)
+                changed += len(updates)
+        if changed:
+            _bump_version(conn)
+    if changed:
+        rebuild_rollups(engine)
+    logger.info(f"Re-categorized {changed} transactions")
+    return changed
@@ -0,0 +1,156 @@
+# Database engine, schema and migrations
+import logging
+import os
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    create_engine,
+    event,
+    func,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = 'sqlite:///data/credit_cards.db'
+
+# Account that owns data synced before multi-account support
+DEFAULT_ACCOUNT = 'default'
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+metadata = MetaData()
+
+transactions = Table(
+    'transactions', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('dedupe_key', String(64), nullable=False),
+    Column('date', String(10), nullable=False),
+    Column('description', Text, nullable=False),
+    Column('amount', Float, nullable=False),
+    Column('category', String(64)),
+    Column('bank', String(32), nullable=False),
+    Column('transaction_type', String(16)),
+    Column('filename', Text),
+    Column('message_id', String(64)),
+    Column('created_at', DateTime, nullable=False, server_default=func.current_timestamp()),
+    Column('merchant', String(64)),
+    Column('card', String(4)),
+    # Statement-independent identity, for catching the same charge in two statements
+    Column('fingerprint', String(64)),
+    Column('near_key', String(64)),
+    # Gmail account the statement was synced from
+    Column('account', String(64), nullable=False, server_default=DEFAULT_ACCOUNT),
+    UniqueConstraint('dedupe_key', name='uq_transactions_dedupe_key'),
+    Index('ix_transactions_bank_date', 'bank', 'date'),
+    Index('ix_transactions_date', 'date'),
+    Index('ix_transactions_category', 'category'),
+    Index('ix_transactions_merchant', 'merchant'),
+    Index('ix_transactions_fingerprint', 'fingerprint'),
+    Index('ix_transactions_near_key_date', 'near_key', 'date'),
+    Index('ix_transactions_account_date', 'account', 'date'),
+)
+
+# Categories the user picked for a merchant key; they beat every rule
+category_overrides = Table(
+    'category_overrides', metadata,
+    Column('merchant', String(64), primary_key=True),
+    Column('category', String(64), nullable=False),
+    Column('updated_at', DateTime, nullable=False, server_default=func.current_timestamp()),
+)
+
+# Counters bumped by writers so readers can cheaply tell whether data changed
+store_meta = Table(
+    'store_meta', metadata,
+    Column('key', String(64), primary_key=True),
+    Column('value', Integer, nullable=False, server_default='0'),
+)
+
+# Pre-aggregated totals per (month, account, bank, category), maintained on ingest
+spending_rollups = Table(
+    'spending_rollups', metadata,
+    Column('month', String(7), primary_key=True),
+    Column('account', String(64), primary_key=True),
+    Column('bank', String(32), primary_key=True),
+    Column('category', String(64), primary_key=True),
+    Column('transactions', Integer, nullable=False),
+    Column('spend', Float, nullable=False),
+    Column('credits', Float, nullable=False),
+)
+
+# Spending per (month, account, bank, merchant), maintained alongside spending_rollups
+merchant_rollups = Table(
+    'merchant_rollups', metadata,
+    Column('month', String(7), primary_key=True),
+    Column('account', String(64), primary_key=True),
+    Column('bank', String(32), primary_key=True),
+    Column('merchant', String(64), primary_key=True),
+    Column('transactions', Integer, nullable=False),
+    Column('spend', Float, nullable=False),
+)
+
+_engine = None
+
+
+def database_url():
+    return os.getenv('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets dashboard reads proceed while a sync is writing
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def create_db_engine(url=None):
+    """Create an engine; SQLite connections get WAL and a busy timeout"""
+    url = url or database_url()
+    if url.startswith('sqlite:///') and not url.startswith('sqlite:///:memory:'):
+        directory = os.path.dirname(url[len('sqlite:///'):])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    engine = create_engine(url, future=True)
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _configure_sqlite)
+    return engine
+
+
+def get_engine():
+    """Process-wide engine for DATABASE_URL"""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+    return _engine
+
+
+def alembic_config(url=None):
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(PROJECT_ROOT, 'migrations'))
+    config.set_main_option('sqlalchemy.url', url or database_url())
+    return config
+
+
+def init_db(engine=None):
+    """Bring the schema up to date by running pending migrations"""
+    from alembic import command
+
+    engine = engine or get_engine()
+    config = alembic_config(engine.url.render_as_string(hide_password=False))
+    with engine.begin() as connection:
+        config.attributes['connection'] = connection
+        command.upgrade(config, 'head')
+    return engine
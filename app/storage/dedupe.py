@@ -0,0 +1,139 @@
+# Cross-statement duplicate detection for incoming transactions
+import hashlib
+import logging
+from datetime import date as date_type, timedelta
+
+from sqlalchemy import select
+
+from app.categorize.normalize import normalize_description
+from app.storage.db import transactions
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# How far apart two statements may date the same charge
+NEAR_DUPLICATE_DAYS = 1
+
+
+def _digest(*parts):
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def near_key(txn, occurrence=0):
+    """Fingerprint without the date, shared by a charge and its date-shifted copies"""
+    return _digest(
+        txn.get('bank') or '',
+        txn.get('card') or '',
+        normalize_description(txn.get('description', '')),
+        f"{float(txn.get('amount', 0)):.2f}",
+        occurrence
+    )
+
+
+def fingerprint(txn, occurrence=0):
+    """Statement-independent identity of a charge.
+
+    Unlike the dedupe key it ignores which file the row came from, so the
+    same charge in a re-sent or overlapping statement gets the same value.
+    ``occurrence`` separates identical charges on the same day.
+    """
+    return _digest(near_key(txn, occurrence), txn.get('date') or '')
+
+
+def assign_fingerprints(rows):
+    """Set ``fingerprint`` and ``near_key`` on rows from one statement"""
+    seen = {}
+    for row in rows:
+        base = near_key(row)
+        slot = (base, row.get('date'))
+        occurrence = seen.get(slot, 0)
+        seen[slot] = occurrence + 1
+        row['near_key'] = base if occurrence == 0 else near_key(row, occurrence)
+        row['fingerprint'] = fingerprint(row, occurrence)
+    return rows
+
+
+def _neighbours(value):
+    try:
+        day = date_type.fromisoformat(value)
+    except (TypeError, ValueError):
+        return ()
+    step = timedelta(days=NEAR_DUPLICATE_DAYS)
+    return ((day - step).isoformat(), (day + step).isoformat())
+
+
+def _shift(value, days):
+    try:
+        return (date_type.fromisoformat(value) + timedelta(days=days)).isoformat()
+    except ValueError:
+        return value
+
+
+def find_duplicates(conn, rows):
+    """Indexes of ``rows`` that are already stored under another statement.
+
+    Exact duplicates share a fingerprint with a stored row that has a
+    different dedupe key. Near duplicates share a near key with a stored
+    row from another file dated up to a day apart, including a day either
+    side of the span this batch covers (a charge posted on the last day of
+    one statement and the first of the next), when the batch has no row of
+    its own on that date.
+    Only rows of the same account count. Every lookup goes through an
+    index, so the cost is constant per row. Returns ``(exact, near)`` sets of row indexes.
+    """
+    exact, near = set(), set()
+    if not rows:
+        return exact, near
+
+    for start in range(0, len(rows), LOOKUP_CHUNK_SIZE):
+        chunk = rows[start:start + LOOKUP_CHUNK_SIZE]
+        stored = {}
+        for found, account, dedupe_key in conn.execute(
+                select(transactions.c.fingerprint, transactions.c.account, transactions.c.dedupe_key)
+                .where(transactions.c.fingerprint.in_([row['fingerprint'] for row in chunk]))):
+            stored.setdefault((found, account), set()).add(dedupe_key)
+        for offset, row in enumerate(chunk):
+            keys = stored.get((row['fingerprint'], row['account']))
+            if keys and row['dedupe_key'] not in keys:
+                exact.add(start + offset)
+
+    dates = sorted(row['date'] for row in rows if row.get('date'))
+    if not dates:
+        return exact, near
+    first = _shift(dates[0], -NEAR_DUPLICATE_DAYS)
+    last = _shift(dates[-1], NEAR_DUPLICATE_DAYS)
+    batch_slots = {(row['near_key'], row['date']) for row in rows}
+    candidates = [index for index in range(len(rows)) if index not in exact]
+    claimed = set()
+
+    for start in range(0, len(candidates), LOOKUP_CHUNK_SIZE):
+        chunk = candidates[start:start + LOOKUP_CHUNK_SIZE]
+        by_key = {}
+        stmt = select(transactions.c.id, transactions.c.near_key, transactions.c.date,
+                      transactions.c.filename, transactions.c.dedupe_key,
+                      transactions.c.account).where(
+            transactions.c.near_key.in_({rows[index]['near_key'] for index in chunk}),
+            transactions.c.date >= first,
+            transactions.c.date <= last
+        )
+        for found in conn.execute(stmt):
+            by_key.setdefault(found.near_key, []).append(found)
+
+        for index in chunk:
+            row = rows[index]
+            for found in by_key.get(row['near_key'], ()):
+                if found.id in claimed or found.dedupe_key == row['dedupe_key'] \
+                        or found.account != row['account'] \
+                        or found.filename == row.get('filename') \
+                        or (row['near_key'], found.date) in batch_slots:
+                    continue
+                if found.date in _neighbours(row['date']):
+                    claimed.add(found.id)
+                    near.add(index)
+                    break
+
+    if exact or near:
+        logger.info(f"Skipping {len(exact)} duplicate and {len(near)} near-duplicate transactions")
+    return exact, near
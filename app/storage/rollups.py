@@ -0,0 +1,211 @@
+# Month/account/bank/category and merchant rollups kept in step with the transactions table
+import argparse
+import logging
+
+from sqlalchemy import case, delete, func, literal, select
+
+from app.storage.db import (
+    DEFAULT_ACCOUNT,
+    get_engine,
+    init_db,
+    merchant_rollups,
+    spending_rollups,
+    transactions,
+)
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('month', 'account', 'bank', 'category')
+MERCHANT_DIMENSIONS = ('month', 'account', 'bank', 'merchant')
+
+UNCATEGORIZED = 'Uncategorized'
+
+_month = func.substr(transactions.c.date, 1, 7)
+_merchant = func.coalesce(transactions.c.merchant, func.upper(transactions.c.description))
+
+SPENDING_COLUMNS = ['month', 'account', 'bank', 'category', 'transactions', 'spend', 'credits']
+MERCHANT_COLUMNS = ['month', 'account', 'bank', 'merchant', 'transactions', 'spend']
+
+
+def _aggregate(*conditions):
+    """SELECT producing rollup rows from raw transactions"""
+    category = func.coalesce(transactions.c.category, literal(UNCATEGORIZED))
+    stmt = select(
+        _month.label('month'),
+        transactions.c.account,
+        transactions.c.bank,
+        category.label('category'),
+        func.count().label('transactions'),
+        func.coalesce(func.sum(case((transactions.c.amount < 0, -transactions.c.amount), else_=0.0)), 0.0)
+        .label('spend'),
+        func.coalesce(func.sum(case((transactions.c.amount > 0, transactions.c.amount), else_=0.0)), 0.0)
+        .label('credits'),
+    )
+    if conditions:
+        stmt = stmt.where(*conditions)
+    return stmt.group_by(_month, transactions.c.account, transactions.c.bank, category)
+
+
+def _aggregate_merchants(*conditions):
+    """SELECT producing merchant rollup rows (debits only) from raw transactions"""
+    stmt = select(
+        _month.label('month'),
+        transactions.c.account,
+        transactions.c.bank,
+        _merchant.label('merchant'),
+        func.count().label('transactions'),
+        func.sum(-transactions.c.amount).label('spend'),
+    ).where(transactions.c.amount < 0, *conditions)
+    return stmt.group_by(_month, transactions.c.account, transactions.c.bank, _merchant)
+
+
+def affected_buckets(rows):
+    """``(month, account, bank)`` triples touched by a batch of transaction rows"""
+    return {(str(row['date'])[:7], row.get('account') or DEFAULT_ACCOUNT, row['bank'])
+            for row in rows if row.get('date') and row.get('bank')}
+
+
+def refresh_buckets(conn, buckets):
+    """Recompute the rollups for the given ``(month, account, bank)`` triples.
+
+    Runs inside the caller's transaction and refreshes the merchant
+    rollups of the same buckets too. Each bank's rows are read through the
+    (bank, date) index, limited to the date span of its touched months.
+    """
+    by_bank = {}
+    for month, account, bank in buckets:
+        by_bank.setdefault((account, bank), set()).add(month)
+
+    for (account, bank), months in by_bank.items():
+        months = sorted(months)
+        conditions = (
+            transactions.c.account == account,
+            transactions.c.bank == bank,
+            transactions.c.date >= f"{months[0]}-01",
+            transactions.c.date <= f"{months[-1]}-31",
+            _month.in_(months)
+        )
+        for table, columns, aggregate in ((spending_rollups, SPENDING_COLUMNS, _aggregate),
+                                          (merchant_rollups, MERCHANT_COLUMNS, _aggregate_merchants)):
+            conn.execute(delete(table).where(
+                table.c.account == account, table.c.bank == bank, table.c.month.in_(months)))
+            conn.execute(table.insert().from_select(columns, aggregate(*conditions)))
+    return len(buckets)
+
+
+def rebuild_rollups(engine=None):
+    """Throw away all rollups and recompute them from every transaction"""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.execute(delete(spending_rollups))
+        conn.execute(spending_rollups.insert().from_select(SPENDING_COLUMNS, _aggregate()))
+        conn.execute(delete(merchant_rollups))
+        conn.execute(merchant_rollups.insert().from_select(MERCHANT_COLUMNS, _aggregate_merchants()))
+        count = conn.scalar(select(func.count()).select_from(spending_rollups))
+    logger.info(f"Rebuilt {count} spending rollup buckets")
+    return count
+
+
+def check_rollups(engine=None, tolerance=0.005):
+    """Compare stored spending and merchant rollups with a fresh aggregation.
+
+    Returns a list of ``{'bucket', 'stored', 'expected'}`` mismatches.
+    """
+    engine = engine or get_engine()
+    mismatches = []
+    for table, dimensions, aggregate in ((spending_rollups, DIMENSIONS, _aggregate),
+                                         (merchant_rollups, MERCHANT_DIMENSIONS, _aggregate_merchants)):
+        measures = [name for name in ('transactions', 'spend', 'credits') if name in table.c]
+        with engine.connect() as conn:
+            stored = {tuple(row._mapping[d] for d in dimensions): row._mapping
+                      for row in conn.execute(select(table))}
+            expected = {tuple(row._mapping[d] for d in dimensions): row._mapping
+                        for row in conn.execute(aggregate())}
+
+        def values(row):
+            return None if row is None else {name: round(row[name], 2) for name in measures}
+
+        for bucket in sorted(set(stored) | set(expected)):
+            have, want = stored.get(bucket), expected.get(bucket)
+            if have is not None and want is not None \
+                    and all(abs(have[name] - want[name]) <= tolerance for name in measures):
+                continue
+            mismatches.append({'bucket': dict(zip(dimensions, bucket)),
+                               'stored': values(have), 'expected': values(want)})
+    return mismatches
+
+
+def rollup_totals(group_by=(), engine=None, order_by=None, limit=None, **filters):
+    """Totals from the rollup table, grouped by any of ``DIMENSIONS``.
+
+    Filters: ``account``, ``bank``, ``category``, ``month_from`` and ``month_to``
+    (``YYYY-MM``). Cost depends on the number of buckets, not transactions.
+    """
+    for dimension in group_by:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Cannot group rollups by {dimension}")
+    engine = engine or get_engine()
+    keys = [spending_rollups.c[dimension] for dimension in group_by]
+    stmt = select(
+        *keys,
+        func.coalesce(func.sum(spending_rollups.c.transactions), 0).label('transactions'),
+        func.coalesce(func.sum(spending_rollups.c.spend), 0.0).label('spend'),
+        func.coalesce(func.sum(spending_rollups.c.credits), 0.0).label('credits'),
+    )
+    if filters.get('account'):
+        stmt = stmt.where(spending_rollups.c.account == filters['account'])
+    if filters.get('bank'):
+        stmt = stmt.where(spending_rollups.c.bank == filters['bank'])
+    if filters.get('category'):
+        stmt = stmt.where(spending_rollups.c.category == filters['category'])
+    if filters.get('month_from'):
+        stmt = stmt.where(spending_rollups.c.month >= filters['month_from'])
+    if filters.get('month_to'):
+        stmt = stmt.where(spending_rollups.c.month <= filters['month_to'])
+    if keys:
+        stmt = stmt.group_by(*keys)
+    if order_by == 'spend':
+        stmt = stmt.order_by(func.sum(spending_rollups.c.spend).desc())
+    elif keys:
+        stmt = stmt.order_by(*keys)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    with engine.connect() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(stmt)]
+    for row in rows:
+        row['spend'] = round(row['spend'], 2)
+        row['credits'] = round(row['credits'], 2)
+    return rows
+
+
+def top_merchants(engine=None, limit=10, account=None):
+    """Merchants by total spend, from the merchant rollups"""
+    engine = engine or get_engine()
+    spend = func.sum(merchant_rollups.c.spend)
+    stmt = select(merchant_rollups.c.merchant,
+                  func.sum(merchant_rollups.c.transactions).label('transactions'),
+                  spend.label('spend'))
+    if account:
+        stmt = stmt.where(merchant_rollups.c.account == account)
+    stmt = stmt.group_by(merchant_rollups.c.merchant).order_by(spend.desc()).limit(limit)
+    with engine.connect() as conn:
+        return [{'merchant': row.merchant, 'transactions': row.transactions,
+                 'spend': round(row.spend, 2)} for row in conn.execute(stmt)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the spending rollup table')
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    if args.command == 'rebuild':
+        print(f"Rebuilt {rebuild_rollups()} buckets")
+    else:
+        problems = check_rollups()
+        for problem in problems:
+            print(problem)
+        print(f"{len(problems)} mismatched buckets")
+        raise SystemExit(1 if problems else 0)
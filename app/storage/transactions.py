@@ -0,0 +1,229 @@
+# Transaction ingestion and queries
+import hashlib
+import json
+import logging
+import os
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.categorize.normalize import merchant_key
+from app.storage.db import DEFAULT_ACCOUNT, get_engine, store_meta, transactions
+from app.storage.dedupe import assign_fingerprints, find_duplicates
+from app.storage.rollups import affected_buckets, refresh_buckets
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('date', 'description', 'amount', 'category', 'bank',
+           'transaction_type', 'filename', 'message_id', 'merchant', 'card', 'account')
+
+SELECTABLE_FIELDS = ('id',) + COLUMNS
+
+NEWEST_FIRST = (transactions.c.date.desc(), transactions.c.id.desc())
+
+# Fields refreshed when a statement is ingested again
+UPDATABLE_COLUMNS = ('category', 'transaction_type', 'merchant', 'card',
+                     'fingerprint', 'near_key')
+
+INSERT_CHUNK_SIZE = 500
+
+VERSION_KEY = 'transactions_version'
+
+
+def make_dedupe_key(txn, occurrence=0):
+    """Stable key for a statement row.
+
+    ``occurrence`` separates genuinely repeated rows in one statement
+    (e.g. two identical coffees on the same day). Rows of accounts other
+    than the default one include the account, so the same statement in two
+    mailboxes is stored once per account.
+    """
+    parts = [
+        str(txn.get('bank', '')),
+        str(txn.get('filename', '')),
+        str(txn.get('date', '')),
+        ' '.join(str(txn.get('description', '')).upper().split()),
+        f"{float(txn.get('amount', 0)):.2f}",
+        str(occurrence)
+    ]
+    account = txn.get('account') or DEFAULT_ACCOUNT
+    if account != DEFAULT_ACCOUNT:
+        parts.append(account)
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def _rows_with_keys(txns):
+    seen = {}
+    rows = []
+    for txn in txns:
+        row = {column: txn.get(column) for column in COLUMNS}
+        row['merchant'] = row['merchant'] or merchant_key(row['description'])
+        row['account'] = row['account'] or DEFAULT_ACCOUNT
+        base = make_dedupe_key(txn)
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        row['dedupe_key'] = base if occurrence == 0 else make_dedupe_key(txn, occurrence)
+        rows.append(row)
+    return assign_fingerprints(rows)
+
+
+def upsert_transactions(txns, engine=None, stats=None):
+    """Insert new transactions and refresh existing ones.
+
+    ``txns`` should come from a single statement. Rows that another
+    statement already stored are skipped; pass a ``stats`` dict to have
+    ``duplicates`` and ``near_duplicates`` counted into it. Returns the
+    number of rows that were not already stored.
+    """
+    rows = _rows_with_keys(txns)
+    if not rows:
+        return 0
+
+    engine = engine or get_engine()
+    inserted = 0
+    with engine.begin() as conn:
+        exact, near = find_duplicates(conn, rows)
+        if stats is not None:
+            stats['duplicates'] = stats.get('duplicates', 0) + len(exact)
+            stats['near_duplicates'] = stats.get('near_duplicates', 0) + len(near)
+        if exact or near:
+            rows = [row for index, row in enumerate(rows) if index not in exact and index not in near]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + INSERT_CHUNK_SIZE]
+            keys = [row['dedupe_key'] for row in chunk]
+            existing = set(conn.scalars(
+                select(transactions.c.dedupe_key).where(transactions.c.dedupe_key.in_(keys))
+            ))
+            stmt = sqlite_insert(transactions)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['dedupe_key'],
+                set_={column: stmt.excluded[column] for column in UPDATABLE_COLUMNS}
+            )
+            conn.execute(stmt, chunk)
+            inserted += len(set(keys) - existing)
+        # Only the month/bank buckets this batch touched are recomputed
+        refresh_buckets(conn, affected_buckets(rows))
+        _bump_version(conn)
+    return inserted
+
+
+def _bump_version(conn, key=VERSION_KEY):
+    stmt = sqlite_insert(store_meta).values(key=key, value=1)
+    stmt = stmt.on_conflict_do_update(index_elements=['key'],
+                                      set_={'value': store_meta.c.value + 1})
+    conn.execute(stmt)
+
+
+def data_version(engine=None):
+    """Counter that changes whenever stored transactions change"""
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        return conn.scalar(select(store_meta.c.value).where(store_meta.c.key == VERSION_KEY)) or 0
+
+
+def count_transactions(engine=None, **filters):
+    """Count stored transactions matching ``filters``"""
+    engine = engine or get_engine()
+    stmt = _apply_filters(select(func.count()).select_from(transactions), filters)
+    with engine.connect() as conn:
+        return conn.scalar(stmt)
+
+
+def list_transactions(engine=None, limit=None, **filters):
+    """Stored transactions as dicts, newest first"""
+    engine = engine or get_engine()
+    stmt = select(*[transactions.c[column] for column in COLUMNS])
+    stmt = _apply_filters(stmt, filters).order_by(*NEWEST_FIRST)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(stmt)]
+
+
+def page_transactions(limit, after=None, fields=None, engine=None, **filters):
+    """One keyset page of transactions, newest first.
+
+    ``after`` is the ``(date, id)`` of the last row of the previous page.
+    Returns ``(rows, next_key)``; ``next_key`` is None on the last page.
+    """
+    engine = engine or get_engine()
+    fields = list(fields or COLUMNS)
+    stmt = select(transactions.c.id, *[transactions.c[f] for f in fields if f != 'id'])
+    stmt = _apply_filters(stmt, filters)
+    if after is not None:
+        after_date, after_id = after
+        stmt = stmt.where(or_(
+            transactions.c.date < after_date,
+            and_(transactions.c.date == after_date, transactions.c.id < after_id)
+        ))
+    # Fetch one extra row to learn whether another page exists
+    stmt = stmt.order_by(*NEWEST_FIRST).limit(limit + 1)
+    if 'date' not in fields:
+        stmt = stmt.add_columns(transactions.c.date.label('_date'))
+
+    with engine.connect() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(stmt)]
+
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_key = (last.get('date', last.get('_date')), last['id'])
+    for row in rows:
+        row.pop('_date', None)
+        if 'id' not in fields:
+            del row['id']
+    return rows, next_key
+
+
+def iter_transactions(fields=None, batch_size=1000, engine=None, **filters):
+    """Yield matching transactions one by one in bounded keyset batches"""
+    after = None
+    while True:
+        rows, after = page_transactions(batch_size, after=after, fields=fields,
+                                        engine=engine, **filters)
+        yield from rows
+        if after is None:
+            return
+
+
+def _apply_filters(stmt, filters):
+    if filters.get('account'):
+        stmt = stmt.where(transactions.c.account == filters['account'])
+    if filters.get('bank'):
+        stmt = stmt.where(transactions.c.bank == filters['bank'])
+    if filters.get('category'):
+        stmt = stmt.where(transactions.c.category == filters['category'])
+    if filters.get('date_from'):
+        stmt = stmt.where(transactions.c.date >= filters['date_from'])
+    if filters.get('date_to'):
+        stmt = stmt.where(transactions.c.date <= filters['date_to'])
+    # Debits are stored negative: amount bounds apply to the size of the charge
+    if filters.get('min_amount') is not None:
+        stmt = stmt.where(func.abs(transactions.c.amount) >= filters['min_amount'])
+    if filters.get('max_amount') is not None:
+        stmt = stmt.where(func.abs(transactions.c.amount) <= filters['max_amount'])
+    if filters.get('type') == 'debit':
+        stmt = stmt.where(transactions.c.amount < 0)
+    elif filters.get('type') == 'credit':
+        stmt = stmt.where(transactions.c.amount > 0)
+    if filters.get('search'):
+        stmt = stmt.where(transactions.c.description.ilike(
+            f"%{_escape_like(filters['search'])}%", escape='\\'))
+    return stmt
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def import_json_file(path, engine=None):
+    """Load a legacy transactions.json into the store, then rename it"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r') as f:
+        txns = json.load(f)
+    inserted = upsert_transactions(txns, engine=engine)
+    os.replace(path, f"{path}.imported")
+    logger.info(f"Imported {inserted} transactions from {path}")
+    return inserted
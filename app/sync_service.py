@@ -0,0 +1,272 @@
+# Sync service: one process that runs sync jobs, schedules and Gmail checks for the web workers
+#
+# Web workers (python -m app.serve) are separate processes, so they cannot
+# share an in-process SyncJobManager. The service owns the only one and
+# answers them over a local socket (multiprocessing.managers); jobs cross
+# it as plain dicts. Run it on its own with python -m app.sync_service, or
+# let app.serve start it.
+import copy
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.managers import BaseManager
+
+from app.metrics import HTTP_REQUEST_SECONDS, SYNC_JOBS, render
+from app.storage.db import DEFAULT_ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+# A Unix socket path; keep it off filesystems that cannot hold sockets (e.g. some Docker Desktop mounts)
+SYNC_SERVICE_ADDRESS = os.getenv('SYNC_SERVICE_ADDRESS', os.path.join('data', 'sync_service.sock'))
+# Shared secret between the service and web workers; defaults to SECRET_KEY. Connections
+# are unpickled, so there is no built-in default: app.serve generates one when neither is set
+SYNC_SERVICE_AUTHKEY = (os.getenv('SYNC_SERVICE_AUTHKEY')
+                        or os.getenv('SECRET_KEY') or '').encode() or None
+NO_AUTHKEY = "Set SYNC_SERVICE_AUTHKEY or SECRET_KEY, or start the service with python -m app.serve"
+# How often web workers hand their request latencies to the service
+HTTP_METRICS_PUSH_SECONDS = float(os.getenv('HTTP_METRICS_PUSH_SECONDS', 5))
+
+
+class SyncServiceUnavailable(RuntimeError):
+    """The sync service is not running, or stopped answering"""
+
+
+class SyncService:
+    """What the service exposes: a SyncJobManager's API, with jobs as dicts"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def ping(self):
+        return os.getpid()
+
+    def start(self, trigger, kind, account, options):
+        job, created = self.jobs.start(trigger=trigger, kind=kind, account=account, **options)
+        return job.to_dict(), created
+
+    def job(self, job_id):
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def latest(self, account=None):
+        job = self.jobs.latest(account)
+        return job.to_dict() if job is not None else None
+
+    def wait_for_change(self, job_id, seen_version, timeout):
+        job = self.jobs.get(job_id)
+        return job.wait_for_change(seen_version, timeout) if job is not None else None
+
+    def status(self):
+        return {'max_concurrent': self.jobs.max_concurrent, 'waiting': self.jobs.waiting}
+
+    def account_metrics(self):
+        return self.jobs.account_metrics()
+
+    def state_counts(self):
+        return self.jobs.state_counts()
+
+    def throttled_seconds(self, account=None):
+        return self.jobs.throttled_seconds(account)
+
+    def gmail_statuses(self):
+        from app.main import gmail_statuses
+
+        return gmail_statuses()
+
+    def observe_http(self, taken):
+        HTTP_REQUEST_SECONDS.merge(taken)
+
+    def render_metrics(self, exclude=()):
+        for state, count in self.jobs.state_counts().items():
+            SYNC_JOBS.labels(state).set(count)
+        return render(exclude=exclude)
+
+
+class _ClientManager(BaseManager):
+    pass
+
+
+_ClientManager.register('service')
+
+
+class RemoteJob:
+    """A job in the sync service; ``to_dict()`` reads its current state"""
+
+    def __init__(self, client, data):
+        self._client = client
+        self._data = data
+        self.id = data['job_id']
+
+    def to_dict(self):
+        data = self._client.call('job', self.id)
+        if data is not None:
+            self._data = data
+        elif self._data['status'] in ('queued', 'running'):
+            # Jobs only live in the service's memory
+            self._data = dict(self._data, status='failed', stage='done',
+                              error='The sync service restarted')
+        return copy.deepcopy(self._data)
+
+    def wait_for_change(self, seen_version, timeout):
+        return self._client.call('wait_for_change', self.id, seen_version, timeout)
+
+
+class SyncServiceClient:
+    """The sync service as seen from a web worker.
+
+    Offers the parts of SyncJobManager the API uses, plus Gmail status and
+    metrics. Connects on first use, so it can be created before workers
+    fork, and reconnects once if the service has restarted; otherwise
+    calls raise SyncServiceUnavailable.
+    """
+
+    def __init__(self, address=SYNC_SERVICE_ADDRESS, authkey=SYNC_SERVICE_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self._lock = threading.Lock()
+        self._proxy = None
+
+    def _service(self):
+        if self.authkey is None:
+            raise SyncServiceUnavailable(NO_AUTHKEY)
+        with self._lock:
+            if self._proxy is None:
+                manager = _ClientManager(address=self.address, authkey=self.authkey)
+                manager.connect()
+                self._proxy = manager.service()
+            return self._proxy
+
+    def call(self, method, *args):
+        """Call ``method`` on the service"""
+        for attempt in range(2):
+            proxy = None
+            try:
+                proxy = self._service()
+                return getattr(proxy, method)(*args)
+            except (OSError, EOFError, AuthenticationError) as e:
+                with self._lock:
+                    if proxy is None or self._proxy is proxy:
+                        self._proxy = None
+                if attempt:
+                    raise SyncServiceUnavailable(f"Sync service at {self.address} is unavailable: {e}") from e
+
+    def ping(self):
+        return self.call('ping')
+
+    def start(self, trigger='manual', kind='sync', account=DEFAULT_ACCOUNT, **options):
+        data, created = self.call('start', trigger, kind, account, options)
+        return RemoteJob(self, data), created
+
+    def get(self, job_id):
+        data = self.call('job', job_id)
+        return RemoteJob(self, data) if data is not None else None
+
+    def latest(self, account=None):
+        data = self.call('latest', account)
+        return RemoteJob(self, data) if data is not None else None
+
+    @property
+    def waiting(self):
+        return self.call('status')['waiting']
+
+    @property
+    def max_concurrent(self):
+        return self.call('status')['max_concurrent']
+
+    def account_metrics(self):
+        return self.call('account_metrics')
+
+    def state_counts(self):
+        return self.call('state_counts')
+
+    def throttled_seconds(self, account=None):
+        return self.call('throttled_seconds', account)
+
+    def gmail_statuses(self):
+        return self.call('gmail_statuses')
+
+    def render_metrics(self, exclude=()):
+        return self.call('render_metrics', tuple(exclude))
+
+    def push_http_metrics(self):
+        """Move this worker's request latencies into the service's totals"""
+        taken = HTTP_REQUEST_SECONDS.take()
+        if not taken:
+            return
+        try:
+            self.call('observe_http', taken)
+        except Exception:
+            # Keep them for the next push
+            HTTP_REQUEST_SECONDS.merge(taken)
+            raise
+
+
+def start_http_metrics_push(client, interval=HTTP_METRICS_PUSH_SECONDS):
+    """Push this web worker's request latencies to the service every ``interval`` seconds"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                client.push_http_metrics()
+            except Exception as e:
+                logger.debug(f"Could not push HTTP metrics: {e}")
+
+    thread = threading.Thread(target=run, name='http-metrics-push', daemon=True)
+    thread.start()
+    return thread
+
+
+def serve(service, address=SYNC_SERVICE_ADDRESS, authkey=SYNC_SERVICE_AUTHKEY):
+    """Answer clients on ``address`` until the process is stopped"""
+    class Manager(BaseManager):
+        pass
+
+    if authkey is None:
+        raise RuntimeError(NO_AUTHKEY)
+    Manager.register('service', callable=lambda: service)
+    # A socket left behind by an unclean exit would block the bind
+    if os.path.exists(address):
+        os.unlink(address)
+    if os.path.dirname(address):
+        os.makedirs(os.path.dirname(address), exist_ok=True)
+    # Only this user may connect; the umask covers the moment between bind and chmod
+    umask = os.umask(0o177)
+    try:
+        server = Manager(address=address, authkey=authkey).get_server()
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    logger.info(f"Sync service listening on {address}")
+    server.serve_forever()
+
+
+def main():
+    from app.main import start_sync_jobs
+    from app.parsers.pool import shutdown_parse_pool
+
+    if SYNC_SERVICE_AUTHKEY is None:
+        logging.basicConfig(level=logging.INFO)
+        logger.error(NO_AUTHKEY)
+        sys.exit(2)
+    jobs = start_sync_jobs()
+    # serve_forever stops on SystemExit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(SyncService(jobs))
+    finally:
+        logger.info("Sync service stopping")
+        shutdown_parse_pool()
+        if os.path.exists(SYNC_SERVICE_ADDRESS):
+            os.unlink(SYNC_SERVICE_ADDRESS)
+        logging.shutdown()
+        # Don't wait for running syncs: messages count as processed only once
+        # stored, and stored transactions are deduplicated, so the next sync redoes them
+        os._exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# gunicorn settings and app factory for the web workers that app.serve starts
+#
+#   gunicorn --config python:app.wsgi 'app.wsgi:create_web_app()'
+#
+# gunicorn reads the lower-case settings below from this module. The app is
+# loaded once in the master and forked into the workers, which then start
+# in milliseconds and share the master's memory.
+import os
+import time
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{int(os.getenv('PORT', 5000))}"
+workers = int(os.getenv('WEB_WORKERS', 2))
+# Threads per worker; each open sync progress stream holds one
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+# Seconds in-flight requests get on shutdown; inside docker stop's 10 second grace period
+graceful_timeout = 5
+preload_app = True
+
+# Seconds to wait for the sync service (and any migrations it runs) on startup
+SYNC_SERVICE_START_TIMEOUT = float(os.getenv('SYNC_SERVICE_START_TIMEOUT', 60))
+
+
+# This worker's connection for pushing request latencies to the sync service
+_metrics_client = None
+
+
+def post_fork(server, worker):
+    global _metrics_client
+    from app.dashboard import warm_dashboard_summary
+    from app.storage.db import get_engine
+    from app.sync_service import SyncServiceClient, start_http_metrics_push
+
+    # Never share database connections with the master
+    get_engine().dispose(close=False)
+    warm_dashboard_summary()
+    _metrics_client = SyncServiceClient()
+    start_http_metrics_push(_metrics_client)
+
+
+def worker_exit(server, worker):
+    # Hand over the latencies recorded since the last push
+    if _metrics_client is not None:
+        try:
+            _metrics_client.push_http_metrics()
+        except Exception:
+            pass
+
+
+def wait_for_sync_service(timeout=SYNC_SERVICE_START_TIMEOUT):
+    """Block until the sync service answers; it sets up the database first"""
+    from app.sync_service import SyncServiceClient, SyncServiceUnavailable
+
+    # A client of its own: connections made in the master must not reach the workers
+    client = SyncServiceClient()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.ping()
+        except SyncServiceUnavailable:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def create_web_app():
+    """The app as web workers run it: syncs, schedules and Gmail stay in the sync service"""
+    from app.main import create_app
+    from app.sync_service import SyncServiceClient
+
+    app = create_app(sync_service=SyncServiceClient())
+    wait_for_sync_service()
+    return app
@@ -0,0 +1,42 @@
+"""create transactions table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transactions',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('dedupe_key', sa.String(64), nullable=False),
+        sa.Column('date', sa.String(10), nullable=False),
+        sa.Column('description', sa.Text, nullable=False),
+        sa.Column('amount', sa.Float, nullable=False),
+        sa.Column('category', sa.String(64)),
+        sa.Column('bank', sa.String(32), nullable=False),
+        sa.Column('transaction_type', sa.String(16)),
+        sa.Column('filename', sa.Text),
+        sa.Column('message_id', sa.String(64)),
+        sa.Column('created_at', sa.DateTime, nullable=False,
+                  server_default=sa.func.current_timestamp()),
+        sa.UniqueConstraint('dedupe_key', name='uq_transactions_dedupe_key')
+    )
+    op.create_index('ix_transactions_bank_date', 'transactions', ['bank', 'date'])
+    op.create_index('ix_transactions_date', 'transactions', ['date'])
+    op.create_index('ix_transactions_category', 'transactions', ['category'])
+
+
+def downgrade():
+    op.drop_index('ix_transactions_category', table_name='transactions')
+    op.drop_index('ix_transactions_date', table_name='transactions')
+    op.drop_index('ix_transactions_bank_date', table_name='transactions')
+    op.drop_table('transactions')
@@ -0,0 +1,25 @@
+"""store_meta version counters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'store_meta',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('value', sa.Integer, nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_table('store_meta')
@@ -0,0 +1,38 @@
+"""spending rollups per month, bank and category
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'spending_rollups',
+        sa.Column('month', sa.String(7), primary_key=True),
+        sa.Column('bank', sa.String(32), primary_key=True),
+        sa.Column('category', sa.String(64), primary_key=True),
+        sa.Column('transactions', sa.Integer, nullable=False),
+        sa.Column('spend', sa.Float, nullable=False),
+        sa.Column('credits', sa.Float, nullable=False)
+    )
+    # Seed from whatever is already stored
+    op.execute("""
+        INSERT INTO spending_rollups (month, bank, category, transactions, spend, credits)
+        SELECT substr(date, 1, 7), bank, coalesce(category, 'Uncategorized'), count(*),
+               coalesce(sum(CASE WHEN amount < 0 THEN -amount ELSE 0.0 END), 0.0),
+               coalesce(sum(CASE WHEN amount > 0 THEN amount ELSE 0.0 END), 0.0)
+        FROM transactions
+        GROUP BY substr(date, 1, 7), bank, coalesce(category, 'Uncategorized')
+    """)
+
+
+def downgrade():
+    op.drop_table('spending_rollups')
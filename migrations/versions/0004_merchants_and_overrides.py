@@ -0,0 +1,49 @@
+"""merchant keys on transactions and user category overrides
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.categorize.normalize import merchant_key
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('merchant', sa.String(64)))
+    op.create_index('ix_transactions_merchant', 'transactions', ['merchant'])
+    op.create_table(
+        'category_overrides',
+        sa.Column('merchant', sa.String(64), primary_key=True),
+        sa.Column('category', sa.String(64), nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False,
+                  server_default=sa.func.current_timestamp())
+    )
+
+    # Backfill merchant keys for rows stored before this revision
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            'SELECT id, description FROM transactions WHERE id > :last_id ORDER BY id LIMIT :limit'
+        ), {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(sa.text('UPDATE transactions SET merchant = :merchant WHERE id = :id'),
+                     [{'id': row.id, 'merchant': merchant_key(row.description)} for row in rows])
+        last_id = rows[-1].id
+
+
+def downgrade():
+    op.drop_table('category_overrides')
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_index('ix_transactions_merchant')
+        batch_op.drop_column('merchant')
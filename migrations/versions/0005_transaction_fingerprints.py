@@ -0,0 +1,50 @@
+"""card and cross-statement fingerprints on transactions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.storage.dedupe import assign_fingerprints
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('card', sa.String(4)))
+    op.add_column('transactions', sa.Column('fingerprint', sa.String(64)))
+    op.add_column('transactions', sa.Column('near_key', sa.String(64)))
+    op.create_index('ix_transactions_fingerprint', 'transactions', ['fingerprint'])
+    op.create_index('ix_transactions_near_key_date', 'transactions', ['near_key', 'date'])
+
+    # Fingerprint stored rows statement by statement, as they were ingested
+    bind = op.get_bind()
+    rows = [dict(row._mapping) for row in bind.execute(sa.text(
+        'SELECT id, bank, card, description, amount, date, filename FROM transactions '
+        'ORDER BY filename, id'
+    ))]
+    updates = []
+    for _, statement in groupby(rows, key=lambda row: row['filename']):
+        for row in assign_fingerprints(list(statement)):
+            updates.append({'id': row['id'], 'fingerprint': row['fingerprint'],
+                            'near_key': row['near_key']})
+    if updates:
+        bind.execute(sa.text(
+            'UPDATE transactions SET fingerprint = :fingerprint, near_key = :near_key WHERE id = :id'
+        ), updates)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_index('ix_transactions_near_key_date')
+        batch_op.drop_index('ix_transactions_fingerprint')
+        batch_op.drop_column('near_key')
+        batch_op.drop_column('fingerprint')
+        batch_op.drop_column('card')
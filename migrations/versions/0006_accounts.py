@@ -0,0 +1,59 @@
+"""account column on transactions and per-account spending rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Rows synced before accounts existed belong to the default account
+DEFAULT_ACCOUNT = 'default'
+
+SEED_ROLLUPS = """
+    INSERT INTO spending_rollups ({columns}transactions, spend, credits)
+    SELECT substr(date, 1, 7), {select}coalesce(category, 'Uncategorized'), count(*),
+           coalesce(sum(CASE WHEN amount < 0 THEN -amount ELSE 0.0 END), 0.0),
+           coalesce(sum(CASE WHEN amount > 0 THEN amount ELSE 0.0 END), 0.0)
+    FROM transactions
+    GROUP BY substr(date, 1, 7), {select}coalesce(category, 'Uncategorized')
+"""
+
+
+def _create_rollups(with_account):
+    columns = [sa.Column('month', sa.String(7), primary_key=True)]
+    if with_account:
+        columns.append(sa.Column('account', sa.String(64), primary_key=True))
+    columns += [
+        sa.Column('bank', sa.String(32), primary_key=True),
+        sa.Column('category', sa.String(64), primary_key=True),
+        sa.Column('transactions', sa.Integer, nullable=False),
+        sa.Column('spend', sa.Float, nullable=False),
+        sa.Column('credits', sa.Float, nullable=False)
+    ]
+    op.create_table('spending_rollups', *columns)
+    keys = 'account, bank, ' if with_account else 'bank, '
+    op.execute(SEED_ROLLUPS.format(columns=f"month, {keys}category, ", select=keys))
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column(
+        'account', sa.String(64), nullable=False, server_default=DEFAULT_ACCOUNT))
+    op.create_index('ix_transactions_account_date', 'transactions', ['account', 'date'])
+
+    # The primary key changes, so the rollups are rebuilt rather than altered
+    op.drop_table('spending_rollups')
+    _create_rollups(with_account=True)
+
+
+def downgrade():
+    op.drop_table('spending_rollups')
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_index('ix_transactions_account_date')
+        batch_op.drop_column('account')
+    _create_rollups(with_account=False)
@@ -0,0 +1,38 @@
+"""spending rollups per month, account, bank and merchant
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'merchant_rollups',
+        sa.Column('month', sa.String(7), primary_key=True),
+        sa.Column('account', sa.String(64), primary_key=True),
+        sa.Column('bank', sa.String(32), primary_key=True),
+        sa.Column('merchant', sa.String(64), primary_key=True),
+        sa.Column('transactions', sa.Integer, nullable=False),
+        sa.Column('spend', sa.Float, nullable=False)
+    )
+    # Seed from whatever is already stored
+    op.execute("""
+        INSERT INTO merchant_rollups (month, account, bank, merchant, transactions, spend)
+        SELECT substr(date, 1, 7), account, bank, coalesce(merchant, upper(description)),
+               count(*), sum(-amount)
+        FROM transactions
+        WHERE amount < 0
+        GROUP BY substr(date, 1, 7), account, bank, coalesce(merchant, upper(description))
+    """)
+
+
+def downgrade():
+    op.drop_table('merchant_rollups')
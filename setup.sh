@@ -85,7 +85,7 @@ cat > start.sh << 'EOF'
 cd "$(dirname "$0")"
 source venv/bin/activate
 export FLASK_ENV=production
-python app/main.py
+python -m app.serve
 EOF
 chmod +x start.sh
 
@@ -0,0 +1,43 @@
+import pytest
+
+from app.storage import db
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """A migrated SQLite database of its own, also used as the process-wide engine"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(db, '_engine', None)
+    engine = db.init_db(db.get_engine())
+    yield engine
+    engine.dispose()
+
+
+def make_txn(date, description='SWIGGY BLR', amount=-200.0, bank='HDFC', filename='statement.pdf',
+             account='default', **extra):
+    return dict(date=date, description=description, amount=amount, bank=bank, filename=filename,
+                account=account, **extra)
+
+
+@pytest.fixture
+def sandbox(engine, tmp_path, monkeypatch):
+    """Run syncs in ``tmp_path`` (ledgers, downloads, caches) with PDFs parsed in-process"""
+    from app.parsers import cache, pool
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pool, 'PARSE_WORKERS', 0)
+    monkeypatch.setattr(cache, '_cache', None)
+    return tmp_path
+
+
+def fake_mailbox(count, bad=()):
+    """Real HDFC statements, except the indexes in ``bad``, which get a corrupt PDF"""
+    from app.bench.statements import generate_statement
+    from app.gmail.fake import generate_mailbox
+
+    def pdf(bank, index):
+        if index in bad:
+            return b'%PDF-1.4\nnot really a statement\n'
+        return generate_statement(bank, transactions=3, seed=index)[0]
+
+    return generate_mailbox(count, banks=['HDFC'], days=30, pdf_factory=pdf)
@@ -0,0 +1,44 @@
+import base64
+import json
+
+import pytest
+
+from app.gmail.attachments import json_string_chunks
+
+
+def chunked(body, size):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+@pytest.fixture
+def body():
+    data = base64.urlsafe_b64encode(bytes(range(256)) * 8).decode()
+    return data, json.dumps({'size': 2048, 'data': data, 'attachmentId': 'abc'}).encode()
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 1000, 100000])
+def test_value_is_reassembled_at_any_chunk_size(body, size):
+    data, raw = body
+    assert b''.join(json_string_chunks(chunked(raw, size), 'data')).decode() == data
+
+
+def test_value_is_streamed_not_buffered(body):
+    data, raw = body
+    pieces = list(json_string_chunks(chunked(raw, 100), 'data'))
+    assert len(pieces) > 1
+    assert max(len(piece) for piece in pieces) <= 100
+
+
+def test_other_fields_and_spacing_are_skipped():
+    raw = b'{"dataset": "no", "data"  :  "QUJD", "more": "x"}'
+    assert b''.join(json_string_chunks(chunked(raw, 4), 'data')) == b'QUJD'
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError):
+        list(json_string_chunks(chunked(b'{"size": 3, "data": "QUJ', 5), 'data'))
+
+
+def test_missing_field_raises():
+    with pytest.raises(ValueError):
+        list(json_string_chunks([b'{"size": 0}'], 'data'))
@@ -0,0 +1,75 @@
+import pytest
+
+from app.backfill import BackfillCheckpoint, run_backfill
+from app.gmail.fake import FakeGmailService
+from app.gmail.fetch import GmailFetcher
+from app.gmail.ledger import MAX_MESSAGE_ATTEMPTS, SyncLedger
+
+from tests.conftest import fake_mailbox
+
+
+@pytest.fixture
+def service():
+    return FakeGmailService(fake_mailbox(4, bad={1}))
+
+
+def backfill(service, **options):
+    return run_backfill(fetcher=GmailFetcher(lambda: service, max_workers=2),
+                        ledger=SyncLedger('ledger.json'), checkpoint=BackfillCheckpoint('state.json'),
+                        rate=1000, **options)
+
+
+def downloads(service):
+    return service.calls.get('_attachment', 0)
+
+
+def test_backfill_stores_every_statement_once(sandbox, service):
+    results = backfill(service)
+    assert results['success'] and results['complete']
+    assert results['emails_processed'] == 4
+    assert results['new_transactions'] == 9
+    assert results['failed_messages'] == 1
+
+
+def test_resumes_from_the_checkpoint_page_by_page(sandbox, service):
+    seen = []
+    while True:
+        before = downloads(service)
+        results = backfill(service, page_size=1, max_pages=1)
+        seen.append(downloads(service) - before)
+        if not results['yielded']:
+            break
+    assert results['complete']
+    # One new message per slice; the failed one is retried by the slices after it
+    assert sum(seen) == 4 + min(len(seen) - 2, MAX_MESSAGE_ATTEMPTS - 1)
+    assert SyncLedger('ledger.json').is_processed('fake000003')
+
+
+def test_failing_message_is_retried_until_it_runs_out_of_attempts(sandbox, service):
+    backfill(service)
+    first = downloads(service)
+    for _ in range(MAX_MESSAGE_ATTEMPTS + 2):
+        backfill(service)
+    assert downloads(service) - first == MAX_MESSAGE_ATTEMPTS - 1
+    assert SyncLedger('ledger.json').is_exhausted('fake000001')
+
+
+def test_journal_replays_messages_finished_before_a_crash(sandbox):
+    checkpoint = BackfillCheckpoint('state.json')
+    checkpoint.record_message('m1', {'attachments': [
+        {'attachment_id': 'a1', 'filename': 'x.pdf', 'sha256': 'abc'}]})
+    with open('state.json.journal', 'a') as f:
+        f.write('{"message_id": "m2", "entr')
+
+    ledger = SyncLedger('ledger.json')
+    assert BackfillCheckpoint('state.json').replay(ledger) == 1
+    assert ledger.is_processed('m1')
+    assert ledger.has_content('abc')
+
+
+def test_backfill_refuses_to_run_while_the_ledger_is_held(sandbox, service):
+    with SyncLedger('ledger.json').locked():
+        results = backfill(service)
+    assert results['success'] is False
+    assert 'locked' in results['error']
+    assert downloads(service) == 0
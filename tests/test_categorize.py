@@ -0,0 +1,43 @@
+from app.categorize.engine import Categorizer
+from app.categorize.rules import UNCATEGORIZED
+
+RULES = [
+    ('SWIGGY', 'Food', 'contains'),
+    ('AMAZON', 'Shopping', 'prefix'),
+    ('AMAZON PRIME', 'Entertainment', 'exact'),
+    ('PETROL', 'Fuel', 'contains'),
+]
+
+
+def test_branches_of_a_merchant_share_one_memo_entry():
+    categorizer = Categorizer(RULES)
+    assert categorizer.categorize('SWIGGY*BANGALORE 1234') == ('Food', 'SWIGGY BANGALORE')
+    assert categorizer.categorize('SWIGGY*BANGALORE 9876 REF 55') == ('Food', 'SWIGGY BANGALORE')
+    assert categorizer.categorize('Swiggy Bangalore KA') == ('Food', 'SWIGGY BANGALORE')
+    assert categorizer.stats['rules'] == 1
+    assert categorizer.stats['memo_hits'] == 2
+    assert len(categorizer._memo) == 1
+
+
+def test_keyword_outside_the_merchant_key_still_matches():
+    categorizer = Categorizer(RULES)
+    assert categorizer.categorize('HP CENTRE MUMBAI PETROL PUMP')[0] == 'Fuel'
+    assert categorizer.categorize('HP CENTRE MUMBAI PETROL PUMP')[0] == 'Fuel'
+    assert categorizer.categorize('HP CENTRE MUMBAI GROCERY')[0] == UNCATEGORIZED
+    assert categorizer.stats == {'overrides': 0, 'memo_hits': 1, 'rules': 1, 'fuzzy': 0, 'misses': 1}
+
+
+def test_fuzzy_match_catches_misspellings():
+    categorizer = Categorizer(RULES)
+    assert categorizer.categorize('SWIGGYY ORDER')[0] == 'Food'
+    assert categorizer.stats['fuzzy'] == 1
+
+
+def test_override_wins_over_the_memo():
+    categorizer = Categorizer(RULES)
+    assert categorizer.categorize('AMAZON PRIME MEMBERSHIP')[0] == 'Entertainment'
+    categorizer.set_override('AMAZON PRIME', 'Subscriptions')
+    assert categorizer.categorize('AMAZON PRIME MEMBERSHIP')[0] == 'Subscriptions'
+    assert categorizer.rule_category('AMAZON PRIME MEMBERSHIP') == 'Entertainment'
+    categorizer.remove_override('AMAZON PRIME')
+    assert categorizer.categorize('AMAZON PRIME MEMBERSHIP')[0] == 'Entertainment'
@@ -0,0 +1,73 @@
+from app.storage import count_transactions, upsert_transactions
+
+from tests.conftest import make_txn
+
+
+def ingest(engine, rows):
+    stats = {'duplicates': 0, 'near_duplicates': 0}
+    inserted = upsert_transactions(rows, engine=engine, stats=stats)
+    return inserted, stats
+
+
+def test_same_charge_in_two_statements_is_stored_once(engine):
+    ingest(engine, [make_txn('2024-01-10', filename='jan.pdf'),
+                    make_txn('2024-01-12', 'UBER TRIP', -350.0, filename='jan.pdf')])
+    inserted, stats = ingest(engine, [make_txn('2024-01-12', 'UBER TRIP', -350.0, filename='resent.pdf'),
+                                      make_txn('2024-01-20', 'ZOMATO', -90.0, filename='resent.pdf')])
+    assert inserted == 1
+    assert stats == {'duplicates': 1, 'near_duplicates': 0}
+    assert count_transactions(engine) == 3
+
+
+def test_reimporting_the_same_statement_adds_nothing(engine):
+    rows = [make_txn('2024-01-10'), make_txn('2024-01-11', 'ZOMATO', -90.0)]
+    ingest(engine, rows)
+    inserted, stats = ingest(engine, [dict(row) for row in rows])
+    assert inserted == 0
+    assert count_transactions(engine) == 2
+
+
+def test_identical_charges_on_one_day_are_kept(engine):
+    inserted, _ = ingest(engine, [make_txn('2024-01-10'), make_txn('2024-01-10')])
+    assert inserted == 2
+
+
+def test_charge_dated_a_day_apart_in_the_next_statement_is_a_near_duplicate(engine):
+    ingest(engine, [make_txn('2024-01-10', filename='a.pdf'), make_txn('2024-01-20', filename='a.pdf')])
+    inserted, stats = ingest(engine, [make_txn('2024-01-11', filename='b.pdf'),
+                                      make_txn('2024-01-25', 'ZOMATO', -90.0, filename='b.pdf')])
+    assert stats['near_duplicates'] == 1
+    assert inserted == 1
+
+
+def test_near_duplicate_across_a_statement_boundary(engine):
+    ingest(engine, [make_txn('2024-01-31', filename='jan.pdf')])
+    inserted, stats = ingest(engine, [make_txn('2024-02-01', filename='feb.pdf')])
+    assert stats == {'duplicates': 0, 'near_duplicates': 1}
+    assert inserted == 0
+    assert count_transactions(engine) == 1
+
+
+def test_charges_two_days_apart_are_not_near_duplicates(engine):
+    ingest(engine, [make_txn('2024-01-30', filename='jan.pdf')])
+    inserted, stats = ingest(engine, [make_txn('2024-02-01', filename='feb.pdf')])
+    assert stats['near_duplicates'] == 0
+    assert inserted == 1
+
+
+def test_repeat_charge_next_day_is_kept_when_the_statement_has_the_original(engine):
+    ingest(engine, [make_txn('2024-01-31', filename='jan.pdf')])
+    # feb.pdf repeats the 31st (an exact duplicate) and has a genuine charge on the 1st
+    inserted, stats = ingest(engine, [make_txn('2024-01-31', filename='feb.pdf'),
+                                      make_txn('2024-02-01', filename='feb.pdf')])
+    assert stats == {'duplicates': 1, 'near_duplicates': 0}
+    assert inserted == 1
+    assert count_transactions(engine) == 2
+
+
+def test_other_accounts_are_not_duplicates(engine):
+    ingest(engine, [make_txn('2024-01-31', filename='jan.pdf')])
+    inserted, stats = ingest(engine, [make_txn('2024-01-31', filename='jan.pdf', account='ravi'),
+                                      make_txn('2024-02-01', filename='feb.pdf', account='ravi')])
+    assert stats == {'duplicates': 0, 'near_duplicates': 0}
+    assert inserted == 2
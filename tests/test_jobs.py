@@ -0,0 +1,104 @@
+import threading
+import time
+
+from app.jobs import SyncJobManager
+
+
+def wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    version = job.version
+    while job.active:
+        assert time.monotonic() < deadline, f"job {job.id} still {job.status}"
+        version = job.wait_for_change(version, 0.1)
+    return job
+
+
+def wait_until_running(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.status != 'running':
+        assert time.monotonic() < deadline, f"job {job.id} never started"
+        job.wait_for_change(job.version, 0.1)
+
+
+def test_one_job_per_account_at_a_time():
+    release = threading.Event()
+
+    def sync(progress, account):
+        progress('downloading', {'emails_found': 1})
+        release.wait(5)
+        return {'success': True, 'account': account}
+
+    manager = SyncJobManager(sync, max_concurrent=2)
+    first, created = manager.start(account='a')
+    assert created
+    again, created = manager.start(account='a')
+    assert not created and again is first
+    other, created = manager.start(account='b')
+    assert created and other is not first
+
+    release.set()
+    assert wait(first).status == 'succeeded'
+    assert wait(other).result == {'success': True, 'account': 'b'}
+    assert manager.start(account='a')[1]
+
+
+def test_jobs_start_in_the_order_they_were_queued():
+    release = threading.Event()
+    started = []
+
+    def sync(progress, account):
+        started.append(account)
+        release.wait(5)
+        return {'success': True}
+
+    manager = SyncJobManager(sync, max_concurrent=1)
+    jobs = [manager.start(account=name)[0] for name in ('a', 'b', 'c')]
+    wait_until_running(jobs[0])
+    assert manager.waiting == 2
+    assert manager.account_metrics()['c']['queue_position'] == 2
+
+    release.set()
+    for job in jobs:
+        wait(job)
+    assert started == ['a', 'b', 'c']
+
+
+def test_yielded_job_goes_behind_other_accounts():
+    release = threading.Event()
+    started = []
+
+    def sync(progress, account):
+        started.append(account)
+        release.wait(5)
+        return {'success': True}
+
+    def backfill(progress, account, resumed=False):
+        started.append(f"backfill-{resumed}")
+        release.wait(5)
+        return {'success': True, 'yielded': not resumed}
+
+    manager = SyncJobManager(sync, tasks={'backfill': backfill}, max_concurrent=1)
+    slow = manager.start(kind='backfill', account='a')[0]
+    quick = manager.start(account='b')[0]
+    # Still the active job of its account while it waits for its next slice
+    assert manager.start(account='a')[0] is slow
+
+    release.set()
+    wait(quick)
+    assert wait(slow).status == 'succeeded'
+    assert started == ['backfill-False', 'b', 'backfill-True']
+    assert slow.slices == 2
+
+
+def test_failures_are_recorded():
+    def sync(progress, account):
+        if account == 'broken':
+            raise RuntimeError('boom')
+        return {'success': False, 'error': 'no statements'}
+
+    manager = SyncJobManager(sync)
+    crashed = wait(manager.start(account='broken')[0])
+    assert (crashed.status, crashed.error) == ('failed', 'boom')
+    failed = wait(manager.start(account='empty')[0])
+    assert (failed.status, failed.error) == ('failed', 'no statements')
+    assert manager.account_metrics()['broken']['failures'] == 1
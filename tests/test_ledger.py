@@ -0,0 +1,88 @@
+import pytest
+
+from app.filelock import FileLocked
+from app.gmail.fake import FakeGmailService
+from app.gmail.fetch import GmailFetcher
+from app.gmail.ledger import CURSOR_OVERLAP_SECONDS, MAX_MESSAGE_ATTEMPTS, SyncLedger
+from app.main import sync_credit_card_statements
+
+from tests.conftest import fake_mailbox
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = SyncLedger(path)
+    assert ledger.is_empty
+    ledger.record_attachment('m1', 'a1', 'statement.pdf', 'abc')
+    ledger.mark_processed('m1')
+    ledger.finish_sync(42, 1_700_000_000.5)
+    ledger.save()
+
+    loaded = SyncLedger(path)
+    assert loaded.is_processed('m1')
+    assert loaded.has_content('abc')
+    assert loaded.history_id == '42'
+    assert loaded.last_sync_at == 1_700_000_000
+
+
+def test_search_cursor_overlaps_the_last_sync(tmp_path):
+    ledger = SyncLedger(str(tmp_path / 'ledger.json'))
+    assert ledger.search_cursor() is None
+    ledger.finish_sync(None, 1_700_000_000)
+    assert ledger.search_cursor() == 1_700_000_000 - CURSOR_OVERLAP_SECONDS
+    ledger.finish_sync(None, 60)
+    assert ledger.search_cursor() == 0
+
+
+def test_failed_message_is_pending_until_exhausted(tmp_path):
+    ledger = SyncLedger(str(tmp_path / 'ledger.json'))
+    for attempt in range(1, MAX_MESSAGE_ATTEMPTS + 1):
+        assert not ledger.is_exhausted('m1')
+        ledger.mark_failed('m1')
+        assert ledger.messages['m1']['attempts'] == attempt
+    assert ledger.is_exhausted('m1')
+    assert ledger.pending_messages() == []
+
+    ledger.mark_failed('m2')
+    assert ledger.pending_messages() == ['m2']
+    ledger.mark_processed('m2')
+    assert ledger.pending_messages() == []
+    assert not ledger.is_exhausted('m2')
+
+
+def test_locked_excludes_a_second_run(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    with SyncLedger(path).locked():
+        with pytest.raises(FileLocked):
+            with SyncLedger(path).locked():
+                pass
+    with SyncLedger(path).locked():
+        pass
+
+
+def test_locked_rereads_the_ledger(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    stale = SyncLedger(path)
+    fresh = SyncLedger(path)
+    fresh.mark_processed('m1')
+    fresh.save()
+    with stale.locked():
+        assert stale.is_processed('m1')
+
+
+def test_sync_skips_processed_mail_and_gives_up_on_a_bad_statement(sandbox):
+    service = FakeGmailService(fake_mailbox(3, bad={1}))
+    fetcher = GmailFetcher(lambda: service, max_workers=2)
+
+    results = sync_credit_card_statements(fetcher=fetcher)
+    assert results['success']
+    assert results['new_transactions'] == 6
+    assert service.calls['_attachment'] == 3
+
+    for _ in range(MAX_MESSAGE_ATTEMPTS + 1):
+        results = sync_credit_card_statements(fetcher=fetcher)
+        assert results['success']
+        assert results['new_transactions'] == 0
+    # Only the bad statement is downloaded again, once per remaining attempt
+    assert service.calls['_attachment'] == 3 + MAX_MESSAGE_ATTEMPTS - 1
+    assert SyncLedger('data/sync_ledger.json').is_exhausted('fake000001')
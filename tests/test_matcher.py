@@ -0,0 +1,55 @@
+from app.categorize.matcher import KeywordMatcher
+
+RULES = [
+    ('UBER', 'Transport', 'contains'),
+    ('UBER EATS', 'Food', 'contains'),
+    ('AMAZON', 'Shopping', 'prefix'),
+    ('AMAZON PRIME', 'Entertainment', 'exact'),
+    ('PRIME', 'Entertainment', 'contains'),
+    ('FUEL', 'Fuel', 'contains'),
+    ('FUEL', 'Other', 'contains'),
+]
+
+
+def best(text, rules=RULES):
+    return KeywordMatcher(rules).best(text)
+
+
+def test_contains_matches_whole_words_anywhere():
+    assert best('PAYMENT UBER TRIP') == ('Transport', 'UBER')
+    assert best('UBERX TRIP') is None
+    assert best('SUPERUBER') is None
+
+
+def test_longer_keyword_wins():
+    assert best('UBER EATS ORDER') == ('Food', 'UBER EATS')
+
+
+def test_prefix_only_matches_at_the_start():
+    assert best('AMAZON RETAIL') == ('Shopping', 'AMAZON')
+    assert best('PAY AMAZON RETAIL') is None
+
+
+def test_exact_beats_prefix_and_contains():
+    assert best('AMAZON PRIME') == ('Entertainment', 'AMAZON PRIME')
+    assert best('AMAZON PRIME VIDEO') == ('Shopping', 'AMAZON')
+
+
+def test_earlier_rule_wins_a_tie():
+    assert best('SHELL FUEL STATION') == ('Fuel', 'FUEL')
+
+
+def test_keywords_are_normalized_and_blank_ones_ignored():
+    rules = [('  indian   oil ', 'Fuel', 'contains'), ('   ', 'Nothing', 'contains')]
+    assert best('IOCL INDIAN OIL PUMP', rules) == ('Fuel', '  indian   oil ')
+    assert best('ANYTHING', rules) is None
+
+
+def test_overlapping_keywords_found_through_failure_links():
+    rules = [('ABCD', 'Long', 'contains'), ('BC', 'Short', 'contains'), ('C', 'Single', 'contains')]
+    assert best('X ABC BC', rules) == ('Short', 'BC')
+    assert best('ABC C', rules) == ('Single', 'C')
+
+
+def test_no_rules():
+    assert best('ANYTHING', []) is None
@@ -0,0 +1,67 @@
+import os
+
+from app.gmail.fake import FakeGmailService
+from app.gmail.fetch import GmailFetcher
+from app.main import sync_credit_card_statements
+from app.parsers.cache import ParseCache
+from app.parsers.registry import PARSERS
+
+from tests.conftest import fake_mailbox
+
+ROWS = [{'date': '2024-01-05', 'description': 'SWIGGY BLR', 'amount': -200.0,
+         'category': 'Food', 'transaction_type': 'debit'}]
+
+
+def test_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    assert cache.get('ab' * 32, 'statement.pdf') is None
+    cache.put('ab' * 32, 'HDFC', PARSERS['HDFC'].version, ROWS)
+
+    rows = ParseCache(str(tmp_path)).get('ab' * 32, 'statement.pdf')
+    assert rows == [dict(ROWS[0], bank='HDFC', filename='statement.pdf')]
+
+
+def test_entry_from_an_older_parser_version_is_a_miss(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    cache.put('ab' * 32, 'HDFC', PARSERS['HDFC'].version, ROWS)
+    path = cache._path('ab' * 32)
+
+    monkeypatch.setattr(PARSERS['HDFC'], 'version', PARSERS['HDFC'].version + 1)
+    assert cache.get('ab' * 32, 'statement.pdf') is None
+    assert not os.path.exists(path)
+    assert cache.stats == {'hits': 0, 'misses': 1, 'evictions': 0}
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.put('ab' * 32, 'HDFC', PARSERS['HDFC'].version, ROWS)
+    with open(cache._path('ab' * 32), 'wb') as f:
+        f.write(b'garbage')
+    assert cache.get('ab' * 32, 'statement.pdf') is None
+    assert not os.path.exists(cache._path('ab' * 32))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=1)
+    version = PARSERS['HDFC'].version
+    cache.put('aa' * 32, 'HDFC', version, ROWS)
+    cache.put('bb' * 32, 'HDFC', version, ROWS)
+    assert cache.get('aa' * 32, 'statement.pdf') is None
+    assert cache.get('bb' * 32, 'statement.pdf') is not None
+    assert cache.stats['evictions'] == 1
+
+
+def test_sync_reparses_statements_after_a_parser_change(sandbox, monkeypatch):
+    service = FakeGmailService(fake_mailbox(3))
+
+    def resync():
+        # A fresh ledger makes the sync download every statement again
+        if os.path.exists('data/sync_ledger.json'):
+            os.remove('data/sync_ledger.json')
+        return sync_credit_card_statements(fetcher=GmailFetcher(lambda: service))
+
+    assert resync()['parse_cache_hits'] == 0
+    assert resync()['parse_cache_hits'] == 3
+    monkeypatch.setattr(PARSERS['HDFC'], 'version', PARSERS['HDFC'].version + 1)
+    assert resync()['parse_cache_hits'] == 0
+    assert resync()['parse_cache_hits'] == 3
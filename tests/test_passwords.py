@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.bench.statements import generate_statement
+from app.parsers.passwords import PasswordResolver, PdfPasswordError
+
+PROFILE = {'name4': 'VISH', 'ddmm': '1411', 'ddmmyy': '141190', 'ddmmyyyy': '14111990', 'last4': '4321'}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'strategies.json')
+
+
+def statement(bank, password):
+    return generate_statement(bank, transactions=3, password=password)[0]
+
+
+def test_unencrypted_statement_needs_no_password(path):
+    resolver = PasswordResolver(path, PROFILE)
+    assert resolver.resolve(statement('HDFC', None), 'HDFC') is None
+    assert resolver.encrypted == 0
+
+
+def test_learned_strategy_is_tried_first_next_time(path):
+    # SCB's usual patterns come before the one this card uses
+    pdf = statement('SCB', 'VISH141190')
+    first = PasswordResolver(path, PROFILE)
+    assert first.resolve(pdf, 'SCB', card='1234') == 'VISH141190'
+    assert first.attempts > 1
+
+    second = PasswordResolver(path, PROFILE)
+    assert second.candidate_order('SCB', '1234')[0] == 'NAME4_DDMMYY'
+    assert second.resolve(pdf, 'SCB', card='1234') == 'VISH141190'
+    assert second.attempts == 1
+
+
+def test_concurrent_resolvers_keep_each_others_strategies(path):
+    # Two syncs start with the same (empty) file and learn different banks
+    hdfc, sbi = PasswordResolver(path, PROFILE), PasswordResolver(path, PROFILE)
+    hdfc.resolve(statement('HDFC', 'VISH1411'), 'HDFC')
+    sbi.resolve(statement('SBI', '141119904321'), 'SBI')
+
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved == {'HDFC': 'NAME4_DDMM', 'SBI': 'DDMMYYYY_LAST4'}
+    assert PasswordResolver(path, PROFILE).strategies == saved
+
+
+def test_wrong_profile_raises(path):
+    resolver = PasswordResolver(path, dict(PROFILE, name4='ABCD', ddmm='0101', ddmmyy='010100',
+                                           ddmmyyyy='01012000'))
+    with pytest.raises(PdfPasswordError):
+        resolver.resolve(statement('HDFC', 'VISH1411'), 'HDFC')
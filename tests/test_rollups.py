@@ -0,0 +1,65 @@
+from sqlalchemy import update
+
+from app.storage import check_rollups, rebuild_rollups, rollup_totals, top_merchants, upsert_transactions
+from app.storage.categories import save_override
+from app.storage.db import transactions
+from app.storage.rollups import refresh_buckets
+
+from tests.conftest import make_txn
+
+
+def seed(engine):
+    upsert_transactions([
+        make_txn('2024-01-05', 'SWIGGY BLR', -200.0, category='Food', merchant='SWIGGY BLR'),
+        make_txn('2024-01-20', 'UBER TRIP', -300.0, category='Transport', merchant='UBER TRIP'),
+        make_txn('2024-01-25', 'REFUND', 50.0, category='Shopping', merchant='REFUND'),
+    ], engine=engine)
+    upsert_transactions([
+        make_txn('2024-02-03', 'SWIGGY BLR', -120.0, bank='SBI', filename='feb.pdf',
+                 category='Food', merchant='SWIGGY BLR'),
+    ], engine=engine)
+
+
+def test_ingest_keeps_rollups_in_step(engine):
+    seed(engine)
+    assert check_rollups(engine) == []
+    by_month = {row['month']: row for row in rollup_totals(group_by=('month',), engine=engine)}
+    assert by_month['2024-01']['spend'] == 500.0
+    assert by_month['2024-01']['credits'] == 50.0
+    assert by_month['2024-02']['transactions'] == 1
+    assert top_merchants(engine) == [
+        {'merchant': 'SWIGGY BLR', 'transactions': 2, 'spend': 320.0},
+        {'merchant': 'UBER TRIP', 'transactions': 1, 'spend': 300.0},
+    ]
+
+
+def test_override_refreshes_the_merchant_buckets(engine):
+    seed(engine)
+    save_override('SWIGGY BLR', 'Dining', engine=engine)
+    assert check_rollups(engine) == []
+    categories = {row['category']: row['spend']
+                  for row in rollup_totals(group_by=('category',), engine=engine)}
+    assert categories['Dining'] == 320.0
+    assert 'Food' not in categories
+
+
+def test_refresh_buckets_recomputes_only_the_given_buckets(engine):
+    seed(engine)
+    with engine.begin() as conn:
+        conn.execute(update(transactions).where(transactions.c.description == 'UBER TRIP')
+                     .values(amount=-1000.0))
+    assert len(check_rollups(engine)) == 2
+
+    with engine.begin() as conn:
+        refresh_buckets(conn, {('2024-01', 'default', 'HDFC')})
+    assert check_rollups(engine) == []
+    assert rollup_totals(engine=engine)[0]['spend'] == 1320.0
+
+
+def test_rebuild_matches_refreshed_rollups(engine):
+    seed(engine)
+    before = rollup_totals(group_by=('month', 'bank', 'category'), engine=engine)
+    merchants = top_merchants(engine)
+    rebuild_rollups(engine)
+    assert rollup_totals(group_by=('month', 'bank', 'category'), engine=engine) == before
+    assert top_merchants(engine) == merchants
@@ -0,0 +1,54 @@
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from app.main import create_app
+from app.sync_service import SyncService, SyncServiceClient, SyncServiceUnavailable, serve
+
+
+@pytest.fixture
+def running_service(tmp_path):
+    address = str(tmp_path / 'sync.sock')
+    threading.Thread(target=serve, args=(SyncService(jobs=None), address, b'right-key'),
+                     daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(address):
+        assert time.monotonic() < deadline, 'sync service did not start'
+        time.sleep(0.01)
+    return address
+
+
+def test_socket_is_private_to_its_owner(running_service):
+    assert stat.S_IMODE(os.stat(running_service).st_mode) == 0o600
+
+
+def test_client_with_the_key_is_answered(running_service):
+    assert SyncServiceClient(running_service, b'right-key').ping() == os.getpid()
+
+
+def test_client_with_a_wrong_key_is_refused(running_service):
+    with pytest.raises(SyncServiceUnavailable):
+        SyncServiceClient(running_service, b'wrong-key').ping()
+
+
+def test_missing_key_is_refused(tmp_path):
+    with pytest.raises(SyncServiceUnavailable):
+        SyncServiceClient(str(tmp_path / 'sync.sock'), None).ping()
+    with pytest.raises(RuntimeError):
+        serve(SyncService(jobs=None), str(tmp_path / 'sync.sock'), None)
+
+
+def test_web_worker_answers_503_when_the_service_is_down(tmp_path):
+    app = create_app(sync_service=SyncServiceClient(str(tmp_path / 'missing.sock'), b'key'))
+    client = app.test_client()
+    response = client.get('/sync/status')
+    assert response.status_code == 503
+    assert response.json['success'] is False
+    assert client.post('/sync').status_code == 503
+    # Health stays up, reporting Gmail as unknown
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json['gmail_connected'] is False
@@ -0,0 +1,83 @@
+import pytest
+from flask import Flask
+
+from app.api.transactions import decode_cursor, encode_cursor, transactions_bp
+from app.storage import page_transactions, upsert_transactions
+
+from tests.conftest import make_txn
+
+
+@pytest.fixture
+def client(engine):
+    app = Flask(__name__)
+    app.register_blueprint(transactions_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def stored(engine):
+    # Several rows per date, so pages split between rows of the same day
+    rows = [make_txn(f"2024-01-{day:02d}", f"MERCHANT {day} {n}", -10.0 * (n + 1))
+            for day in range(1, 8) for n in range(3)]
+    upsert_transactions(rows, engine=engine)
+    return rows
+
+
+def walk(client, query, cursor=None):
+    pages = []
+    while True:
+        url = f"/transactions?{query}" + (f"&cursor={cursor}" if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.json['transactions'])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(('2024-01-31', 42))) == ('2024-01-31', 42)
+
+
+def test_pages_cover_every_row_once_newest_first(client, stored):
+    pages = walk(client, 'limit=4&fields=id,date')
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 1]
+    rows = [row for page in pages for row in page]
+    assert len({row['id'] for row in rows}) == len(stored)
+    keys = [(row['date'], row['id']) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_count_is_every_matching_row_not_the_page(client, stored):
+    page = client.get('/transactions?limit=4').json
+    assert len(page['transactions']) == 4
+    assert page['count'] == len(stored)
+    filtered = client.get('/transactions?limit=2&from=2024-01-03&to=2024-01-04').json
+    assert filtered['count'] == 6
+
+
+def test_rows_added_between_pages_do_not_shift_later_pages(client, stored, engine):
+    first = client.get('/transactions?limit=5&fields=id,date').json
+    upsert_transactions([make_txn('2024-02-01', 'NEWER')], engine=engine)
+    rest = walk(client, 'limit=5&fields=id,date', cursor=first['next_cursor'])
+    ids = [row['id'] for row in first['transactions']] + [row['id'] for page in rest for row in page]
+    assert len(ids) == len(set(ids)) == len(stored)
+
+
+def test_cursor_keeps_filters(client, stored):
+    pages = walk(client, 'limit=2&from=2024-01-03&to=2024-01-04&fields=date')
+    dates = {row['date'] for page in pages for row in page}
+    assert dates == {'2024-01-03', '2024-01-04'}
+    assert sum(len(page) for page in pages) == 6
+
+
+def test_page_transactions_without_date_field(engine, stored):
+    rows, next_key = page_transactions(3, fields=['description'], engine=engine)
+    assert [set(row) for row in rows] == [{'description'}] * 3
+    assert next_key[0] == '2024-01-07'
+
+
+def test_bad_cursor_is_rejected(client, stored):
+    response = client.get('/transactions?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'